@@ -5,6 +5,7 @@ This is the entry point for the MCP server that handles JSON-RPC requests from t
 """
 import logging
 import os
+import sys
 from typing import Dict, Any
 
 import uvicorn
@@ -194,7 +195,8 @@ async def generate_key(name: str, expires_days: int = 30):
     else:
         raise HTTPException(status_code=400, detail="Authentication is not enabled")
 
-if __name__ == "__main__":    
+def main():
+    """Run the MCP server with the host, port and TLS settings from the environment."""
     # Get host and port from environment variables or use defaults
     host = os.getenv("MCP_SERVER_HOST", "127.0.0.1")
     port = int(os.getenv("MCP_SERVER_PORT", "8000"))
@@ -227,3 +229,6 @@ if __name__ == "__main__":
     else:
         logger.info(f"Starting MCP server on {host}:{port}")
         uvicorn.run(app, host=host, port=port)
+
+if __name__ == "__main__":
+    main()
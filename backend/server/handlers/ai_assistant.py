@@ -187,7 +187,6 @@ def generate_response(
                 "type": "filter",
                 "operation": "apply_blur",
                 "parameters": {
-                    "blur_type": "gaussian",
                     "radius": 5.0
                 }
             }
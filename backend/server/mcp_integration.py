@@ -11,6 +11,8 @@ import base64
 from typing import Dict, Any, List, Optional
 import os
 import tempfile
+import time
+import uuid
 from io import BytesIO
 
 import numpy as np
@@ -21,6 +23,40 @@ logger = logging.getLogger(__name__)
 # Cache of open images to maintain state between calls
 OPEN_IMAGES = {}
 
+# Directory the server may write saved images to on a client's behalf; unset disables it
+OUTPUT_DIR_ENV = "MCP_OUTPUT_DIR"
+
+def resolve_output_path(output_path: str) -> Optional[str]:
+    """
+    Map a client-supplied output path to a file the server may write.
+    
+    ``server://relative/path`` names a file under MCP_OUTPUT_DIR; a plain path is
+    accepted only if it lies inside that directory (e.g. a mount shared with the client).
+    
+    Args:
+        output_path: Output path from a save_image request
+        
+    Returns:
+        The absolute path to write, or None if the server can't write it
+    """
+    root = os.environ.get(OUTPUT_DIR_ENV)
+    if not root:
+        return None
+    root = os.path.realpath(root)
+    
+    if output_path.startswith("server://"):
+        candidate = os.path.join(root, output_path[len("server://"):].lstrip("/"))
+    elif "://" in output_path:
+        return None  # Other storage schemes (s3:// etc.) aren't supported
+    else:
+        candidate = output_path
+    
+    # Refuse anything that resolves outside the output directory
+    target = os.path.realpath(candidate)
+    if os.path.commonpath([root, target]) != root:
+        return None
+    return target
+
 class MCPImageSession:
     """
     Class to manage an image session for MCP interactions.
@@ -73,12 +109,19 @@ class MCPImageSession:
         # This would call the appropriate operation on the image
         # For now, we'll implement a few basic operations
         
+        # Liveness check for clients resuming a saved session; not an edit, so not recorded
+        if operation == "ping":
+            return {"success": True, "message": "Session is alive"}
+        
         result = {"success": False, "message": "Operation not implemented"}
         
         if operation == "create_new_image":
             width = params.get("width", 1000)
             height = params.get("height", 1000)
             color = params.get("color", (0, 0, 0, 0))
+            # JSON-RPC delivers tuples as lists, which PIL doesn't accept as a color
+            if isinstance(color, list):
+                color = tuple(color)
             
             self.image = Image.new("RGBA", (width, height), color)
             result = {
@@ -148,12 +191,23 @@ class MCPImageSession:
             format = params.get("format", "PNG")
             quality = params.get("quality", 95)
             
-            # For demonstration, just update the result
-            result = {
-                "success": True,
-                "message": f"Image saved in {format} format with quality {quality}",
-                "image_data": self.get_image_base64(format)
-            }
+            # Write the file here when the client named a path this server may write
+            target = resolve_output_path(params["output_path"]) if params.get("output_path") else None
+            if target:
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                self.image.save(target, format=format, quality=quality)
+                result = {
+                    "success": True,
+                    "message": f"Image saved to {target}",
+                    "saved_path": params["output_path"]
+                }
+            else:
+                # Otherwise hand the image back for the client to write
+                result = {
+                    "success": True,
+                    "message": f"Image saved in {format} format with quality {quality}",
+                    "image_data": self.get_image_base64(format)
+                }
         
         # Add the operation to history
         self.add_operation(operation, params, result)
@@ -223,8 +277,8 @@ async def handle_mcp_operation(params: Dict[str, Any]) -> Dict[str, Any]:
             "height": session.image.height
         }
         
-        # Include image data if requested or if it's a save operation
-        if operation == "save_image" or params.get("include_image_data", False):
+        # Include image data if requested or if it's a save the server didn't write itself
+        if (operation == "save_image" and "saved_path" not in result) or params.get("include_image_data", False):
             result["image_data"] = session.get_image_base64()
         
         return result
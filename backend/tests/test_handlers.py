@@ -18,6 +18,8 @@ from server.handlers.background_removal import handle_background_removal
 from server.handlers.inpainting import handle_inpainting
 from server.handlers.style_transfer import handle_style_transfer
 from server.handlers.upscale import handle_upscale
+from server.handlers.ai_assistant import generate_response
+from server.mcp_integration import OPEN_IMAGES, handle_mcp_operation, handle_mcp_close_session
 
 # Mock the tasks_progress dictionary
 sys.modules['server.app'] = type('MockApp', (), {'tasks_progress': {}})
@@ -248,3 +250,41 @@ async def test_upscale():
     finally:
         # Restore the original function
         upscale_module.process_upscaling = original_func
+
+def test_blur_suggestion_matches_mcp_operation():
+    """Test that the assistant's blur suggestion only uses parameters apply_blur accepts."""
+    _, suggestion = generate_response("Can you blur this?", [], {}, {})
+    
+    assert suggestion["operation"] == "apply_blur"
+    assert set(suggestion["parameters"]) == {"radius"}
+
+@pytest.mark.asyncio
+async def test_mcp_ping_existing_session():
+    """Test that ping confirms a live session without recording an operation."""
+    result = await handle_mcp_operation({
+        "operation": "open_image",
+        "image_data": create_test_image(40, 30)
+    })
+    session_id = result["session_id"]
+    try:
+        history_length = len(OPEN_IMAGES[session_id].history)
+        
+        result = await handle_mcp_operation({"operation": "ping", "session_id": session_id})
+        assert result["success"] is True
+        assert result["session_id"] == session_id
+        assert result["image_dimensions"] == {"width": 40, "height": 30}
+        assert "image_data" not in result
+        assert len(OPEN_IMAGES[session_id].history) == history_length
+    finally:
+        await handle_mcp_close_session({"session_id": session_id})
+
+@pytest.mark.asyncio
+async def test_mcp_ping_unknown_session():
+    """Test that ping rejects a session the server doesn't have."""
+    sessions = set(OPEN_IMAGES)
+    
+    with pytest.raises(RuntimeError, match="Invalid session ID"):
+        await handle_mcp_operation({"operation": "ping", "session_id": "no-such-session"})
+    
+    # No session is created for the unknown ID
+    assert set(OPEN_IMAGES) == sessions
@@ -4,21 +4,165 @@ Utilities for handling image data in the GIMP plugin.
 This module provides functions for converting between GIMP drawables and
 base64-encoded images for sending to the MCP server.
 """
-import base64
+import binascii
+import collections
 import io
+import mmap
 import os
+import struct
+from contextlib import contextmanager
+from multiprocessing import shared_memory
 from typing import Tuple, Optional
 
 import numpy as np
 from gimpfu import *
 from PIL import Image
 
-def drawable_to_pil(drawable):
+# Use SIMD-accelerated base64 when available
+try:
+    from pybase64 import b64encode, b64decode
+except ImportError:
+    from base64 import b64encode, b64decode
+
+# Use a fused Numba kernel for grayscale conversion when available
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# Header prepended to raw RGBA payloads: magic followed by 32-bit width and height,
+# since GIMP images can be up to 524288 pixels on a side
+RAW_MAGIC = b"GIMPRAW2"
+_RAW_HEADER = struct.Struct("<8sII")
+
+# File chunk size for streaming base64; a multiple of 3 so chunks need no padding
+_B64_CHUNK_SIZE = 192 * 1024
+
+# Base64 text is decoded in slices of this many characters; a multiple of 4 so
+# every slice decodes on its own
+_B64_DECODE_CHUNK_SIZE = 256 * 1024
+
+# Reusable encode and decode buffers, so burst renders don't reallocate them each call.
+# Buffers keep their capacity between uses; only the bytes a caller wrote are valid.
+_bio_pool = collections.deque(maxlen=4)
+_buffer_pool = collections.deque(maxlen=4)
+
+# Buffers grown past this are dropped rather than pooled, so one huge render
+# doesn't stay resident for the life of the plug-in
+_POOL_MAX_BYTES = 8 * 1024 * 1024
+
+@contextmanager
+def _rent_bio():
+    """
+    Borrow a BytesIO buffer from the pool, returning it on exit.
+    
+    The buffer is not emptied between uses (truncating would free its memory),
+    so read back only getbuffer()[:tell()] after writing from the start.
+    
+    Yields:
+        BytesIO buffer positioned at offset 0
+    """
+    bio = _bio_pool.pop() if _bio_pool else io.BytesIO()
+    try:
+        bio.seek(0)
+        yield bio
+    finally:
+        if bio.seek(0, io.SEEK_END) <= _POOL_MAX_BYTES:
+            _bio_pool.append(bio)
+
+@contextmanager
+def _rent_buffer(size):
+    """
+    Borrow a bytearray of at least size bytes from the pool, returning it on exit.
+    
+    Args:
+        size: Minimum number of bytes needed
+        
+    Yields:
+        bytearray holding stale bytes from earlier uses
+    """
+    for i, buf in enumerate(_buffer_pool):
+        if len(buf) >= size:
+            del _buffer_pool[i]
+            break
+    else:
+        buf = bytearray(size)
+    try:
+        yield buf
+    finally:
+        if len(buf) <= _POOL_MAX_BYTES:
+            _buffer_pool.append(buf)
+
+def _pil_raw_bytes(image):
+    """
+    Get the raw RGBA pixel bytes of a PIL Image.
+    
+    Args:
+        image: PIL Image object
+        
+    Returns:
+        Raw RGBA pixel data as bytes
+    """
+    if image.mode != "RGBA":
+        image = image.convert("RGBA")
+    return image.tobytes()
+
+# ITU-R BT.601 luma weights, matching PIL's and OpenCV's RGB -> L conversion
+_LUMA_WEIGHTS = np.array([0.299, 0.587, 0.114], dtype=np.float32)
+
+if NUMBA_AVAILABLE:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _rgb_to_gray_u8(src, dst):
+        # Fixed-point BT.601 weights (77 + 150 + 29 = 256), rounded
+        height, width = dst.shape
+        for y in prange(height):
+            for x in range(width):
+                r = np.int32(src[y, x, 0])
+                g = np.int32(src[y, x, 1])
+                b = np.int32(src[y, x, 2])
+                dst[y, x] = np.uint8((77 * r + 150 * g + 29 * b + 128) >> 8)
+
+def _to_gray(arr):
+    """
+    Convert an (height, width, channels) RGB(A) array to grayscale.
+    
+    Args:
+        arr: NumPy uint8 array with at least three channels
+        
+    Returns:
+        NumPy uint8 array of shape (height, width)
+    """
+    # Single pass with integer math, no float intermediates
+    if NUMBA_AVAILABLE:
+        gray = np.empty(arr.shape[:2], dtype=np.uint8)
+        _rgb_to_gray_u8(arr, gray)
+        return gray
+    
+    gray = np.einsum('hwc,c->hw', arr[..., :3].astype(np.float32), _LUMA_WEIGHTS)
+    return (gray + 0.5).astype(np.uint8)
+
+def _rgb_to_rgba(arr):
+    """
+    Add a fully opaque alpha channel to an (height, width, 3) RGB array.
+    
+    Args:
+        arr: NumPy uint8 array of RGB pixels
+        
+    Returns:
+        NumPy uint8 array of shape (height, width, 4)
+    """
+    alpha = np.full(arr.shape[:2] + (1,), 255, dtype=np.uint8)
+    return np.concatenate([arr, alpha], axis=-1)
+
+def drawable_to_pil(drawable, mode=None):
     """
     Convert a GIMP drawable to a PIL Image.
     
     Args:
         drawable: GIMP drawable (layer)
+        mode: Optional target PIL mode ("L", "RGB" or "RGBA"); defaults to
+            the drawable's native mode
         
     Returns:
         PIL Image object
@@ -31,27 +175,50 @@ def drawable_to_pil(drawable):
     pixel_region = drawable.get_pixel_rgn(0, 0, width, height, False, False)
     pixel_data = pixel_region[:, :]
     
-    # Create a PIL Image from the pixel data
+    # View the pixel data as a (height, width, channels) array
+    arr = np.frombuffer(pixel_data, dtype=np.uint8).reshape(height, width, drawable.bpp)
+    
+    # Pick the native mode based on the drawable's bytes per pixel
     if drawable.bpp == 4:  # RGBA
-        mode = "RGBA"
+        native_mode = "RGBA"
     elif drawable.bpp == 3:  # RGB
-        mode = "RGB"
+        native_mode = "RGB"
     else:  # Grayscale or indexed
-        mode = "L"
+        native_mode = "L"
+        arr = arr[..., 0]
+    
+    if mode is None or mode == native_mode:
+        # Wrap GIMP's buffer without copying when the layout already matches.
+        # The image is read-only; PIL copies it on the first in-place edit.
+        if drawable.bpp in (1, 3, 4):
+            return Image.frombuffer(native_mode, (width, height), pixel_data,
+                                    "raw", native_mode, 0, 1)
+        return Image.fromarray(arr, native_mode)
     
-    # Convert to a PIL Image
-    pil_image = Image.frombytes(mode, (width, height), pixel_data)
+    # Convert with NumPy where possible to stay in a single vectorised pass
+    if mode == "L":
+        return Image.fromarray(_to_gray(arr), "L")
+    if mode == "RGBA" and native_mode == "RGB":
+        return Image.fromarray(_rgb_to_rgba(arr), "RGBA")
+    if mode == "RGB" and native_mode == "RGBA":
+        return Image.fromarray(np.ascontiguousarray(arr[..., :3]), "RGB")
     
-    return pil_image
+    # Fall back to PIL for anything else
+    return Image.fromarray(arr, native_mode).convert(mode)
 
 def pil_to_drawable(image, drawable):
     """
     Apply a PIL Image to a GIMP drawable.
     
     Args:
-        image: PIL Image object
+        image: PIL Image object or NumPy array of shape (height, width[, channels])
         drawable: GIMP drawable (layer)
     """
+    # NumPy arrays (e.g. transposed or cropped views) may be strided; make them
+    # C-contiguous so the byte export is a single copy instead of a gather
+    if isinstance(image, np.ndarray):
+        image = Image.fromarray(np.ascontiguousarray(image, dtype=np.uint8))
+    
     # Convert the PIL Image to raw pixel data
     if image.mode == "RGBA":
         mode = "RGBA"
@@ -76,30 +243,173 @@ def pil_to_drawable(image, drawable):
     drawable.merge_shadow(True)
     drawable.update(0, 0, width, height)
 
-def drawable_to_base64(drawable, format="PNG"):
+def drawable_to_base64(drawable, format="PNG", raw=False, speed=None):
     """
     Convert a GIMP drawable to a base64-encoded image string.
     
     Args:
         drawable: GIMP drawable (layer)
-        format: Image format (e.g., "PNG", "JPEG")
+        format: Image format (e.g., "PNG", "JPEG"), or "RAW" for header-prefixed
+            RGBA pixels that skip image encoding entirely
+        raw: If True, skip image encoding and return the drawable's native
+            pixels along with their dimensions and mode
+        speed: Optional encoder preset: "fast" uses minimal PNG compression,
+            "small" switches to lossy WebP for a much smaller payload
         
     Returns:
-        Base64-encoded image string
+        Base64-encoded image string, or a dict with "encoding", "w", "h",
+        "mode" and base64 "data" keys when raw is True
     """
     # Convert to PIL Image
     pil_image = drawable_to_pil(drawable)
     
-    # Save to a buffer
-    buffer = io.BytesIO()
-    pil_image.save(buffer, format=format)
-    buffer.seek(0)
+    # Ship native pixels without compressing them, e.g. for loopback servers
+    if raw:
+        return {
+            "encoding": "raw",
+            "w": pil_image.width,
+            "h": pil_image.height,
+            "mode": pil_image.mode,
+            "data": b64encode(pil_image.tobytes()).decode('utf-8'),
+        }
+    
+    # Raw pixels need no encoder, just the size header
+    if format.upper() == "RAW":
+        header = _RAW_HEADER.pack(RAW_MAGIC, pil_image.width, pil_image.height)
+        return b64encode(header + _pil_raw_bytes(pil_image)).decode('utf-8')
     
-    # Encode to base64
-    encoded_image = base64.b64encode(buffer.getvalue()).decode('utf-8')
+    # Pick encoder settings for the requested preset
+    save_options = {}
+    if speed == "fast" and format.upper() == "PNG":
+        save_options = {"compress_level": 1, "optimize": False}
+    elif speed == "small":
+        format = "WEBP"
+        save_options = {"quality": 90, "method": 0}
+    
+    with _rent_bio() as buffer:
+        # PNG, JPEG and WebP are written front to back, so the position marks the end
+        pil_image.save(buffer, format=format, **save_options)
+        size = buffer.tell()
+        
+        # Encode to base64 straight from the buffer's memory, ignoring stale bytes past the end
+        with buffer.getbuffer() as view, view[:size] as encoded_bytes:
+            encoded_image = b64encode(encoded_bytes).decode('utf-8')
     
     return encoded_image
 
+def _raw_to_new_layer(image, layer_name, width, height, pixel_data):
+    """
+    Create a new RGBA layer at the top of an image from raw pixel data.
+    
+    Args:
+        image: GIMP image
+        layer_name: Name for the new layer
+        width: Layer width
+        height: Layer height
+        pixel_data: Raw RGBA pixel data (width * height * 4 bytes)
+        
+    Returns:
+        The new GIMP layer
+    """
+    new_layer = gimp.Layer(image, layer_name, width, height,
+                           RGBA_IMAGE, 100, NORMAL_MODE)
+    image.add_layer(new_layer, 0)  # Add at the top
+    
+    pixel_region = new_layer.get_pixel_rgn(0, 0, width, height, True, True)
+    pixel_region[:, :] = pixel_data
+    
+    new_layer.flush()
+    new_layer.merge_shadow(True)
+    new_layer.update(0, 0, width, height)
+    return new_layer
+
+class _BufferReader(io.RawIOBase):
+    """Read-only file object over a memoryview; unlike BytesIO it doesn't copy the data first."""
+    
+    def __init__(self, view):
+        self._view = view
+        self._pos = 0
+    
+    def readable(self):
+        return True
+    
+    def seekable(self):
+        return True
+    
+    def readinto(self, b):
+        n = max(0, min(len(b), len(self._view) - self._pos))
+        b[:n] = self._view[self._pos:self._pos + n]
+        self._pos += n
+        return n
+    
+    def seek(self, offset, whence=io.SEEK_SET):
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._pos, io.SEEK_END: len(self._view)}[whence]
+        self._pos = max(0, base + offset)
+        return self._pos
+    
+    def tell(self):
+        return self._pos
+
+def _b64_decoded_size(data):
+    """Upper bound on the decoded size of base64 text (exact unless it holds whitespace)."""
+    return 3 * len(data) // 4 - data.count("=", -2)
+
+def _b64decode_into(data, out):
+    """
+    Decode base64 text slice by slice into a preallocated buffer.
+    
+    Args:
+        data: Base64 text
+        out: Writable buffer of at least _b64_decoded_size(data) bytes
+        
+    Returns:
+        Number of bytes written; raises binascii.Error if a slice doesn't decode
+        on its own (e.g. the text is wrapped across lines)
+    """
+    view = memoryview(out)
+    offset = 0
+    for start in range(0, len(data), _B64_DECODE_CHUNK_SIZE):
+        chunk = binascii.a2b_base64(data[start:start + _B64_DECODE_CHUNK_SIZE])
+        view[offset:offset + len(chunk)] = chunk
+        offset += len(chunk)
+    return offset
+
+def _decoded_to_new_layer(image, image_data, layer_name):
+    """
+    Create a new layer from a decoded payload, reading it in place.
+    
+    Args:
+        image: GIMP image
+        image_data: memoryview of the decoded raw or encoded image
+        layer_name: Name for the new layer
+        
+    Returns:
+        The new GIMP layer
+    """
+    # Raw RGBA payloads go straight into the pixel region without PIL
+    if image_data[:len(RAW_MAGIC)] == RAW_MAGIC:
+        _, width, height = _RAW_HEADER.unpack_from(image_data)
+        # Slice the memoryview so the payload is not copied
+        with image_data[_RAW_HEADER.size:] as pixel_data:
+            return _raw_to_new_layer(image, layer_name, width, height, pixel_data)
+    
+    # Let PIL read the decoded bytes in place (BytesIO would copy them first);
+    # pil_to_drawable loads every pixel before the buffer is handed back
+    pil_image = Image.open(_BufferReader(image_data))
+    
+    # Create a new layer in GIMP
+    new_layer = gimp.Layer(image, layer_name, pil_image.width, pil_image.height,
+                           RGBA_IMAGE, 100, NORMAL_MODE)
+    
+    # Add the layer to the image
+    image.add_layer(new_layer, 0)  # Add at the top
+    
+    # Apply the PIL image to the new layer
+    pil_to_drawable(pil_image, new_layer)
+    
+    # Return the new layer
+    return new_layer
+
 def base64_to_new_layer(image, base64_image, layer_name="AI Result"):
     """
     Create a new layer in a GIMP image from a base64-encoded image.
@@ -113,40 +423,136 @@ def base64_to_new_layer(image, base64_image, layer_name="AI Result"):
         The new GIMP layer
     """
     try:
-        # Decode base64 to bytes
-        image_data = base64.b64decode(base64_image)
-        
-        # Create a PIL Image
-        pil_image = Image.open(io.BytesIO(image_data))
-        
-        # Create a new layer in GIMP
-        new_layer = gimp.Layer(image, layer_name, pil_image.width, pil_image.height,
-                               RGBA_IMAGE, 100, NORMAL_MODE)
+        # Decode straight into a pooled buffer, with no intermediate bytes object
+        with _rent_buffer(_b64_decoded_size(base64_image)) as buffer:
+            try:
+                size = _b64decode_into(base64_image, buffer)
+                source = buffer
+            except binascii.Error:
+                # Line-wrapped or otherwise irregular text: decode it in one go
+                source = b64decode(base64_image)
+                size = len(source)
+            with memoryview(source) as view, view[:size] as image_data:
+                return _decoded_to_new_layer(image, image_data, layer_name)
+    except Exception as e:
+        pdb.gimp_message(f"Error creating new layer: {str(e)}")
+        return None
+
+def _create_shm(size):
+    """
+    Create an untracked shared memory block that outlives this process.
+    
+    Args:
+        size: Size of the block in bytes
         
-        # Add the layer to the image
-        image.add_layer(new_layer, 0)  # Add at the top
+    Returns:
+        SharedMemory object; the receiver is responsible for unlinking it
+    """
+    try:
+        return shared_memory.SharedMemory(create=True, size=size, track=False)
+    except TypeError:
+        # Python < 3.13 always tracks the block and would unlink it at exit
+        shm = shared_memory.SharedMemory(create=True, size=size)
+        if os.name == "posix":
+            from multiprocessing import resource_tracker
+            # The tracker registers POSIX names with their leading slash
+            resource_tracker.unregister("/" + shm.name, "shared_memory")
+        return shm
+
+def _unlink_shm(shm):
+    """
+    Unlink a block made by _create_shm without unbalancing the resource tracker.
+    
+    Args:
+        shm: SharedMemory object returned by _create_shm
+    """
+    if os.name == "posix" and not hasattr(shm, "_track"):
+        from multiprocessing import resource_tracker
+        # Python < 3.13 unregisters on unlink; re-register the block _create_shm
+        # untracked, or the tracker logs a KeyError for it
+        resource_tracker.register("/" + shm.name, "shared_memory")
+        try:
+            shm.unlink()
+        except FileNotFoundError:
+            resource_tracker.unregister("/" + shm.name, "shared_memory")
+            raise
+    else:
+        shm.unlink()
+
+@contextmanager
+def drawable_to_shm(drawable):
+    """
+    Copy a GIMP drawable's RGBA pixels into shared memory.
+    
+    This is an alternative to drawable_to_base64 for a server running on the
+    same host: only the yielded metadata needs to travel over JSON-RPC. The
+    block stays open for the duration of the with-block, so send the request
+    inside it; on Windows the block disappears once its last handle closes.
+    
+    Args:
+        drawable: GIMP drawable (layer)
         
-        # Apply the PIL image to the new layer
-        pil_to_drawable(pil_image, new_layer)
+    Yields:
+        Dict with the shared memory block name ("shm"), "w", "h" and "mode"
+    """
+    pil_image = drawable_to_pil(drawable)
+    pixel_data = _pil_raw_bytes(pil_image)
+    
+    shm = _create_shm(len(pixel_data))
+    try:
+        shm.buf[:len(pixel_data)] = pixel_data
+        yield {"shm": shm.name, "w": pil_image.width, "h": pil_image.height, "mode": "RGBA"}
+    except BaseException:
+        # The receiver never took the block over; don't leave it behind
+        try:
+            _unlink_shm(shm)
+        except FileNotFoundError:
+            pass
+        raise
+    finally:
+        shm.close()
+
+def shm_to_new_layer(image, meta, layer_name="AI Result"):
+    """
+    Create a new layer in a GIMP image from RGBA pixels in shared memory.
+    
+    The shared memory block is unlinked once its pixels have been copied.
+    
+    Args:
+        image: GIMP image
+        meta: Dict with "shm", "w" and "h" keys, as built by drawable_to_shm
+        layer_name: Name for the new layer
         
-        # Return the new layer
-        return new_layer
+    Returns:
+        The new GIMP layer
+    """
+    try:
+        width, height = meta["w"], meta["h"]
+        shm = shared_memory.SharedMemory(name=meta["shm"])
+        try:
+            return _raw_to_new_layer(image, layer_name, width, height,
+                                     bytes(shm.buf[:width * height * 4]))
+        finally:
+            shm.close()
+            shm.unlink()
     except Exception as e:
         pdb.gimp_message(f"Error creating new layer: {str(e)}")
         return None
 
-def get_layer_as_base64(layer, format="PNG"):
+def get_layer_as_base64(layer, format="PNG", raw=False, speed=None):
     """
     Get the current layer as a base64-encoded string.
     
     Args:
         layer: GIMP layer
         format: Image format (PNG, JPEG, etc.)
+        raw: If True, return unencoded pixels (see drawable_to_base64)
+        speed: Optional encoder preset, "fast" or "small" (see drawable_to_base64)
         
     Returns:
-        Base64-encoded string
+        Base64-encoded string, or a raw pixel dict when raw is True
     """
-    return drawable_to_base64(layer, format)
+    return drawable_to_base64(layer, format, raw=raw, speed=speed)
 
 def load_image_from_file(file_path):
     """
@@ -159,16 +565,27 @@ def load_image_from_file(file_path):
         Base64-encoded image string
     """
     try:
-        # Check if file exists
-        if not os.path.exists(file_path):
+        try:
+            f = open(file_path, "rb")
+        except FileNotFoundError:
             raise ValueError(f"File not found: {file_path}")
         
-        # Open the image using PIL
-        with open(file_path, "rb") as f:
-            image_data = f.read()
+        with f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                return ""
+            
+            # Map the file and encode it chunk by chunk into a preallocated
+            # output buffer, so the whole file is never copied into memory
+            encoded = bytearray(((size + 2) // 3) * 4)
+            pos = 0
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                for offset in range(0, size, _B64_CHUNK_SIZE):
+                    chunk = b64encode(mm[offset:offset + _B64_CHUNK_SIZE])
+                    encoded[pos:pos + len(chunk)] = chunk
+                    pos += len(chunk)
         
-        # Convert to base64
-        return base64.b64encode(image_data).decode("utf-8")
+        return encoded.decode("utf-8")
     except Exception as e:
         pdb.gimp_message(f"Error loading image from file: {str(e)}")
         raise
@@ -11,23 +11,58 @@ import platform
 import subprocess
 import shutil
 import argparse
+import collections
+import importlib.util
+import tarfile
+import zipfile
 from pathlib import Path
 
 # Get the project root directory
 PROJECT_ROOT = Path(__file__).parent.parent.absolute()
 
 def run_command(cmd, cwd=None):
-    """Run a command and return its output."""
+    """Run a command, streaming its output, and return the last lines of it."""
     print(f"Running: {' '.join(cmd)}")
-    try:
-        result = subprocess.run(cmd, cwd=cwd or PROJECT_ROOT, check=True, 
-                               capture_output=True, text=True)
-        return result.stdout
-    except subprocess.CalledProcessError as e:
-        print(f"Command failed with error: {e}")
-        print(f"STDOUT: {e.stdout}")
-        print(f"STDERR: {e.stderr}")
+    
+    # Stream output as it arrives, keeping only a bounded tail for errors
+    process = subprocess.Popen(cmd, cwd=cwd or PROJECT_ROOT, stdout=subprocess.PIPE,
+                               stderr=subprocess.STDOUT, text=True, bufsize=1)
+    tail = collections.deque(maxlen=200)
+    for line in process.stdout:
+        sys.stdout.write(line)
+        tail.append(line)
+    
+    returncode = process.wait()
+    if returncode:
+        print(f"Command failed with exit code {returncode}")
+        print(f"OUTPUT (last {len(tail)} lines):")
+        print("".join(tail), end="")
         sys.exit(1)
+    
+    return "".join(tail)
+
+def _write_if_changed(path, content):
+    """Write a text file, skipping the write if it already has this content."""
+    # Match what a text-mode write would produce on this platform
+    new = content.replace("\n", os.linesep).encode("utf-8")
+    path = Path(path)
+    if not (path.exists() and path.read_bytes() == new):
+        path.write_bytes(new)
+
+# Build tools, as import name -> pip package name
+BUILD_TOOLS = {
+    "build": "build",
+    "wheel": "wheel",
+    "setuptools": "setuptools",
+    "PyInstaller": "pyinstaller",
+}
+
+def ensure_build_tools():
+    """Install any missing build tools with a single pip invocation."""
+    missing = [package for module, package in BUILD_TOOLS.items()
+               if importlib.util.find_spec(module) is None]
+    if missing:
+        run_command([sys.executable, "-m", "pip", "install", "--upgrade", *missing])
 
 def build_wheel():
     """Build wheel packages."""
@@ -39,7 +74,6 @@ def build_wheel():
         shutil.rmtree(dist_dir)
     
     # Build the wheel package
-    run_command([sys.executable, "-m", "pip", "install", "--upgrade", "build", "wheel", "setuptools"])
     run_command([sys.executable, "-m", "build", "--wheel"])
     
     print(f"Wheel package built successfully. See the ./dist directory.")
@@ -49,20 +83,13 @@ def build_standalone_installer():
     """Build standalone installer using PyInstaller."""
     print("Building standalone installer...")
     
-    # Check if PyInstaller is installed
-    try:
-        import PyInstaller
-    except ImportError:
-        run_command([sys.executable, "-m", "pip", "install", "pyinstaller"])
-    
     # Path to the spec file for PyInstaller
     spec_file = os.path.join(PROJECT_ROOT, "scripts", "installer.spec")
     
     # Create a PyInstaller spec file if it doesn't exist
     if not os.path.exists(spec_file):
         # Create a basic spec file
-        with open(spec_file, "w") as f:
-            f.write("""
+        _write_if_changed(spec_file, """
 # -*- mode: python ; coding: utf-8 -*-
 
 block_cipher = None
@@ -153,9 +180,10 @@ coll = COLLECT(
     run_command(["pyinstaller", "--clean", spec_file])
     
     # Create an installer script based on the platform
-    if platform.system() == "Windows":
+    system = platform.system()
+    if system == "Windows":
         create_windows_installer()
-    elif platform.system() == "Darwin":
+    elif system == "Darwin":
         create_macos_installer()
     else:
         create_linux_installer()
@@ -169,8 +197,7 @@ def create_windows_installer():
     # This is a simplified placeholder
     install_script = os.path.join(PROJECT_ROOT, "scripts", "windows_install.bat")
     
-    with open(install_script, "w") as f:
-        f.write("""@echo off
+    _write_if_changed(install_script, """@echo off
 echo Installing GIMP AI Integration...
 
 :: Create the destination directory
@@ -202,8 +229,7 @@ def create_macos_installer():
     # This is a simplified placeholder
     install_script = os.path.join(PROJECT_ROOT, "scripts", "macos_install.sh")
     
-    with open(install_script, "w") as f:
-        f.write("""#!/bin/bash
+    _write_if_changed(install_script, """#!/bin/bash
 echo "Installing GIMP AI Integration..."
 
 # Create the destination directory
@@ -240,8 +266,7 @@ def create_linux_installer():
     # This is a simplified placeholder
     install_script = os.path.join(PROJECT_ROOT, "scripts", "linux_install.sh")
     
-    with open(install_script, "w") as f:
-        f.write("""#!/bin/bash
+    _write_if_changed(install_script, """#!/bin/bash
 echo "Installing GIMP AI Integration..."
 
 # Create the destination directory
@@ -281,8 +306,7 @@ def create_release_notes():
     version = "0.1.0-beta"  # Beta version
     release_notes_file = os.path.join(PROJECT_ROOT, "RELEASE_NOTES.md")
     
-    with open(release_notes_file, "w") as f:
-        f.write(f"""# Release Notes - Version {version}
+    _write_if_changed(release_notes_file, f"""# Release Notes - Version {version}
 
 ## GIMP AI Integration Beta Release
 
@@ -326,6 +350,27 @@ We would like to thank the open-source community and the contributors to the AI
     print(f"Release notes created: {release_notes_file}")
     return True
 
+def _iter_archive_entries(archive_file):
+    """Yield every directory and file under the project root except the archive being written."""
+    for root, dirs, files in os.walk(PROJECT_ROOT):
+        # Directories get their own entries so empty ones survive, as with make_archive
+        for name in dirs + files:
+            path = os.path.join(root, name)
+            if path != archive_file:
+                yield path
+
+def _write_archive(archive_file):
+    """Archive the project root as a zip or tar.gz, depending on the file name."""
+    # Compression level 1 is several times faster than the default and costs little in size
+    if archive_file.endswith(".zip"):
+        with zipfile.ZipFile(archive_file, "w", zipfile.ZIP_DEFLATED, compresslevel=1) as zf:
+            for path in _iter_archive_entries(archive_file):
+                zf.write(path, os.path.relpath(path, PROJECT_ROOT))
+    else:
+        with tarfile.open(archive_file, "w:gz", compresslevel=1) as tf:
+            for path in _iter_archive_entries(archive_file):
+                tf.add(path, os.path.relpath(path, PROJECT_ROOT), recursive=False)
+
 def package_full_distribution():
     """Create a full distribution package with all components."""
     # Build the wheel package
@@ -339,23 +384,19 @@ def package_full_distribution():
     
     # Create a zip archive of everything
     dist_dir = os.path.join(PROJECT_ROOT, "dist")
-    system_name = platform.system().lower()
+    system = platform.system()
+    system_name = system.lower()
     archive_name = f"gimp-ai-integration-0.1.0-beta-{system_name}"
     
     # Create distribution directory if it doesn't exist
     os.makedirs(dist_dir, exist_ok=True)
     
     # Determine the archive format based on the platform
-    if platform.system() == "Windows":
-        archive_format = "zip"
+    if system == "Windows":
         archive_file = os.path.join(dist_dir, f"{archive_name}.zip")
-        # Create a zip archive
-        shutil.make_archive(os.path.join(dist_dir, archive_name), "zip", PROJECT_ROOT)
     else:
-        archive_format = "gztar"
         archive_file = os.path.join(dist_dir, f"{archive_name}.tar.gz")
-        # Create a tar.gz archive
-        shutil.make_archive(os.path.join(dist_dir, archive_name), "gztar", PROJECT_ROOT)
+    _write_archive(archive_file)
     
     print(f"Distribution package created: {archive_file}")
     return True
@@ -374,6 +415,9 @@ def main():
     if not (args.wheel or args.installer or args.notes or args.all):
         args.all = True
     
+    if args.wheel or args.installer or args.all:
+        ensure_build_tools()
+    
     if args.wheel or args.all:
         build_wheel()
     
@@ -5,77 +5,139 @@ Environment Checker for GIMP AI Integration
 This script checks if the current environment meets all the requirements
 for running the GIMP AI Integration addon and MCP server.
 """
+import functools
+import io
+import json
 import os
 import sys
 import platform
-import importlib.util
 import subprocess
 import shutil
+from concurrent.futures import ThreadPoolExecutor
 
-def check_python_version():
+# Resolved once; these don't change while the checker runs
+_SYSTEM = platform.system()
+_HOME = os.path.expanduser("~")
+
+def _run_captured(check_func, *args):
+    """Run a check, returning its result together with everything it printed."""
+    # Each check writes to its own buffer, so checks running in parallel don't interleave
+    buffer = io.StringIO()
+    result = check_func(*args, out=buffer)
+    return result, buffer.getvalue()
+
+@functools.lru_cache(maxsize=None)
+def _exists(path):
+    """Cached os.path.exists for repeated install-location probes."""
+    return os.path.exists(path)
+
+@functools.lru_cache(maxsize=None)
+def _which(name):
+    """Cached shutil.which, avoiding repeated walks over PATH."""
+    return shutil.which(name)
+
+def check_python_version(out=None):
     """Check if Python version is adequate."""
     python_version = sys.version_info
     min_version = (3, 8)
     
     if python_version < min_version:
-        print(f"❌ Python version {python_version.major}.{python_version.minor} is not supported.")
-        print(f"   Minimum required version is {min_version[0]}.{min_version[1]}")
+        print(f"❌ Python version {python_version.major}.{python_version.minor} is not supported.", file=out)
+        print(f"   Minimum required version is {min_version[0]}.{min_version[1]}", file=out)
         return False
     else:
-        print(f"✅ Python version: {python_version.major}.{python_version.minor}.{python_version.micro}")
+        print(f"✅ Python version: {python_version.major}.{python_version.minor}.{python_version.micro}", file=out)
         return True
 
-def check_package_installed(package_name):
-    """Check if a Python package is installed."""
+# Imports each package named on the command line and prints a JSON map of
+# name -> True, None (not installed) or the import error message
+_PACKAGE_PROBE = """
+import importlib.util, json, sys
+results = {}
+for name in sys.argv[1:]:
     try:
-        spec = importlib.util.find_spec(package_name)
-        if spec is None:
-            print(f"❌ Package {package_name} is not installed.")
-            return False
-        
-        # Try to import the package to ensure it's working
-        __import__(package_name)
-        print(f"✅ Package {package_name} is installed.")
-        return True
-    except ImportError as e:
-        print(f"❌ Package {package_name} is installed but has import issues: {e}")
+        if importlib.util.find_spec(name) is None:
+            results[name] = None
+            continue
+        __import__(name)
+        results[name] = True
+    except Exception as e:
+        results[name] = str(e)
+print(json.dumps(results))
+"""
+
+def check_packages_installed(package_names, out=None):
+    """Check if Python packages are installed, importing them in a subprocess."""
+    # Importing in a child process keeps heavy packages (torch, CUDA) out of
+    # the checker and stops a crashing import from taking it down
+    try:
+        completed = subprocess.run(
+            [sys.executable, "-c", _PACKAGE_PROBE, *package_names],
+            capture_output=True, text=True, timeout=30
+        )
+    except subprocess.TimeoutExpired:
+        print(f"❌ Package check timed out after 30s importing: {', '.join(package_names)}", file=out)
+        return False
+    
+    # A native crash (e.g. a broken CUDA install) kills the probe before it reports anything
+    try:
+        results = json.loads(completed.stdout) if completed.returncode == 0 else None
+    except ValueError:
+        results = None
+    if not isinstance(results, dict):
+        detail = completed.stderr.strip().splitlines()[-1:] or [completed.stdout.strip() or "no output"]
+        print(f"❌ Package check failed (exit code {completed.returncode}): {detail[0]}", file=out)
+        print(f"   Could not tell which of {', '.join(package_names)} are usable.", file=out)
         return False
+    
+    all_installed = True
+    for package_name in package_names:
+        result = results.get(package_name)
+        if result is True:
+            print(f"✅ Package {package_name} is installed.", file=out)
+            continue
+        
+        all_installed = False
+        if result is None:
+            print(f"❌ Package {package_name} is not installed.", file=out)
+        else:
+            print(f"❌ Package {package_name} is installed but has import issues: {result}", file=out)
+    
+    return all_installed
 
-def check_gimp_installation():
+def check_gimp_installation(out=None):
     """Check if GIMP is installed."""
-    system = platform.system()
-    
-    if system == "Windows":
+    if _SYSTEM == "Windows":
         # Check common installation paths on Windows
         gimp_paths = [
             r"C:\\Program Files\\GIMP 2\\bin\\gimp-2.10.exe",
             r"C:\\Program Files (x86)\\GIMP 2\\bin\\gimp-2.10.exe"
         ]
         for path in gimp_paths:
-            if os.path.exists(path):
-                print(f"✅ GIMP found at: {path}")
+            if _exists(path):
+                print(f"✅ GIMP found at: {path}", file=out)
                 return True
                 
         # Try to find GIMP in PATH
-        if shutil.which("gimp-2.10.exe") or shutil.which("gimp.exe"):
-            print("✅ GIMP found in PATH")
+        if _which("gimp-2.10.exe") or _which("gimp.exe"):
+            print("✅ GIMP found in PATH", file=out)
             return True
             
-    elif system == "Darwin":  # macOS
+    elif _SYSTEM == "Darwin":  # macOS
         # Check common installation paths on macOS
         gimp_paths = [
             "/Applications/GIMP.app",
             "/Applications/GIMP-2.10.app"
         ]
         for path in gimp_paths:
-            if os.path.exists(path):
-                print(f"✅ GIMP found at: {path}")
+            if _exists(path):
+                print(f"✅ GIMP found at: {path}", file=out)
                 return True
                 
     else:  # Linux
         # Try to find GIMP in PATH
-        if shutil.which("gimp") or shutil.which("gimp-2.10"):
-            print("✅ GIMP found in PATH")
+        if _which("gimp") or _which("gimp-2.10"):
+            print("✅ GIMP found in PATH", file=out)
             return True
             
         # Check common installation paths on Linux
@@ -85,14 +147,14 @@ def check_gimp_installation():
             "/usr/local/bin/gimp"
         ]
         for path in gimp_paths:
-            if os.path.exists(path):
-                print(f"✅ GIMP found at: {path}")
+            if _exists(path):
+                print(f"✅ GIMP found at: {path}", file=out)
                 return True
     
-    print("❌ GIMP is not found. Please install GIMP 2.10 or later.")
+    print("❌ GIMP is not found. Please install GIMP 2.10 or later.", file=out)
     return False
 
-def check_gpu_availability():
+def check_gpu_availability(out=None):
     """Check if GPU is available for PyTorch."""
     try:
         import torch
@@ -100,73 +162,70 @@ def check_gpu_availability():
         if torch.cuda.is_available():
             device_count = torch.cuda.device_count()
             device_name = torch.cuda.get_device_name(0) if device_count > 0 else "Unknown"
-            print(f"✅ GPU is available: {device_name} (Devices: {device_count})")
+            print(f"✅ GPU is available: {device_name} (Devices: {device_count})", file=out)
             return True
         else:
-            print("⚠️ GPU is not available. AI operations will use CPU only (slower).")
+            print("⚠️ GPU is not available. AI operations will use CPU only (slower).", file=out)
             return False
     except ImportError:
-        print("⚠️ PyTorch is not installed. Cannot check GPU availability.")
+        print("⚠️ PyTorch is not installed. Cannot check GPU availability.", file=out)
         return False
     except Exception as e:
-        print(f"⚠️ Error checking GPU availability: {e}")
+        print(f"⚠️ Error checking GPU availability: {e}", file=out)
         return False
 
-def check_gimp_plugin_directory():
+def check_gimp_plugin_directory(out=None):
     """Check if the GIMP plugin directory exists and is writable."""
-    system = platform.system()
-    home = os.path.expanduser("~")
-    
-    if system == "Windows":
-        plugin_dir = os.path.join(home, "AppData", "Roaming", "GIMP", "2.10", "plug-ins")
-    elif system == "Darwin":  # macOS
-        plugin_dir = os.path.join(home, "Library", "Application Support", "GIMP", "2.10", "plug-ins")
+    if _SYSTEM == "Windows":
+        plugin_dir = os.path.join(_HOME, "AppData", "Roaming", "GIMP", "2.10", "plug-ins")
+    elif _SYSTEM == "Darwin":  # macOS
+        plugin_dir = os.path.join(_HOME, "Library", "Application Support", "GIMP", "2.10", "plug-ins")
     else:  # Linux
-        plugin_dir = os.path.join(home, ".config", "GIMP", "2.10", "plug-ins")
+        plugin_dir = os.path.join(_HOME, ".config", "GIMP", "2.10", "plug-ins")
     
     if os.path.exists(plugin_dir):
         if os.access(plugin_dir, os.W_OK):
-            print(f"✅ GIMP plugin directory is writable: {plugin_dir}")
+            print(f"✅ GIMP plugin directory is writable: {plugin_dir}", file=out)
             return True
         else:
-            print(f"❌ GIMP plugin directory exists but is not writable: {plugin_dir}")
+            print(f"❌ GIMP plugin directory exists but is not writable: {plugin_dir}", file=out)
             return False
     else:
-        print(f"❌ GIMP plugin directory does not exist: {plugin_dir}")
-        print(f"   Please run GIMP at least once to create this directory.")
+        print(f"❌ GIMP plugin directory does not exist: {plugin_dir}", file=out)
+        print(f"   Please run GIMP at least once to create this directory.", file=out)
         return False
 
-def check_environment_variables():
+def check_environment_variables(out=None):
     """Check if necessary environment variables are set."""
-    # Check for MCP server URL
-    mcp_url = os.environ.get("MCP_SERVER_URL")
-    if mcp_url:
-        print(f"✅ MCP_SERVER_URL is set to: {mcp_url}")
-    else:
-        print("ℹ️ MCP_SERVER_URL is not set. Default value will be used: http://localhost:8000/jsonrpc")
-    
-    # Check for MCP server host/port
-    mcp_host = os.environ.get("MCP_SERVER_HOST")
-    if mcp_host:
-        print(f"✅ MCP_SERVER_HOST is set to: {mcp_host}")
-    else:
-        print("ℹ️ MCP_SERVER_HOST is not set. Default value will be used: 127.0.0.1")
+    env_vars = [
+        ("MCP_SERVER_URL", "http://localhost:8000/jsonrpc"),
+        ("MCP_SERVER_HOST", "127.0.0.1"),
+        ("MCP_SERVER_PORT", "8000"),
+    ]
     
-    mcp_port = os.environ.get("MCP_SERVER_PORT")
-    if mcp_port:
-        print(f"✅ MCP_SERVER_PORT is set to: {mcp_port}")
-    else:
-        print("ℹ️ MCP_SERVER_PORT is not set. Default value will be used: 8000")
+    for name, default in env_vars:
+        value = os.environ.get(name)
+        if value:
+            print(f"✅ {name} is set to: {value}", file=out)
+        else:
+            print(f"ℹ️ {name} is not set. Default value will be used: {default}", file=out)
     
     return True
 
-def main():
-    """Run all environment checks."""
-    print("=" * 60)
-    print(" GIMP AI Integration - Environment Check")
-    print("=" * 60)
-    print(f"Operating System: {platform.system()} {platform.release()}")
-    print("-" * 60)
+def run_checks():
+    """
+    Run all environment checks.
+    
+    Returns:
+        Tuple of (whether all checks passed, the full report text)
+    """
+    report = io.StringIO()
+    
+    print("=" * 60, file=report)
+    print(" GIMP AI Integration - Environment Check", file=report)
+    print("=" * 60, file=report)
+    print(f"Operating System: {_SYSTEM} {platform.release()}", file=report)
+    print("-" * 60, file=report)
     
     # Run all checks
     checks = [
@@ -186,33 +245,50 @@ def main():
         "requests"
     ]
     
+    # The probes are independent and mostly wait on imports and the
+    # filesystem, so run them concurrently and print their output in order
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        package_future = executor.submit(
+            _run_captured, check_packages_installed, required_packages
+        )
+        check_futures = [
+            (name, executor.submit(_run_captured, check_func))
+            for name, check_func in checks
+        ]
+        all_packages_installed, package_output = package_future.result()
+        check_results = [(name, future.result()) for name, future in check_futures]
+    
     # Check all required packages
-    print("Checking required packages:")
-    all_packages_installed = True
-    for package in required_packages:
-        if not check_package_installed(package):
-            all_packages_installed = False
+    print("Checking required packages:", file=report)
+    print(package_output, end="", file=report)
     
-    # Add package check to the checks list
-    checks.append(("Required Packages", lambda: all_packages_installed))
+    # Add package check to the results
+    check_results.append(("Required Packages", (all_packages_installed, "")))
     
-    print("-" * 60)
-    print("Summary:")
+    print("-" * 60, file=report)
+    print("Summary:", file=report)
     
     all_passed = True
-    for name, check_func in checks:
-        result = "PASS" if check_func() else "FAIL"
+    for name, (passed, output) in check_results:
+        print(output, end="", file=report)
+        result = "PASS" if passed else "FAIL"
         if result == "FAIL":
             all_passed = False
-        print(f"  {name}: {result}")
+        print(f"  {name}: {result}", file=report)
     
-    print("-" * 60)
+    print("-" * 60, file=report)
     if all_passed:
-        print("✅ All checks passed! Your environment is ready to run GIMP AI Integration.")
+        print("✅ All checks passed! Your environment is ready to run GIMP AI Integration.", file=report)
     else:
-        print("❌ Some checks failed. Please address the issues above before running the application.")
+        print("❌ Some checks failed. Please address the issues above before running the application.", file=report)
     
-    print("=" * 60)
+    print("=" * 60, file=report)
+    return all_passed, report.getvalue()
+
+def main():
+    """Run all environment checks and print the report."""
+    all_passed, report = run_checks()
+    print(report, end="")
     return 0 if all_passed else 1
 
 if __name__ == "__main__":
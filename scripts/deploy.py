@@ -9,6 +9,10 @@ It performs the following tasks:
 3. Configures environment variables
 4. Provides instructions for starting the server
 """
+import compileall
+import datetime
+import functools
+import hashlib
 import os
 import sys
 import platform
@@ -20,180 +24,342 @@ from pathlib import Path
 # Get the project root directory
 PROJECT_ROOT = Path(__file__).parent.parent.absolute()
 
+# Project files used during deployment
+ENV_FILE = PROJECT_ROOT / ".env"
+CERT_FILE = PROJECT_ROOT / "cert.pem"
+KEY_FILE = PROJECT_ROOT / "key.pem"
+SET_ENV_BAT = PROJECT_ROOT / "set_env.bat"
+SET_ENV_SH = PROJECT_ROOT / "set_env.sh"
+SERVER_SCRIPT = PROJECT_ROOT / "backend" / "server" / "app.py"
+PLUGIN_SRC = PROJECT_ROOT / "frontend" / "gimp_plugin"
+
+# User home directory
+HOME = Path.home()
+
+# GIMP plugin directories by (platform, GIMP version)
+PLUGIN_DIR_MAP = {
+    ("Windows", "3.0"): HOME / "AppData" / "Roaming" / "GIMP" / "3.0" / "plug-ins",
+    ("Darwin", "3.0"): HOME / "Library" / "Application Support" / "GIMP" / "3.0" / "plug-ins",
+    ("Linux", "3.0"): HOME / ".config" / "GIMP" / "3.0" / "plug-ins",
+    ("Windows", "2.10"): HOME / "AppData" / "Roaming" / "GIMP" / "2.10" / "plug-ins",
+    ("Darwin", "2.10"): HOME / "Library" / "Application Support" / "GIMP" / "2.10" / "plug-ins",
+    ("Linux", "2.10"): HOME / ".config" / "GIMP" / "2.10" / "plug-ins",
+}
+
 def check_requirements():
     """Check if all requirements are installed."""
     print("Checking environment requirements...")
     
-    # Run the environment check script
-    check_script = os.path.join(PROJECT_ROOT, "scripts", "check_environment.py")
-    result = subprocess.run([sys.executable, check_script], capture_output=True, text=True)
+    # Run the environment checks in this process rather than a new interpreter
+    if str(PROJECT_ROOT) not in sys.path:
+        sys.path.insert(0, str(PROJECT_ROOT))
+    from scripts.check_environment import run_checks
+    
+    passed, output = run_checks()
     
     # Print the output
-    print(result.stdout)
+    print(output)
     
     # Return True if the check passed, False otherwise
-    return result.returncode == 0
+    return passed
 
+@functools.lru_cache(maxsize=None)
+def _dir_entries(parent):
+    """List a directory once, returning its lowercased entry names."""
+    try:
+        with os.scandir(parent) as it:
+            return frozenset(entry.name.lower() for entry in it)
+    except OSError:
+        return frozenset()
+
+def _entry_exists(path):
+    """Check for a path by scanning its parent directory instead of stat-ing it."""
+    # Names are compared case-insensitively, like the Windows and macOS filesystems
+    parent, name = os.path.split(path)
+    return name.lower() in _dir_entries(parent)
+
+@functools.lru_cache(maxsize=1)
 def detect_gimp_version():
     """Detect the installed GIMP version."""
+    # Allow the version to be forced, skipping detection entirely
+    version = os.environ.get("GIMP_VERSION")
+    if version:
+        return version
+    
     system = platform.system()
     
-    # Check for GIMP 3.0 first
+    # Candidate locations per version, with GIMP 3.0 checked first
     if system == "Windows":
-        # Windows common paths for GIMP 3.0
-        gimp3_paths = [
-            r"C:\\Program Files\\GIMP 3\\bin\\gimp-3.0.exe",
-            r"C:\\Program Files (x86)\\GIMP 3\\bin\\gimp-3.0.exe"
+        probe = _entry_exists
+        candidates = [
+            ("3.0", [
+                r"C:\\Program Files\\GIMP 3\\bin\\gimp-3.0.exe",
+                r"C:\\Program Files (x86)\\GIMP 3\\bin\\gimp-3.0.exe"
+            ]),
+            ("2.10", [
+                r"C:\\Program Files\\GIMP 2\\bin\\gimp-2.10.exe",
+                r"C:\\Program Files (x86)\\GIMP 2\\bin\\gimp-2.10.exe"
+            ]),
         ]
-        for path in gimp3_paths:
-            if os.path.exists(path):
-                return "3.0"
-                
     elif system == "Darwin":  # macOS
-        # macOS common paths for GIMP 3.0
-        gimp3_paths = [
-            "/Applications/GIMP-3.0.app",
-            "/Applications/GIMP.app"  # GIMP 3.0 could be installed as 'GIMP.app'
+        probe = _entry_exists
+        candidates = [
+            ("3.0", [
+                "/Applications/GIMP-3.0.app",
+                "/Applications/GIMP.app"  # GIMP 3.0 could be installed as 'GIMP.app'
+            ]),
+            ("2.10", ["/Applications/GIMP-2.10.app"]),
         ]
-        for path in gimp3_paths:
-            if os.path.exists(path):
-                return "3.0"
-                
     else:  # Linux
-        # Try to find GIMP 3.0 in PATH
-        if shutil.which("gimp-3.0"):
-            return "3.0"
-            
-    # If GIMP 3.0 not found, check for GIMP 2.10
-    if system == "Windows":
-        gimp2_paths = [
-            r"C:\\Program Files\\GIMP 2\\bin\\gimp-2.10.exe",
-            r"C:\\Program Files (x86)\\GIMP 2\\bin\\gimp-2.10.exe"
-        ]
-        for path in gimp2_paths:
-            if os.path.exists(path):
-                return "2.10"
-                
-    elif system == "Darwin":  # macOS
-        gimp2_paths = [
-            "/Applications/GIMP-2.10.app"
+        # Find GIMP in PATH
+        probe = shutil.which
+        candidates = [
+            ("3.0", ["gimp-3.0"]),
+            ("2.10", ["gimp-2.10", "gimp"]),
         ]
-        for path in gimp2_paths:
-            if os.path.exists(path):
-                return "2.10"
-                
-    else:  # Linux
-        if shutil.which("gimp-2.10") or shutil.which("gimp"):
-            return "2.10"
+    
+    for version, paths in candidates:
+        if any(probe(path) for path in paths):
+            return version
     
     # Default to 2.10 if no version found
     print("Warning: Could not detect GIMP version. Defaulting to 2.10.")
     return "2.10"
 
+def _copy_if_newer(src, dst):
+    """Copy a file with metadata unless dst already has the same size and mtime."""
+    src_stat = os.stat(src)
+    try:
+        dst_stat = os.stat(dst)
+    except FileNotFoundError:
+        dst_stat = None
+    
+    if (dst_stat is not None and dst_stat.st_size == src_stat.st_size
+            and dst_stat.st_mtime_ns == src_stat.st_mtime_ns):
+        return dst
+    return shutil.copy2(src, dst)
+
+def _fast_copytree(src, dst):
+    """
+    Copy a directory tree over an existing one, skipping unchanged files.
+    
+    Uses the platform's native copier when available.
+    """
+    system = platform.system()
+    
+    # Native copiers handle many small files far faster than shutil
+    cmd = None
+    if system == "Windows" and shutil.which("robocopy"):
+        cmd = ["robocopy", src, dst, "/MT:16", "/E", "/NFL", "/NDL", "/NJH", "/NJS"]
+        success_codes = range(0, 4)  # robocopy returns 0-3 when files were copied
+    elif system == "Darwin" and shutil.which("ditto"):
+        cmd = ["ditto", src, dst]
+        success_codes = (0,)
+    elif system == "Linux" and shutil.which("cp"):
+        os.makedirs(dst, exist_ok=True)
+        cmd = ["cp", "-a", "-u", os.path.join(src, "."), dst]
+        success_codes = (0,)
+    
+    if cmd is not None:
+        result = subprocess.run(cmd)
+        if result.returncode in success_codes:
+            return
+        print(f"Warning: {cmd[0]} failed with exit code {result.returncode}, falling back to shutil.")
+    
+    shutil.copytree(src, dst, dirs_exist_ok=True, copy_function=_copy_if_newer)
+
+def _link_tree(src, dst):
+    """
+    Mirror a directory tree with hard links instead of copying file contents.
+    
+    Args:
+        src: Source directory
+        dst: Destination directory (created if missing)
+        
+    Returns:
+        True if every file was linked, False if hard links are unavailable
+        (e.g. src and dst are on different filesystems)
+    """
+    pending = [(str(src), str(dst))]
+    try:
+        while pending:
+            src_dir, dst_dir = pending.pop()
+            os.makedirs(dst_dir, exist_ok=True)
+            with os.scandir(src_dir) as it:
+                for entry in it:
+                    target = os.path.join(dst_dir, entry.name)
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append((entry.path, target))
+                        continue
+                    try:
+                        if os.path.samefile(entry.path, target):
+                            continue
+                        os.unlink(target)
+                    except FileNotFoundError:
+                        pass
+                    os.link(entry.path, target, follow_symlinks=False)
+    except OSError as e:
+        print(f"Hard links unavailable ({e}), copying files instead.")
+        return False
+    return True
+
+def _manifest(root):
+    """Hash the relative path, size and mtime of every file under root."""
+    digest = hashlib.blake2b(digest_size=16)
+    pending = [str(root)]
+    while pending:
+        current = pending.pop()
+        with os.scandir(current) as it:
+            entries = sorted(it, key=lambda entry: entry.name)
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                pending.append(entry.path)
+                continue
+            # DirEntry caches the stat result from the directory scan
+            stat = entry.stat(follow_symlinks=False)
+            rel_path = os.path.relpath(entry.path, root)
+            digest.update(f"{rel_path}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode())
+    return digest.hexdigest()
+
+def _make_scripts_executable(directory):
+    """
+    Add the execute bits to the top-level plugin scripts in a directory.
+    
+    Files that can't be changed (e.g. owned by another user) are skipped.
+    
+    Returns:
+        Paths of the scripts that were made executable
+    """
+    changed = []
+    with os.scandir(directory) as it:
+        for entry in it:
+            if entry.name.endswith(".py") and not entry.name.startswith("_"):
+                try:
+                    # Reuse the stat cached by scandir instead of stat-ing again
+                    os.chmod(entry.path, entry.stat().st_mode | 0o111)
+                except OSError:
+                    continue
+                changed.append(entry.path)
+    return changed
+
 def install_plugin():
     """Install the plugin to the GIMP plugins directory."""
     system = platform.system()
-    home = os.path.expanduser("~")
     
     # Detect GIMP version
     gimp_version = detect_gimp_version()
     print(f"Detected GIMP version: {gimp_version}")
     
-    # Determine the GIMP plugin directory based on the platform and version
-    if gimp_version == "3.0":
-        if system == "Windows":
-            plugin_dir = os.path.join(home, "AppData", "Roaming", "GIMP", "3.0", "plug-ins")
-        elif system == "Darwin":  # macOS
-            plugin_dir = os.path.join(home, "Library", "Application Support", "GIMP", "3.0", "plug-ins")
-            # Also check alternative macOS GIMP 3.0 path
-            alt_plugin_dir = "/Applications/GIMP-3.0.app/Contents/Resources/lib/gimp/3.0/plug-ins"
-            if os.path.exists(os.path.dirname(alt_plugin_dir)):
-                plugin_dir = alt_plugin_dir
-        else:  # Linux
-            plugin_dir = os.path.join(home, ".config", "GIMP", "3.0", "plug-ins")
-    else:  # Default to 2.10
-        if system == "Windows":
-            plugin_dir = os.path.join(home, "AppData", "Roaming", "GIMP", "2.10", "plug-ins")
-        elif system == "Darwin":  # macOS
-            plugin_dir = os.path.join(home, "Library", "Application Support", "GIMP", "2.10", "plug-ins")
-        else:  # Linux
-            plugin_dir = os.path.join(home, ".config", "GIMP", "2.10", "plug-ins")
+    # Determine the GIMP plugin directory based on the platform and version,
+    # treating other platforms like Linux and other versions like 2.10
+    version_key = "3.0" if gimp_version == "3.0" else "2.10"
+    system_key = system if system in ("Windows", "Darwin") else "Linux"
+    plugin_dir = PLUGIN_DIR_MAP[(system_key, version_key)]
+    
+    # Also check alternative macOS GIMP 3.0 path
+    if (system_key, version_key) == ("Darwin", "3.0"):
+        alt_plugin_dir = "/Applications/GIMP-3.0.app/Contents/Resources/lib/gimp/3.0/plug-ins"
+        if os.path.exists(os.path.dirname(alt_plugin_dir)):
+            plugin_dir = alt_plugin_dir
     
     # Create the plugin directory if it doesn't exist
     os.makedirs(plugin_dir, exist_ok=True)
     
-    # Path to the plugin source directory
-    plugin_src = os.path.join(PROJECT_ROOT, "frontend", "gimp_plugin")
-    
     # Target directory for the plugin
     plugin_dest = os.path.join(plugin_dir, "gimp_ai_integration")
     
     print(f"Installing plugin to: {plugin_dest}")
     
-    # Remove the plugin directory if it already exists
-    if os.path.exists(plugin_dest):
-        shutil.rmtree(plugin_dest)
-    
-    # Copy the plugin files
-    shutil.copytree(plugin_src, plugin_dest)
-    
-    # Make the appropriate main plugin file executable on Unix-like systems
+    # Skip the copy entirely if the source hasn't changed since the last deploy
+    manifest_file = os.path.join(plugin_dest, ".deploy_manifest")
+    source_manifest = _manifest(PLUGIN_SRC)
+    try:
+        with open(manifest_file) as f:
+            if f.read().strip() == source_manifest:
+                print("Plugin files unchanged, skipping copy.")
+                return True
+    except FileNotFoundError:
+        pass
+    
+    # Hard-link the plugin files when on the same filesystem; otherwise copy over
+    # any existing install, only rewriting changed files
+    if not _link_tree(PLUGIN_SRC, plugin_dest):
+        _fast_copytree(PLUGIN_SRC, plugin_dest)
+    
+    # Make the top-level plugin scripts executable on Unix-like systems
     if system != "Windows":
+        _make_scripts_executable(plugin_dest)
+        
         if gimp_version == "3.0":
             plugin_main = os.path.join(plugin_dest, "plugin_main_gimp3.py")
             if os.path.exists(plugin_main):
-                os.chmod(plugin_main, 0o755)
                 # Create a symlink to make it more discoverable
-                plugin_main_link = os.path.join(plugin_dest, "plugin_main.py")
-                if not os.path.exists(plugin_main_link):
-                    os.symlink(plugin_main, plugin_main_link)
-        else:
-            plugin_main = os.path.join(plugin_dest, "plugin_main.py")
-            os.chmod(plugin_main, 0o755)
+                try:
+                    os.symlink(plugin_main, os.path.join(plugin_dest, "plugin_main.py"))
+                except FileExistsError:
+                    pass
+    
+    # Pre-compile bytecode so GIMP doesn't compile the plugin on first load. GIMP 3.0
+    # runs Python 3; GIMP 2.10's Python 2 ignores __pycache__, so skip it there.
+    if gimp_version == "3.0":
+        compileall.compile_dir(plugin_dest, quiet=1, workers=0)
+    
+    # Record the source state for the next deploy
+    with open(manifest_file, "w") as f:
+        f.write(source_manifest)
     
     print(f"Plugin installed successfully for GIMP {gimp_version}.")
     return True
 
+def _write_atomic(path, content):
+    """Write a text file via a temporary file, so readers never see it half-written."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
 def configure_environment(server_host, server_port, api_key=None, use_https=False):
     """Configure environment variables for the plugin and server."""
     system = platform.system()
-    env_file = os.path.join(PROJECT_ROOT, ".env")
     
     # Create or update the .env file
-    with open(env_file, "w") as f:
-        f.write(f"MCP_SERVER_HOST={server_host}\n")
-        f.write(f"MCP_SERVER_PORT={server_port}\n")
-        
-        if api_key:
-            f.write(f"MCP_ENABLE_AUTH=true\n")
-            f.write(f"MCP_API_KEY_USER={api_key}\n")
-        else:
-            f.write("MCP_ENABLE_AUTH=false\n")
-        
-        if use_https:
-            f.write("MCP_USE_HTTPS=true\n")
-            f.write(f"MCP_SSL_CERTFILE={os.path.join(PROJECT_ROOT, 'cert.pem')}\n")
-            f.write(f"MCP_SSL_KEYFILE={os.path.join(PROJECT_ROOT, 'key.pem')}\n")
-        else:
-            f.write("MCP_USE_HTTPS=false\n")
+    lines = [
+        f"MCP_SERVER_HOST={server_host}",
+        f"MCP_SERVER_PORT={server_port}",
+    ]
     
-    print(f"Environment configuration written to: {env_file}")
+    if api_key:
+        lines += ["MCP_ENABLE_AUTH=true", f"MCP_API_KEY_USER={api_key}"]
+    else:
+        lines.append("MCP_ENABLE_AUTH=false")
+    
+    if use_https:
+        lines += [
+            "MCP_USE_HTTPS=true",
+            f"MCP_SSL_CERTFILE={CERT_FILE}",
+            f"MCP_SSL_KEYFILE={KEY_FILE}",
+        ]
+    else:
+        lines.append("MCP_USE_HTTPS=false")
+    
+    _write_atomic(ENV_FILE, "\n".join(lines) + "\n")
+    
+    print(f"Environment configuration written to: {ENV_FILE}")
     
     # Create a script to set environment variables for the plugin
+    server_url = f"http{'s' if use_https else ''}://{server_host}:{server_port}/jsonrpc"
     if system == "Windows":
-        script_file = os.path.join(PROJECT_ROOT, "set_env.bat")
-        with open(script_file, "w") as f:
-            f.write(f"@echo off\n")
-            f.write(f"set MCP_SERVER_URL=http{'s' if use_https else ''}://{server_host}:{server_port}/jsonrpc\n")
-            if api_key:
-                f.write(f"set MCP_API_KEY={api_key}\n")
+        script_file = SET_ENV_BAT
+        lines = ["@echo off", f"set MCP_SERVER_URL={server_url}"]
+        if api_key:
+            lines.append(f"set MCP_API_KEY={api_key}")
+        _write_atomic(script_file, "\n".join(lines) + "\n")
     else:
-        script_file = os.path.join(PROJECT_ROOT, "set_env.sh")
-        with open(script_file, "w") as f:
-            f.write("#!/bin/bash\n")
-            f.write(f"export MCP_SERVER_URL=http{'s' if use_https else ''}://{server_host}:{server_port}/jsonrpc\n")
-            if api_key:
-                f.write(f"export MCP_API_KEY={api_key}\n")
+        script_file = SET_ENV_SH
+        lines = ["#!/bin/bash", f"export MCP_SERVER_URL={server_url}"]
+        if api_key:
+            lines.append(f"export MCP_API_KEY={api_key}")
+        _write_atomic(script_file, "\n".join(lines) + "\n")
         os.chmod(script_file, 0o755)
     
     print(f"Environment script created: {script_file}")
@@ -201,26 +367,78 @@ def configure_environment(server_host, server_port, api_key=None, use_https=Fals
     
     return True
 
+def _open_private(path):
+    """Open a file for binary writing that only the current user can read, as openssl -keyout does."""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    # The mode only applies on creation; tighten a key file left by an earlier run too
+    if hasattr(os, "fchmod"):
+        os.fchmod(fd, 0o600)
+    return os.fdopen(fd, "wb")
+
+def _generate_cert_in_process(cert_file, key_file):
+    """Generate a self-signed certificate with the cryptography package."""
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+    from cryptography.x509.oid import NameOID
+    
+    # 2048-bit keys are adequate for a local TLS endpoint and much faster to generate
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    
+    name = x509.Name([
+        x509.NameAttribute(NameOID.COUNTRY_NAME, "US"),
+        x509.NameAttribute(NameOID.STATE_OR_PROVINCE_NAME, "State"),
+        x509.NameAttribute(NameOID.LOCALITY_NAME, "City"),
+        x509.NameAttribute(NameOID.ORGANIZATION_NAME, "Organization"),
+        x509.NameAttribute(NameOID.COMMON_NAME, "localhost"),
+    ])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now)
+        .not_valid_after(now + datetime.timedelta(days=365))
+        .sign(key, hashes.SHA256())
+    )
+    
+    with _open_private(key_file) as f:
+        f.write(key.private_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PrivateFormat.TraditionalOpenSSL,
+            encryption_algorithm=serialization.NoEncryption(),
+        ))
+    with open(cert_file, "wb") as f:
+        f.write(cert.public_bytes(serialization.Encoding.PEM))
+
 def generate_self_signed_cert():
     """Generate a self-signed SSL certificate for HTTPS."""
+    # Prefer generating in-process, which avoids spawning openssl
+    try:
+        _generate_cert_in_process(CERT_FILE, KEY_FILE)
+        print(f"Self-signed certificate generated: {CERT_FILE}, {KEY_FILE}")
+        return True
+    except ImportError:
+        pass
+    
     # Check if openssl is available
     if shutil.which("openssl") is None:
-        print("Error: openssl is not installed. Cannot generate self-signed certificate.")
+        print("Error: neither the cryptography package nor openssl is installed. "
+              "Cannot generate self-signed certificate.")
         return False
     
-    cert_file = os.path.join(PROJECT_ROOT, "cert.pem")
-    key_file = os.path.join(PROJECT_ROOT, "key.pem")
-    
     # Generate a self-signed certificate
     cmd = [
-        "openssl", "req", "-x509", "-newkey", "rsa:4096", "-keyout", key_file,
-        "-out", cert_file, "-days", "365", "-nodes", "-subj",
+        "openssl", "req", "-x509", "-newkey", "rsa:4096", "-keyout", KEY_FILE,
+        "-out", CERT_FILE, "-days", "365", "-nodes", "-subj",
         "/C=US/ST=State/L=City/O=Organization/CN=localhost"
     ]
     
     try:
         subprocess.run(cmd, check=True)
-        print(f"Self-signed certificate generated: {cert_file}, {key_file}")
+        print(f"Self-signed certificate generated: {CERT_FILE}, {KEY_FILE}")
         return True
     except subprocess.CalledProcessError as e:
         print(f"Error generating self-signed certificate: {e}")
@@ -228,20 +446,26 @@ def generate_self_signed_cert():
 
 def print_final_instructions():
     """Print final instructions for using the plugin and server."""
-    server_script = os.path.join(PROJECT_ROOT, "backend", "server", "app.py")
-    
     print("\n" + "=" * 60)
     print("GIMP AI Integration - Installation Complete")
     print("=" * 60)
     print("\nTo use the plugin:")
     print(f"1. Set the environment variables by running the script in the project root directory")
-    print(f"2. Start the MCP server with: python {server_script}")
+    print(f"2. Start the MCP server with: python {SERVER_SCRIPT}")
     print(f"3. Launch GIMP and access the AI tools under 'Filters > AI Tools'")
     print("\nFor more information, see the documentation in the docs/ directory.")
     print("=" * 60)
 
-def main():
-    """Main function."""
+def main(argv=None):
+    """
+    Main function.
+    
+    Args:
+        argv: Command-line arguments to parse (defaults to sys.argv[1:])
+        
+    Returns:
+        Process exit code
+    """
     parser = argparse.ArgumentParser(description="Deploy GIMP AI Integration")
     parser.add_argument("--host", default="127.0.0.1", help="Server host (default: 127.0.0.1)")
     parser.add_argument("--port", type=int, default=8000, help="Server port (default: 8000)")
@@ -249,7 +473,7 @@ def main():
     parser.add_argument("--https", action="store_true", help="Enable HTTPS with self-signed certificate")
     parser.add_argument("--skip-checks", action="store_true", help="Skip environment checks")
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     
     print("GIMP AI Integration - Deployment")
     print("=" * 40)
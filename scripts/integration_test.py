@@ -6,17 +6,27 @@ This script tests the integration between the MCP server and various components,
 including API endpoints, model loading, and basic functionality.
 """
 import os
+import signal
 import sys
 import time
 import json
 import base64
+import io
 import unittest
 import subprocess
 import tempfile
-import threading
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 from pathlib import Path
 
+# orjson serialises large image payloads much faster than json
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 # Get the project root directory
 PROJECT_ROOT = Path(__file__).parent.parent.absolute()
 
@@ -26,43 +36,121 @@ sys.path.insert(0, str(PROJECT_ROOT))
 # Test server port
 TEST_SERVER_PORT = 8765
 
-class MCP_ServerThread(threading.Thread):
-    """Thread class for running the MCP server in the background."""
+# Base URL for the test server
+TEST_SERVER_URL = f"http://127.0.0.1:{TEST_SERVER_PORT}"
+
+def start_test_server():
+    """
+    Start the MCP server in a background process.
     
-    def __init__(self):
-        threading.Thread.__init__(self)
-        self.daemon = True
-        self.server_process = None
-        self.running = False
-        
-    def run(self):
-        """Run the MCP server."""
-        self.running = True
-        
-        # Set environment variables for the test server
-        env = os.environ.copy()
-        env["MCP_SERVER_PORT"] = str(TEST_SERVER_PORT)
-        env["MCP_SERVER_HOST"] = "127.0.0.1"
-        env["MCP_ENABLE_AUTH"] = "false"
-        
-        # Start the server process
-        server_script = os.path.join(PROJECT_ROOT, "backend", "server", "app.py")
-        self.server_process = subprocess.Popen(
-            [sys.executable, server_script],
-            env=env,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE
-        )
+    Returns:
+        subprocess.Popen: The server process
+    """
+    # Set environment variables for the test server
+    env = os.environ.copy()
+    env["MCP_SERVER_PORT"] = str(TEST_SERVER_PORT)
+    env["MCP_SERVER_HOST"] = "127.0.0.1"
+    env["MCP_ENABLE_AUTH"] = "false"
+    
+    # Start the server process
+    server_script = os.path.join(PROJECT_ROOT, "backend", "server", "app.py")
+    # Output is inherited rather than piped: an unread pipe would block
+    # the server once its buffer fills
+    return subprocess.Popen(
+        [sys.executable, server_script],
+        env=env,
+        start_new_session=True  # Own process group, so helpers can be killed too
+    )
+
+def stop_test_server(server_process):
+    """
+    Stop the MCP server.
+    
+    Args:
+        server_process (subprocess.Popen): The server process
+    """
+    # Give the server a moment to exit cleanly, then kill its whole group
+    server_process.terminate()
+    try:
+        server_process.wait(timeout=2.0)
+    except subprocess.TimeoutExpired:
+        if hasattr(os, "killpg"):
+            os.killpg(os.getpgid(server_process.pid), signal.SIGKILL)
+        else:
+            server_process.kill()
+        server_process.wait(timeout=1.0)
+
+def encode_jsonrpc_request(method, params):
+    """
+    Serialise a JSON-RPC request body.
+    
+    Args:
+        method (str): Method name
+        params (dict): Method parameters
         
-        # Wait for the server to start
-        time.sleep(3)  # Allow time for the server to start
+    Returns:
+        bytes: JSON-encoded request
+    """
+    request_data = {
+        "jsonrpc": "2.0",
+        "method": method,
+        "params": params,
+        "id": 1
+    }
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(request_data)
+    return json.dumps(request_data).encode("utf-8")
+
+# Requests with fixed parameters, encoded once
+HELLO_WORLD_REQUEST = encode_jsonrpc_request("hello_world", {"name": "Integration Test"})
+
+# Server started by this module, shared by all test classes
+_server_process = None
+
+def _server_is_up():
+    """Check whether a server is already answering on the test port."""
+    try:
+        requests.get(TEST_SERVER_URL, timeout=0.2)
+        return True
+    except requests.RequestException:
+        return False
+
+def _wait_ready(url, timeout=15.0):
+    """
+    Poll a URL until it returns HTTP 200.
+    
+    Args:
+        url (str): URL to poll
+        timeout (float): Maximum time to wait in seconds
         
-    def stop(self):
-        """Stop the MCP server."""
-        if self.server_process:
-            self.server_process.terminate()
-            self.server_process.wait()
-        self.running = False
+    Returns:
+        bool: True if the server became ready in time
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(url, timeout=0.2).status_code == 200:
+                return True
+        except requests.RequestException:
+            pass
+        time.sleep(0.05)
+    return False
+
+def setUpModule():
+    """Start the MCP server once, reusing one that is already running."""
+    global _server_process
+    if _server_is_up():
+        return
+    
+    _server_process = start_test_server()
+    
+    if not _wait_ready(TEST_SERVER_URL):
+        raise RuntimeError(f"MCP server did not become ready at {TEST_SERVER_URL}")
+
+def tearDownModule():
+    """Stop the MCP server if this module started it."""
+    if _server_process is not None:
+        stop_test_server(_server_process)
 
 class IntegrationTest(unittest.TestCase):
     """Integration test for GIMP AI Integration."""
@@ -70,26 +158,28 @@ class IntegrationTest(unittest.TestCase):
     @classmethod
     def setUpClass(cls):
         """Set up the integration test."""
-        # Start the MCP server
-        cls.server_thread = MCP_ServerThread()
-        cls.server_thread.start()
-        
-        # Wait for the server to start
-        time.sleep(3)
-        
         # Base URL for the server
-        cls.base_url = f"http://127.0.0.1:{TEST_SERVER_PORT}"
+        cls.base_url = TEST_SERVER_URL
         cls.jsonrpc_url = f"{cls.base_url}/jsonrpc"
         
+        # Reuse one keep-alive connection for all requests
+        cls.session = requests.Session()
+        cls.session.headers.update({"Content-Type": "application/json"})
+        cls.session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+        
         # Create a test image
         cls.test_image_path = os.path.join(tempfile.gettempdir(), "test_image.png")
         cls.create_test_image(cls.test_image_path)
         
+        # Encode the test image and mask once for all tests
+        with open(cls.test_image_path, "rb") as f:
+            cls.test_image_b64 = base64.b64encode(f.read()).decode("ascii")
+        cls.test_mask_b64 = cls.create_test_mask()
+        
     @classmethod
     def tearDownClass(cls):
         """Tear down the integration test."""
-        # Stop the server
-        cls.server_thread.stop()
+        cls.session.close()
         
         # Clean up test files
         if os.path.exists(cls.test_image_path):
@@ -124,6 +214,31 @@ class IntegrationTest(unittest.TestCase):
             with open(path, "wb") as f:
                 f.write(b"Test image data")
     
+    @classmethod
+    def create_test_mask(cls, width=300, height=200):
+        """
+        Create an inpainting mask with a white rectangle in the center.
+        
+        Args:
+            width (int): Mask width
+            height (int): Mask height
+            
+        Returns:
+            str: Base64-encoded PNG mask, or None if PIL is not available
+        """
+        try:
+            from PIL import Image, ImageDraw
+        except ImportError:
+            return None
+        
+        mask = Image.new("L", (width, height), color=0)
+        draw = ImageDraw.Draw(mask)
+        draw.rectangle([(100, 75), (200, 125)], fill=255)
+        
+        buffer = io.BytesIO()
+        mask.save(buffer, format="PNG")
+        return base64.b64encode(buffer.getvalue()).decode("ascii")
+    
     def send_jsonrpc_request(self, method, params):
         """
         Send a JSON-RPC request to the server.
@@ -135,15 +250,19 @@ class IntegrationTest(unittest.TestCase):
         Returns:
             dict: Response data
         """
-        request_data = {
-            "jsonrpc": "2.0",
-            "method": method,
-            "params": params,
-            "id": 1
-        }
+        return self.send_jsonrpc_body(encode_jsonrpc_request(method, params))
+    
+    def send_jsonrpc_body(self, body):
+        """
+        Send a pre-serialised JSON-RPC request body to the server.
         
-        headers = {"Content-Type": "application/json"}
-        response = requests.post(self.jsonrpc_url, json=request_data, headers=headers)
+        Args:
+            body (bytes): JSON-encoded request
+            
+        Returns:
+            dict: Response data
+        """
+        response = self.session.post(self.jsonrpc_url, data=body)
         
         # Check for HTTP errors
         response.raise_for_status()
@@ -153,7 +272,7 @@ class IntegrationTest(unittest.TestCase):
     
     def test_server_health(self):
         """Test the server health endpoint."""
-        response = requests.get(self.base_url)
+        response = self.session.get(self.base_url)
         self.assertEqual(response.status_code, 200)
         data = response.json()
         self.assertEqual(data["status"], "ok")
@@ -161,7 +280,7 @@ class IntegrationTest(unittest.TestCase):
     
     def test_hello_world(self):
         """Test the hello_world endpoint."""
-        response = self.send_jsonrpc_request("hello_world", {"name": "Integration Test"})
+        response = self.send_jsonrpc_body(HELLO_WORLD_REQUEST)
         self.assertIn("result", response)
         self.assertIn("message", response["result"])
         self.assertIn("Integration Test", response["result"]["message"])
@@ -182,9 +301,7 @@ class IntegrationTest(unittest.TestCase):
     
     def test_background_removal(self):
         """Test the ai_background_removal endpoint."""
-        # Load the test image
-        with open(self.test_image_path, "rb") as f:
-            image_data = base64.b64encode(f.read()).decode("utf-8")
+        image_data = self.test_image_b64
         
         # Send the request
         response = self.send_jsonrpc_request("ai_background_removal", {
@@ -205,21 +322,10 @@ class IntegrationTest(unittest.TestCase):
     
     def test_inpainting(self):
         """Test the ai_inpainting endpoint."""
-        # Load the test image
-        with open(self.test_image_path, "rb") as f:
-            image_data = base64.b64encode(f.read()).decode("utf-8")
-        
-        # Create a simple mask (white rectangle in the center)
-        from PIL import Image, ImageDraw
-        mask = Image.new("L", (300, 200), color=0)
-        draw = ImageDraw.Draw(mask)
-        draw.rectangle([(100, 75), (200, 125)], fill=255)
-        
-        # Save and encode the mask
-        mask_path = os.path.join(tempfile.gettempdir(), "test_mask.png")
-        mask.save(mask_path)
-        with open(mask_path, "rb") as f:
-            mask_data = base64.b64encode(f.read()).decode("utf-8")
+        image_data = self.test_image_b64
+        mask_data = self.test_mask_b64
+        if mask_data is None:
+            self.skipTest("PIL is required to create the inpainting mask")
         
         # Send the request
         response = self.send_jsonrpc_request("ai_inpainting", {
@@ -233,16 +339,10 @@ class IntegrationTest(unittest.TestCase):
         self.assertIn("image_data", response["result"])
         self.assertIn("status", response["result"])
         self.assertEqual(response["result"]["status"], "success")
-        
-        # Clean up
-        if os.path.exists(mask_path):
-            os.remove(mask_path)
     
     def test_style_transfer(self):
         """Test the ai_style_transfer endpoint."""
-        # Load the test image
-        with open(self.test_image_path, "rb") as f:
-            image_data = base64.b64encode(f.read()).decode("utf-8")
+        image_data = self.test_image_b64
         
         # Send the request
         response = self.send_jsonrpc_request("ai_style_transfer", {
@@ -260,9 +360,7 @@ class IntegrationTest(unittest.TestCase):
     
     def test_upscale(self):
         """Test the ai_upscale endpoint."""
-        # Load the test image
-        with open(self.test_image_path, "rb") as f:
-            image_data = base64.b64encode(f.read()).decode("utf-8")
+        image_data = self.test_image_b64
         
         # Send the request
         response = self.send_jsonrpc_request("ai_upscale", {
@@ -279,6 +377,36 @@ class IntegrationTest(unittest.TestCase):
         self.assertIn("status", response["result"])
         self.assertEqual(response["result"]["status"], "success")
     
+    def test_all_endpoints_concurrent(self):
+        """Test the AI endpoints with all requests in flight at once."""
+        if self.test_mask_b64 is None:
+            self.skipTest("PIL is required to create the inpainting mask")
+        
+        image_data = self.test_image_b64
+        requests_to_send = {
+            "ai_background_removal": {"image_data": image_data, "threshold": 0.5, "use_gpu": False},
+            "ai_inpainting": {"image_data": image_data, "mask_data": self.test_mask_b64, "use_gpu": False},
+            "ai_style_transfer": {"image_data": image_data, "style_name": "mosaic",
+                                  "strength": 0.8, "use_gpu": False},
+            "ai_upscale": {"image_data": image_data, "scale_factor": 2, "denoise_level": 0.5,
+                           "sharpen": True, "use_gpu": False},
+        }
+        
+        # The requests only wait on the server, so threads overlap them fully
+        with ThreadPoolExecutor(max_workers=len(requests_to_send)) as executor:
+            futures = {
+                method: executor.submit(self.send_jsonrpc_request, method, params)
+                for method, params in requests_to_send.items()
+            }
+            responses = {method: future.result() for method, future in futures.items()}
+        
+        # Check the responses
+        for method, response in responses.items():
+            with self.subTest(method=method):
+                self.assertIn("result", response)
+                self.assertIn("image_data", response["result"])
+                self.assertEqual(response["result"]["status"], "success")
+    
     def test_feedback_submission(self):
         """Test the submit_feedback endpoint."""
         # Create test feedback data
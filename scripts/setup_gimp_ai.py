@@ -23,12 +23,44 @@ Options:
 import os
 import sys
 import argparse
+import hashlib
 import platform
+import re
 import subprocess
 import venv
 import shutil
+from importlib.metadata import version, PackageNotFoundError
 from pathlib import Path
 
+# deploy.py lives next to this script; share its file helpers and run it in-process
+_scripts_dir = os.path.dirname(os.path.abspath(__file__))
+if _scripts_dir not in sys.path:
+    sys.path.insert(0, _scripts_dir)
+import deploy
+
+# Persistent wheelhouse shared by every setup run, so warm installs skip the network
+CACHE_ROOT = Path.home() / ".cache" / "gimp-mcp"
+WHEEL_CACHE = CACHE_ROOT / "wheels"
+VENV_CACHE = CACHE_ROOT / "venvs"
+
+# Windows entry points (Scripts\*.exe) are launchers with the interpreter path in a
+# trailing shebang inside a zip-appended binary; a copied venv can't be relocated safely
+VENV_CACHE_SUPPORTED = platform.system() != "Windows"
+
+# pip's comment rule: '#' starts a comment only at line start or after whitespace,
+# so URL fragments such as git+https://...#egg=name survive
+COMMENT_RE = re.compile(r"(^|\s)#")
+
+# uv creates environments and installs packages much faster than venv + pip
+UV_CMD = shutil.which("uv")
+
+try:
+    from packaging.requirements import Requirement, InvalidRequirement
+    from packaging.utils import canonicalize_name
+    PACKAGING_AVAILABLE = True
+except ImportError:
+    PACKAGING_AVAILABLE = False
+
 def check_python_version():
     """Check if Python version is adequate."""
     python_version = sys.version_info
@@ -50,13 +82,93 @@ def create_virtual_environment(venv_dir):
     
     print(f"Creating virtual environment at {venv_dir}...")
     try:
-        venv.create(venv_dir, with_pip=True)
+        if UV_CMD:
+            subprocess.run([UV_CMD, "venv", venv_dir], check=True)
+        else:
+            print("   Tip: install uv (pip install uv) for much faster setup")
+            venv.create(venv_dir, with_pip=True)
         print("✅ Virtual environment created successfully")
         return True
     except Exception as e:
         print(f"❌ Failed to create virtual environment: {e}")
         return False
 
+def _venv_cache_key():
+    """Key cached virtual environments by requirements and interpreter version."""
+    digest = hashlib.sha256()
+    for part in ("backend", "frontend"):
+        with open(os.path.join(project_root, part, "requirements.txt"), "rb") as f:
+            digest.update(f.read())
+    digest.update(sys.version.encode())
+    return digest.hexdigest()
+
+def _rewrite_venv_prefix(venv_dir, old_prefix):
+    """Point scripts and pyvenv.cfg of a copied venv at its new location."""
+    new_prefix = os.path.abspath(venv_dir)
+    if old_prefix == new_prefix:
+        return
+    
+    bin_dir = os.path.join(venv_dir, "bin")
+    candidates = [os.path.join(venv_dir, "pyvenv.cfg")]
+    with os.scandir(bin_dir) as it:
+        candidates.extend(entry.path for entry in it if entry.is_file(follow_symlinks=False))
+    
+    old, new = old_prefix.encode(), new_prefix.encode()
+    for path in candidates:
+        with open(path, "rb") as f:
+            data = f.read()
+        # Only text scripts are rewritten; interpreter binaries copied with --copies stay intact
+        if old not in data or b"\0" in data:
+            continue
+        with open(path, "wb") as f:
+            f.write(data.replace(old, new))
+
+def restore_cached_venv(venv_dir):
+    """
+    Restore a previously built virtual environment from the cache.
+    
+    Args:
+        venv_dir: Target directory for the virtual environment
+        
+    Returns:
+        True if a cached venv with matching requirements was restored
+    """
+    if not VENV_CACHE_SUPPORTED:
+        return False
+    cached = VENV_CACHE / _venv_cache_key()
+    if os.path.exists(venv_dir) or not cached.is_dir():
+        return False
+    
+    print(f"Restoring cached virtual environment from {cached}...")
+    try:
+        shutil.copytree(cached, venv_dir, symlinks=True)
+        _rewrite_venv_prefix(venv_dir, (cached / ".venv_prefix").read_text())
+    except (OSError, shutil.Error) as e:
+        print(f"⚠️ Could not restore cached virtual environment: {e}")
+        shutil.rmtree(venv_dir, ignore_errors=True)
+        return False
+    
+    print("✅ Virtual environment restored; dependencies are already installed")
+    return True
+
+def store_venv_in_cache(venv_dir):
+    """Copy a freshly installed virtual environment into the cache."""
+    if not VENV_CACHE_SUPPORTED:
+        return
+    cached = VENV_CACHE / _venv_cache_key()
+    if cached.exists():
+        return
+    
+    staging = cached.with_name(cached.name + ".tmp")
+    try:
+        shutil.rmtree(staging, ignore_errors=True)
+        shutil.copytree(venv_dir, staging, symlinks=True)
+        (staging / ".venv_prefix").write_text(os.path.abspath(venv_dir))
+        os.replace(staging, cached)
+    except OSError as e:
+        print(f"⚠️ Could not cache virtual environment: {e}")
+        shutil.rmtree(staging, ignore_errors=True)
+
 def get_activate_command(venv_dir):
     """Get the command to activate the virtual environment."""
     system = platform.system()
@@ -65,37 +177,155 @@ def get_activate_command(venv_dir):
     else:  # Unix-like (Linux, macOS)
         return f"source {venv_dir}/bin/activate"
 
+def merge_requirements(req_files):
+    """
+    Merge requirement files into one deduplicated list.
+    
+    Args:
+        req_files: Paths of the requirements files to merge
+        
+    Returns:
+        The merged requirement lines
+    """
+    merged = {}
+    for req_file in req_files:
+        seen_here = set()
+        with open(req_file) as f:
+            for line in f:
+                line = COMMENT_RE.split(line, 1)[0].strip()
+                if not line:
+                    continue
+                
+                key, requirement = line.lower(), None
+                if PACKAGING_AVAILABLE:
+                    try:
+                        requirement = Requirement(line)
+                        key = canonicalize_name(requirement.name)
+                    except InvalidRequirement:
+                        pass
+                
+                if key in merged and key not in seen_here:
+                    previous = merged[key]
+                    # Same package pinned differently: keep both constraints
+                    if requirement is not None and isinstance(previous, Requirement):
+                        previous.specifier &= requirement.specifier
+                        continue
+                    if str(previous) == line:
+                        continue
+                    # Without packaging, pass both lines through and let pip combine them
+                    key = line.lower()
+                merged[key] = requirement if requirement is not None else line
+                seen_here.add(key)
+    
+    return [str(requirement) for requirement in merged.values()]
+
+def find_missing_requirements(requirements):
+    """
+    Filter out requirements already satisfied by the running interpreter.
+    
+    Args:
+        requirements: Requirement lines to check
+        
+    Returns:
+        The requirement lines that still need installing
+    """
+    if not PACKAGING_AVAILABLE:
+        return list(requirements)
+    
+    missing = []
+    for line in requirements:
+        try:
+            requirement = Requirement(line)
+        except InvalidRequirement:
+            missing.append(line)
+            continue
+        if requirement.marker is not None and not requirement.marker.evaluate():
+            continue
+        try:
+            installed = version(requirement.name)
+        except PackageNotFoundError:
+            missing.append(line)
+            continue
+        if not requirement.specifier.contains(installed, prereleases=True):
+            missing.append(line)
+    return missing
+
 def install_dependencies(venv_dir=None):
     """Install required dependencies."""
     # Determine pip command based on whether venv is used
     if venv_dir:
         if platform.system() == "Windows":
             pip_cmd = f"{venv_dir}\\Scripts\\pip"
+            python_cmd = f"{venv_dir}\\Scripts\\python.exe"
         else:
             pip_cmd = f"{venv_dir}/bin/pip"
+            python_cmd = f"{venv_dir}/bin/python"
     else:
         pip_cmd = "pip"
+        python_cmd = sys.executable
     
-    # Install backend dependencies
-    backend_req = os.path.join(project_root, "backend", "requirements.txt")
-    print(f"Installing backend dependencies from {backend_req}...")
-    try:
-        subprocess.run([pip_cmd, "install", "-r", backend_req], check=True)
-        print("✅ Backend dependencies installed successfully")
-    except subprocess.CalledProcessError:
-        print("❌ Failed to install backend dependencies")
-        return False
+    pip_cmd = [UV_CMD, "pip"] if UV_CMD else [pip_cmd]
     
-    # Install frontend dependencies
-    frontend_req = os.path.join(project_root, "frontend", "requirements.txt")
-    print(f"Installing frontend dependencies from {frontend_req}...")
-    try:
-        subprocess.run([pip_cmd, "install", "-r", frontend_req], check=True)
-        print("✅ Frontend dependencies installed successfully")
-    except subprocess.CalledProcessError:
-        print("❌ Failed to install frontend dependencies")
-        return False
+    req_files = [
+        os.path.join(project_root, "backend", "requirements.txt"),
+        os.path.join(project_root, "frontend", "requirements.txt"),
+    ]
+    WHEEL_CACHE.mkdir(parents=True, exist_ok=True)
+    
+    # The backend and frontend share packages (requests, Pillow, numpy), so resolve
+    # both sets in a single pip run rather than two that could fight over them
+    merged = merge_requirements(req_files)
+    
+    # When installing into this interpreter, skip pip entirely if everything is already satisfied
+    if not venv_dir:
+        merged = find_missing_requirements(merged)
+        if not merged:
+            print("✅ All dependencies are already installed")
+            return True
+    
+    req_file = CACHE_ROOT / "requirements-combined.txt"
+    req_file.write_text("\n".join(merged) + "\n")
+    
+    # Skip pip's self-version check; it is a network round-trip per invocation
+    pip_env = dict(
+        os.environ,
+        PIP_DISABLE_PIP_VERSION_CHECK="1",
+        PIP_CACHE_DIR=str(CACHE_ROOT / "pip"),
+    )
+    
+    def pip(*args):
+        return subprocess.run([*pip_cmd, *args], env=pip_env).returncode
+    
+    print(f"Installing dependencies from {', '.join(req_files)}...")
     
+    # uv parallelises downloads and keeps its own global wheel cache
+    if UV_CMD:
+        returncode = pip("install", "--python", python_cmd, "-r", str(req_file))
+    else:
+        # Only rebuild the wheelhouse when the requirements or interpreter changed
+        digest = hashlib.sha256(req_file.read_bytes())
+        digest.update(repr(tuple(sys.version_info)).encode())
+        stamp_file = WHEEL_CACHE / "requirements.stamp"
+        stamp = digest.hexdigest()
+        try:
+            cached = stamp_file.read_text() == stamp
+        except OSError:
+            cached = False
+        
+        returncode = 0
+        if cached:
+            print(f"Using cached wheels from {WHEEL_CACHE}")
+        else:
+            returncode = pip("wheel", "--wheel-dir", str(WHEEL_CACHE), "-r", str(req_file))
+            if returncode == 0:
+                stamp_file.write_text(stamp)
+        if returncode == 0:
+            returncode = pip("install", "--no-index", "--find-links", str(WHEEL_CACHE), "-r", str(req_file))
+    
+    if returncode != 0:
+        print("❌ Failed to install dependencies")
+        return False
+    print("✅ Dependencies installed successfully")
     return True
 
 def configure_environment(host, port, venv_dir=None):
@@ -106,104 +336,103 @@ def configure_environment(host, port, venv_dir=None):
     env_file = os.path.join(project_root, ".env")
     socket_port = port + 1876  # Use a different port for socket server, e.g., 8000 -> 9876
     
-    with open(env_file, "w") as f:
-        f.write(f"MCP_SERVER_HOST={host}\n")
-        f.write(f"MCP_SERVER_PORT={port}\n")
-        f.write(f"MCP_SOCKET_HOST={host}\n")
-        f.write(f"MCP_SOCKET_PORT={socket_port}\n")
-        f.write("MCP_ENABLE_AUTH=false\n")
-        f.write("MCP_USE_HTTPS=false\n")
-        f.write("MCP_PREFER_SOCKET=true\n")
+    server_url = f"http://{host}:{port}/jsonrpc"
+    
+    # One table feeds .env and every generated script, so they can't drift apart
+    env_vars = [
+        ("MCP_SERVER_URL", server_url),
+        ("MCP_SERVER_HOST", host),
+        ("MCP_SERVER_PORT", port),
+        ("MCP_SOCKET_HOST", host),
+        ("MCP_SOCKET_PORT", socket_port),
+        ("MCP_ENABLE_AUTH", "false"),
+        ("MCP_USE_HTTPS", "false"),
+        ("MCP_PREFER_SOCKET", "true"),
+    ]
+    
+    def env_lines(prefix):
+        return [f"{prefix}{key}={value}" for key, value in env_vars]
+    
+    deploy._write_atomic(env_file, "\n".join(env_lines("")) + "\n")
     
     print(f"✅ Environment configuration written to: {env_file}")
     
     # Create activation scripts with environment variables
-    server_url = f"http://{host}:{port}/jsonrpc"
-    
     if system == "Windows":
         # Windows batch script
         script_file = os.path.join(project_root, "set_env.bat")
-        with open(script_file, "w") as f:
-            f.write("@echo off\n")
-            if venv_dir:
-                f.write(f"call {venv_dir}\\Scripts\\activate.bat\n")
-            f.write(f"set MCP_SERVER_URL={server_url}\n")
-            f.write(f"set MCP_SERVER_HOST={host}\n")
-            f.write(f"set MCP_SERVER_PORT={port}\n")
-            f.write(f"set MCP_SOCKET_HOST={host}\n")
-            f.write(f"set MCP_SOCKET_PORT={socket_port}\n")
-            f.write("set MCP_PREFER_SOCKET=true\n")
+        lines = ["@echo off"]
+        if venv_dir:
+            lines.append(f"call {venv_dir}\\Scripts\\activate.bat")
+        lines += env_lines("set ")
+        lines += [
             # Add command to start the server
-            f.write("echo Environment variables set for GIMP AI Integration\n")
-            f.write("echo To start the MCP servers, run:\n")
-            f.write(f"echo   python {os.path.join(project_root, 'backend', 'server', 'app.py')}\n")
-            f.write(f"echo   python {os.path.join(project_root, 'backend', 'server', 'socket_server.py')}\n")
+            "echo Environment variables set for GIMP AI Integration",
+            "echo To start the MCP servers, run:",
+            f"echo   python {os.path.join(project_root, 'backend', 'server', 'app.py')}",
+            f"echo   python {os.path.join(project_root, 'backend', 'server', 'socket_server.py')}",
+        ]
+        deploy._write_atomic(script_file, "\n".join(lines) + "\n")
     else:
         # Unix shell script
         script_file = os.path.join(project_root, "set_env.sh")
-        with open(script_file, "w") as f:
-            f.write("#!/bin/bash\n")
-            if venv_dir:
-                f.write(f"source {venv_dir}/bin/activate\n")
-            f.write(f"export MCP_SERVER_URL={server_url}\n")
-            f.write(f"export MCP_SERVER_HOST={host}\n")
-            f.write(f"export MCP_SERVER_PORT={port}\n")
-            f.write(f"export MCP_SOCKET_HOST={host}\n")
-            f.write(f"export MCP_SOCKET_PORT={socket_port}\n")
-            f.write("export MCP_PREFER_SOCKET=true\n")
+        lines = ["#!/bin/bash"]
+        if venv_dir:
+            lines.append(f"source {venv_dir}/bin/activate")
+        lines += env_lines("export ")
+        lines += [
             # Add command to start the server
-            f.write("echo \"Environment variables set for GIMP AI Integration\"\n")
-            f.write("echo \"To start the MCP servers, run:\"\n")
-            f.write(f"echo \"  {os.path.join(project_root, 'start_gimp_ai.sh')}\"\n")
+            "echo \"Environment variables set for GIMP AI Integration\"",
+            "echo \"To start the MCP servers, run:\"",
+            f"echo \"  {os.path.join(project_root, 'start_gimp_ai.sh')}\"",
+        ]
+        deploy._write_atomic(script_file, "\n".join(lines) + "\n")
         os.chmod(script_file, 0o755)
         
         # Create the startup script
         start_script = os.path.join(project_root, "start_gimp_ai.sh")
-        with open(start_script, "w") as f:
-            f.write("#!/bin/bash\n")
-            f.write("# start_gimp_ai.sh\n")
-            f.write("# Script to start the GIMP AI Integration server(s)\n\n")
-            
-            f.write("# Get directory where this script is located\n")
-            f.write("SCRIPT_DIR=\"$( cd \"$( dirname \"${BASH_SOURCE[0]}\" )\" && pwd )\"\n\n")
-            
-            f.write("# Activate virtual environment if it exists\n")
-            f.write("if [ -d \"$SCRIPT_DIR/venv\" ]; then\n")
-            f.write("    source \"$SCRIPT_DIR/venv/bin/activate\"\n")
-            f.write("    echo \"✅ Virtual environment activated\"\n")
-            f.write("else\n")
-            f.write("    echo \"⚠️ Virtual environment not found. Using system Python.\"\n")
-            f.write("fi\n\n")
-            
-            f.write("# Set environment variables\n")
-            f.write(f"export MCP_SERVER_URL={server_url}\n")
-            f.write(f"export MCP_SERVER_HOST={host}\n")
-            f.write(f"export MCP_SERVER_PORT={port}\n")
-            f.write(f"export MCP_SOCKET_HOST={host}\n")
-            f.write(f"export MCP_SOCKET_PORT={socket_port}\n")
-            f.write("export MCP_PREFER_SOCKET=true\n\n")
-            
-            f.write("echo \"Starting HTTP JSON-RPC server on $MCP_SERVER_HOST:$MCP_SERVER_PORT...\"\n")
-            f.write("python \"$SCRIPT_DIR/backend/server/app.py\" > http_server.log 2>&1 &\n")
-            f.write("HTTP_PID=$!\n")
-            f.write("echo \"✅ HTTP server started (PID: $HTTP_PID)\"\n\n")
-            
-            f.write("echo \"Starting Socket JSON-RPC server on $MCP_SOCKET_HOST:$MCP_SOCKET_PORT...\"\n")
-            f.write("python \"$SCRIPT_DIR/backend/server/socket_server.py\" > socket_server.log 2>&1 &\n")
-            f.write("SOCKET_PID=$!\n")
-            f.write("echo \"✅ Socket server started (PID: $SOCKET_PID)\"\n\n")
-            
-            f.write("echo \"\"\n")
-            f.write("echo \"Both servers are now running.\"\n")
-            f.write("echo \"To test the connection from GIMP, launch GIMP and select:\"\n")
-            f.write("echo \"  Filters > AI Tools > Hello World\"\n")
-            f.write("echo \"\"\n")
-            f.write("echo \"Press Ctrl+C to stop all servers.\"\n")
-            f.write("echo \"\"\n\n")
-            
-            f.write("# Wait for Ctrl+C\n")
-            f.write("trap \"echo 'Stopping servers...'; kill $HTTP_PID $SOCKET_PID 2>/dev/null; exit 0\" INT TERM\n")
-            f.write("wait $HTTP_PID\n")
+        lines = [
+            "#!/bin/bash",
+            "# start_gimp_ai.sh",
+            "# Script to start the GIMP AI Integration server(s)",
+            "",
+            "# Get directory where this script is located",
+            "SCRIPT_DIR=\"$( cd \"$( dirname \"${BASH_SOURCE[0]}\" )\" && pwd )\"",
+            "",
+            "# Activate virtual environment if it exists",
+            "if [ -d \"$SCRIPT_DIR/venv\" ]; then",
+            "    source \"$SCRIPT_DIR/venv/bin/activate\"",
+            "    echo \"✅ Virtual environment activated\"",
+            "else",
+            "    echo \"⚠️ Virtual environment not found. Using system Python.\"",
+            "fi",
+            "",
+            "# Set environment variables",
+            *env_lines("export "),
+            "",
+            "echo \"Starting HTTP JSON-RPC server on $MCP_SERVER_HOST:$MCP_SERVER_PORT...\"",
+            "python \"$SCRIPT_DIR/backend/server/app.py\" > http_server.log 2>&1 &",
+            "HTTP_PID=$!",
+            "echo \"✅ HTTP server started (PID: $HTTP_PID)\"",
+            "",
+            "echo \"Starting Socket JSON-RPC server on $MCP_SOCKET_HOST:$MCP_SOCKET_PORT...\"",
+            "python \"$SCRIPT_DIR/backend/server/socket_server.py\" > socket_server.log 2>&1 &",
+            "SOCKET_PID=$!",
+            "echo \"✅ Socket server started (PID: $SOCKET_PID)\"",
+            "",
+            "echo \"\"",
+            "echo \"Both servers are now running.\"",
+            "echo \"To test the connection from GIMP, launch GIMP and select:\"",
+            "echo \"  Filters > AI Tools > Hello World\"",
+            "echo \"\"",
+            "echo \"Press Ctrl+C to stop all servers.\"",
+            "echo \"\"",
+            "",
+            "# Wait for Ctrl+C",
+            "trap \"echo 'Stopping servers...'; kill $HTTP_PID $SOCKET_PID 2>/dev/null; exit 0\" INT TERM",
+            "wait $HTTP_PID",
+        ]
+        deploy._write_atomic(start_script, "\n".join(lines) + "\n")
         os.chmod(start_script, 0o755)
     
     print(f"✅ Environment script created: {script_file}")
@@ -211,23 +440,21 @@ def configure_environment(host, port, venv_dir=None):
 
 def deploy_plugin():
     """Deploy the plugin to GIMP."""
-    deploy_script = os.path.join(project_root, "scripts", "deploy.py")
     print("Deploying plugin to GIMP...")
     try:
-        # Make both plugin main files executable before deployment
-        plugin_main_2_10 = os.path.join(project_root, "frontend", "gimp_plugin", "plugin_main.py")
-        plugin_main_3_0 = os.path.join(project_root, "frontend", "gimp_plugin", "plugin_main_gimp3.py")
+        # Make the plugin entry points executable in a single directory pass
+        if platform.system() != "Windows":
+            plugin_dir = os.path.join(project_root, "frontend", "gimp_plugin")
+            for path in deploy._make_scripts_executable(plugin_dir):
+                print(f"✅ Made {path} executable")
         
-        if os.path.exists(plugin_main_2_10) and platform.system() != "Windows":
-            os.chmod(plugin_main_2_10, 0o755)
-            print(f"✅ Made {plugin_main_2_10} executable")
-            
-        if os.path.exists(plugin_main_3_0) and platform.system() != "Windows":
-            os.chmod(plugin_main_3_0, 0o755)
-            print(f"✅ Made {plugin_main_3_0} executable")
-        
-        # Run the deployment script
-        subprocess.run([sys.executable, deploy_script], check=True)
+        # Run the deployment in-process rather than paying for a second interpreter
+        try:
+            exit_code = deploy.main([])
+        except SystemExit as e:
+            exit_code = e.code
+        if exit_code:
+            raise RuntimeError(f"deploy.py exited with status {exit_code}")
         print("✅ Plugin deployed successfully")
         return True
     except Exception as e:
@@ -289,14 +516,19 @@ if __name__ == "__main__":
     
     # Create virtual environment if requested
     venv_dir = None
+    venv_restored = False
     if args.venv:
         venv_dir = os.path.join(project_root, "venv")
-        if not create_virtual_environment(venv_dir):
+        venv_restored = restore_cached_venv(venv_dir)
+        if not venv_restored and not create_virtual_environment(venv_dir):
             sys.exit(1)
     
     # Install dependencies
-    if not install_dependencies(venv_dir):
-        sys.exit(1)
+    if not venv_restored:
+        if not install_dependencies(venv_dir):
+            sys.exit(1)
+        if venv_dir:
+            store_venv_in_cache(venv_dir)
     
     # Configure environment
     if not configure_environment(args.host, args.port, venv_dir):
@@ -7,16 +7,17 @@ import sys
 import gi
 gi.require_version('Gimp', '3.0')
 from gi.repository import Gimp
-gi.require_version('GimpUi', '3.0')
-from gi.repository import GimpUi
-gi.require_version('Gtk', '3.0')
-from gi.repository import Gtk
 from gi.repository import GLib
-from gi.repository import Gio
+import itertools
 import json
 import threading
-import time
-import random
+
+# orjson serialises large image payloads much faster than json
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
 def N_(message): return message
 def _(message): return GLib.dgettext(None, message)
@@ -25,24 +26,263 @@ def _(message): return GLib.dgettext(None, message)
 PLUGIN_VERSION = "0.1.0"
 DEFAULT_SERVER_URL = "http://localhost:8000/jsonrpc"
 
+# GimpUi/Gtk pull in heavy introspection libraries; load them only when a dialog is shown
+def load_ui():
+    """Import and return the (GimpUi, Gtk) modules."""
+    gi.require_version('GimpUi', '3.0')
+    gi.require_version('Gtk', '3.0')
+    from gi.repository import GimpUi, Gtk
+    return GimpUi, Gtk
+
 # Simple logging function
 def log_message(message):
+    # GIMP calls must come from the main thread; hop there when logging from a worker
+    if threading.current_thread() is not threading.main_thread():
+        GLib.idle_add(lambda: log_message(message) and False)
+        return
     try:
         Gimp.message(str(message))
     except:
         print(message)
 
+def send_request_async(server_url, method, params, callback):
+    """
+    Send a JSON-RPC request on a worker thread.
+    
+    Args:
+        server_url: URL of the MCP server
+        method: JSON-RPC method name
+        params: JSON-RPC parameters
+        callback: Called on the GLib main loop with the result (or None)
+        
+    Returns:
+        The started worker thread
+    """
+    def worker():
+        result = send_request(server_url, method, params)
+        GLib.idle_add(lambda: callback(result) and False)
+    
+    thread = threading.Thread(target=worker, daemon=True)
+    thread.start()
+    return thread
+
+# Monotonic JSON-RPC request ids
+_RPC_ID = itertools.count(1)
+
+# Only connecting is time-limited: AI jobs can run for minutes, so responses are
+# waited for as long as the original urlopen() call did
+CONNECT_TIMEOUT = 10
+
+# Set GIMP_AI_RAW_HTTP=0 to send every request through urllib instead of _RawHTTPConnection
+RAW_HTTP_ENABLED = os.environ.get("GIMP_AI_RAW_HTTP", "1") != "0"
+
+class _StaleConnection(Exception):
+    """A reused keep-alive connection failed before any response arrived; safe to resend."""
+
+class _ProtocolError(Exception):
+    """A response _RawHTTPConnection could not parse."""
+
+class _RawHTTPConnection:
+    """
+    Minimal keep-alive HTTP/1.1 client for JSON-RPC POSTs to a plain-http server.
+    
+    Avoids importing http.client/urllib on the plugin's first request.
+    """
+    
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.sock = None
+        self.reader = None
+    
+    def _connect(self):
+        import socket
+        self.sock = socket.create_connection((self.host, self.port), timeout=CONNECT_TIMEOUT)
+        self.sock.settimeout(None)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.reader = self.sock.makefile("rb")
+    
+    def post(self, path, body):
+        """
+        Send a POST request and read the whole response.
+        
+        Returns:
+            Tuple of (status code, reason phrase, response body bytes)
+        """
+        reused = self.sock is not None
+        if not reused:
+            self._connect()
+        
+        host = f"[{self.host}]" if ":" in self.host else self.host
+        head = (
+            f"POST {path} HTTP/1.1\r\n"
+            f"Host: {host}:{self.port}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n"
+        ).encode("latin-1")
+        
+        # A server that dropped an idle keep-alive socket fails the write or closes before answering
+        try:
+            self.sock.sendall(head + body)
+            status_line = self.reader.readline()
+        except (BrokenPipeError, ConnectionResetError) as e:
+            self.close()
+            if reused:
+                raise _StaleConnection(e) from e
+            raise
+        if not status_line:
+            self.close()
+            if reused:
+                raise _StaleConnection("Server closed the keep-alive connection")
+            raise ConnectionResetError("Server closed the connection")
+        
+        try:
+            return self._read_response(status_line)
+        except ValueError as e:
+            self.close()
+            raise _ProtocolError(f"Unreadable response from {self.host}:{self.port}: {e}") from e
+    
+    def _read_response(self, status_line):
+        """Read the headers and body following a status line; raises ValueError on anything unexpected."""
+        version, status, reason = (status_line.decode("latin-1").rstrip("\r\n").split(" ", 2) + [""])[:3]
+        if not version.startswith("HTTP/1.") or not status.isdigit() or int(status) < 200:
+            raise ValueError(f"unsupported status line {status_line[:80]!r}")
+        
+        # Parse only the headers that decide how the body is framed
+        length, chunked, keep_alive = None, False, version == "HTTP/1.1"
+        while True:
+            line = self.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.partition(b":")
+            name, value = name.strip().lower(), value.strip().lower()
+            if name == b"content-length":
+                length = int(value)
+            elif name == b"transfer-encoding":
+                chunked = b"chunked" in value
+            elif name == b"connection":
+                if b"close" in value:
+                    keep_alive = False
+                elif b"keep-alive" in value:
+                    keep_alive = True
+        
+        if chunked:
+            parts = []
+            while True:
+                size = int(self.reader.readline().split(b";", 1)[0], 16)
+                if size == 0:
+                    # Skip any trailer headers
+                    while self.reader.readline() not in (b"\r\n", b"\n", b""):
+                        pass
+                    break
+                parts.append(self.reader.read(size))
+                self.reader.readline()
+            data = b"".join(parts)
+        elif length is not None:
+            data = self.reader.read(length)
+            if len(data) < length:
+                raise ConnectionResetError("Response body was truncated")
+        else:
+            # No framing: the body runs until the server closes the connection
+            data = self.reader.read()
+            keep_alive = False
+        
+        if not keep_alive:
+            self.close()
+        return int(status), reason, data
+    
+    def close(self):
+        if self.sock is not None:
+            self.reader.close()
+            self.sock.close()
+            self.sock = self.reader = None
+
+class _HTTPClientConnection:
+    """http.client-backed connection, used for https servers."""
+    
+    def __init__(self, netloc):
+        import http.client
+        self.conn = http.client.HTTPSConnection(netloc)
+    
+    def post(self, path, body):
+        """Send a POST request; returns (status code, reason phrase, response body bytes)."""
+        import http.client
+        reused = self.conn.sock is not None
+        try:
+            self.conn.request("POST", path, body=body, headers={"Content-Type": "application/json"})
+            response = self.conn.getresponse()
+        except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError) as e:
+            self.conn.close()
+            if reused:
+                raise _StaleConnection(e) from e
+            raise
+        return response.status, response.reason, response.read()
+    
+    def close(self):
+        self.conn.close()
+
+class _UrllibConnection:
+    """urllib-backed fallback for servers _RawHTTPConnection can't talk to."""
+    
+    def __init__(self, scheme, netloc):
+        self.base = f"{scheme}://{netloc}"
+    
+    def post(self, path, body):
+        """Send a POST request; returns (status code, reason phrase, response body bytes)."""
+        import urllib.request
+        import urllib.error
+        
+        req = urllib.request.Request(self.base + path, data=body, headers={"Content-Type": "application/json"})
+        try:
+            with urllib.request.urlopen(req) as response:
+                return response.status, response.reason, response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.reason, e.read()
+    
+    def close(self):
+        pass
+
+# Keep-alive connections to the MCP server, keyed by (scheme, host:port)
+_CONN_CACHE = {}
+
+# Servers whose responses _RawHTTPConnection failed to parse; they get urllib from then on
+_RAW_UNSUPPORTED = set()
+
+def _get_connection(url):
+    """Return a cached connection for the server in a parsed URL."""
+    key = (url.scheme, url.netloc)
+    conn = _CONN_CACHE.get(key)
+    if conn is None:
+        if url.scheme == "https":
+            conn = _HTTPClientConnection(url.netloc)
+        elif RAW_HTTP_ENABLED and url.netloc not in _RAW_UNSUPPORTED:
+            conn = _RawHTTPConnection(url.hostname, url.port or 80)
+        else:
+            conn = _UrllibConnection(url.scheme, url.netloc)
+        _CONN_CACHE[key] = conn
+    return conn
+
+def _drop_connection(url):
+    """Close and forget a cached connection after an error."""
+    conn = _CONN_CACHE.pop((url.scheme, url.netloc), None)
+    if conn is not None:
+        conn.close()
+
 # Simple JSON-RPC client implementation
 def send_request(server_url, method, params):
     """
     Simple implementation to send a JSON-RPC request to the MCP server.
     """
+    from urllib.parse import urlsplit
+    
+    url = urlsplit(server_url)
+    path = url.path or "/"
+    if url.query:
+        path += "?" + url.query
+    
     try:
-        import urllib.request
-        import urllib.error
-        
         # Create the JSON-RPC request
-        request_id = random.randint(1, 10000)
+        request_id = next(_RPC_ID)
         request_data = {
             "jsonrpc": "2.0",
             "method": method,
@@ -53,30 +293,49 @@ def send_request(server_url, method, params):
         log_message(f"Sending request to {server_url}: {method}")
         
         # Convert request to JSON and encode as bytes
-        json_data = json.dumps(request_data).encode('utf-8')
-        
-        # Create the request object
-        req = urllib.request.Request(
-            server_url,
-            data=json_data,
-            headers={"Content-Type": "application/json"}
-        )
-        
-        # Send the request
-        with urllib.request.urlopen(req) as response:
-            # Read and decode the response
-            response_data = response.read().decode('utf-8')
-            result = json.loads(response_data)
-            
-            # Check for JSON-RPC errors
-            if "error" in result:
-                error_message = result["error"].get("message", "Unknown error")
-                log_message(f"JSON-RPC error: {error_message}")
-                return None
-            
-            # Return the result
-            return result.get("result")
+        if ORJSON_AVAILABLE:
+            json_data = orjson.dumps(request_data)
+        else:
+            json_data = json.dumps(request_data).encode('utf-8')
+        
+        # Send the request over a pooled connection. It is resent only when a reused
+        # keep-alive socket failed before any response arrived, so a request the
+        # server may already be processing is never sent twice.
+        for attempt in range(2):
+            conn = _get_connection(url)
+            try:
+                status, reason, response_data = conn.post(path, json_data)
+                break
+            except _StaleConnection as e:
+                _drop_connection(url)
+                if attempt:
+                    raise
+                log_message(f"Reconnecting to {url.netloc}: {e}")
+            except _ProtocolError:
+                # The server already answered this request; use urllib for it from now on
+                _RAW_UNSUPPORTED.add(url.netloc)
+                raise
+        
+        if status >= 400:
+            log_message(f"HTTP error {status}: {reason}")
+            return None
+        
+        # Decode the response
+        if ORJSON_AVAILABLE:
+            result = orjson.loads(response_data)
+        else:
+            result = json.loads(response_data.decode('utf-8'))
+        
+        # Check for JSON-RPC errors
+        if "error" in result:
+            error_message = result["error"].get("message", "Unknown error")
+            log_message(f"JSON-RPC error: {error_message}")
+            return None
+        
+        # Return the result
+        return result.get("result")
     except Exception as e:
+        _drop_connection(url)
         log_message(f"Error in send_request: {str(e)}")
         return None
 
@@ -126,6 +385,8 @@ class GimpAITools(Gimp.PlugIn):
     
     def hello_world(self, procedure, run_mode, image, n_drawables, drawables, config, run_data):
         """Test function to verify the plugin and server connection."""
+        GimpUi, Gtk = load_ui()
+        
         # Initialize UI
         GimpUi.init("python-fu-ai-hello-world-standalone")
         
@@ -163,38 +424,37 @@ class GimpAITools(Gimp.PlugIn):
             # Close dialog
             dialog.destroy()
             
-            # Try to connect to the server
-            try:
-                # Display progress dialog
-                progress_dialog = GimpUi.Dialog(title="Testing Connection", role="ai-progress-dialog")
-                progress_content = progress_dialog.get_content_area()
-                progress_label = Gtk.Label(label=f"Testing connection to: {server_url}\nPlease wait...")
-                progress_content.add(progress_label)
-                progress_dialog.show_all()
-                
-                # Process GTK events to show the dialog
-                while Gtk.events_pending():
-                    Gtk.main_iteration()
-                
-                # Try to send a request
-                response = send_request(server_url, "hello_world", {"name": "GIMP"})
-                
-                # Close progress dialog
-                progress_dialog.destroy()
-                
-                # Show result
-                if response and "message" in response:
-                    Gimp.message(f"Success! Server response: {response['message']}")
-                else:
-                    Gimp.message("Connected to server but received unexpected response. Check server logs.")
-            except Exception as e:
-                Gimp.message(f"Error connecting to MCP server: {str(e)}\n\nMake sure the server is running with: ./start_gimp_ai.sh")
-                
-                # Close progress dialog if it's still open
-                try:
-                    progress_dialog.destroy()
-                except:
-                    pass
+            # Display progress dialog; the request runs on a worker thread so the UI stays responsive
+            progress_dialog = GimpUi.Dialog(title="Testing Connection", role="ai-progress-dialog")
+            progress_dialog.add_button(_("_Cancel"), Gtk.ResponseType.CANCEL)
+            progress_content = progress_dialog.get_content_area()
+            progress_label = Gtk.Label(label=f"Testing connection to: {server_url}\nPlease wait...")
+            progress_content.add(progress_label)
+            progress_dialog.show_all()
+            
+            loop = GLib.MainLoop()
+            state = {"cancelled": False}
+            
+            def on_cancel(_dialog, _response):
+                state["cancelled"] = True
+                loop.quit()
+            
+            def on_response(response):
+                if not state["cancelled"]:
+                    # Show result
+                    if response and "message" in response:
+                        Gimp.message(f"Success! Server response: {response['message']}")
+                    else:
+                        Gimp.message("Could not get a valid response from the MCP server.\n\n"
+                                     "Make sure the server is running with: ./start_gimp_ai.sh")
+                    loop.quit()
+            
+            progress_dialog.connect("response", on_cancel)
+            send_request_async(server_url, "hello_world", {"name": "GIMP"}, on_response)
+            loop.run()
+            
+            # Close progress dialog
+            progress_dialog.destroy()
         else:
             dialog.destroy()
         
@@ -202,6 +462,8 @@ class GimpAITools(Gimp.PlugIn):
     
     def background_removal(self, procedure, run_mode, image, n_drawables, drawables, config, run_data):
         """Remove the background from the current layer with AI."""
+        GimpUi, _Gtk = load_ui()
+        
         # Initialize UI
         GimpUi.init("python-fu-ai-background-removal-standalone")
         Gimp.message("Background removal (standalone) is not yet implemented for GIMP 3.0")
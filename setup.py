@@ -4,9 +4,10 @@ Setup script for GIMP AI Integration project.
 This installs both the backend server and frontend plugin components.
 """
 import os
+import sys
 import site
-import platform
-from setuptools import setup, find_packages
+from setuptools import setup, find_namespace_packages
+from setuptools.command.build_ext import build_ext
 
 # Read the long description from README.md
 with open("README.md", "r", encoding="utf-8") as fh:
@@ -25,17 +26,44 @@ with open("frontend/requirements.txt", "r", encoding="utf-8") as fh:
 # Combine all requirements
 all_requirements = list(set(backend_requirements + frontend_requirements))
 
-# Get the GIMP plugins directory based on the platform
-def get_gimp_plugin_dir():
-    home = os.path.expanduser("~")
-    system = platform.system()
+def _collect_files(root):
+    """List every file under root, skipping bytecode caches."""
+    files = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if d != "__pycache__"]
+        files.extend(os.path.join(dirpath, f) for f in filenames)
+    return files
+
+# Metadata-only commands (pip's egg_info/dist_info probes) never install data files
+METADATA_COMMANDS = {"egg_info", "dist_info", "--name", "--version", "--help-commands"}
+
+# Commands that do install or package data files
+DATA_FILE_COMMANDS = {
+    "install", "install_data", "develop", "build", "bdist", "bdist_wheel",
+    "bdist_egg", "editable_wheel", "sdist",
+}
+
+def get_data_files(argv=None):
+    """Build the data_files list, skipping the directory walk for metadata-only runs."""
+    # pip passes option values too (egg_info --egg-base DIR), so look for known commands
+    # rather than treating every bare argument as one
+    args = set(sys.argv[1:] if argv is None else argv)
+    if args & METADATA_COMMANDS and not args & DATA_FILE_COMMANDS:
+        return []
+    
+    return [
+        # Include documentation
+        ("share/doc/gimp-ai-integration", _collect_files("docs")),
+    ]
+
+class ParallelBuildExt(build_ext):
+    """build_ext that compiles extension modules on every core by default."""
     
-    if system == "Windows":
-        return os.path.join(home, "AppData", "Roaming", "GIMP", "2.10", "plug-ins")
-    elif system == "Darwin":  # macOS
-        return os.path.join(home, "Library", "Application Support", "GIMP", "2.10", "plug-ins")
-    else:  # Linux
-        return os.path.join(home, ".config", "GIMP", "2.10", "plug-ins")
+    def finalize_options(self):
+        # An explicit --parallel/-j on the command line still wins
+        if self.parallel is None:
+            self.parallel = int(os.environ.get("MAX_JOBS", os.cpu_count() or 1))
+        super().finalize_options()
 
 setup(
     name="gimp-ai-integration",
@@ -61,9 +89,24 @@ setup(
         "License :: OSI Approved :: MIT License",
         "Operating System :: OS Independent",
     ],
-    packages=find_packages(include=["backend", "backend.*"]),
+    # backend/, frontend/ and scripts/ have no __init__.py, so they ship as namespace packages.
+    # The plugin rides along in the wheel and gimp-ai-deploy (scripts.deploy) copies it from
+    # there into GIMP's plug-ins directory.
+    packages=find_namespace_packages(include=[
+        "backend.server", "backend.server.*",
+        "frontend.gimp_plugin", "frontend.gimp_plugin.*",
+        "scripts",
+    ]),
+    package_data={
+        # Plugin entry points such as gimp-ai-tools.py are not importable module names
+        "frontend.gimp_plugin": ["*.py"],
+    },
     python_requires=">=3.8",
     install_requires=all_requirements,
+    extras_require={
+        # SIMD base64 for the image payloads sent by utils/claude_desktop_helper.py
+        "fast": ["pybase64>=1.3.0"],
+    },
     entry_points={
         "console_scripts": [
             "gimp-ai-server=backend.server.app:main",
@@ -71,19 +114,8 @@ setup(
             "gimp-ai-check=scripts.check_environment:main",
         ],
     },
-    data_files=[
-        # Include the frontend plugin files
-        (os.path.join(get_gimp_plugin_dir(), "gimp_ai_integration"), 
-            [os.path.join(dirpath, f) 
-             for dirpath, dirnames, filenames in os.walk("frontend/gimp_plugin") 
-             for f in filenames]),
-        
-        # Include documentation
-        ("share/doc/gimp-ai-integration", 
-            [os.path.join(dirpath, f) 
-             for dirpath, dirnames, filenames in os.walk("docs") 
-             for f in filenames]),
-    ],
+    data_files=get_data_files(),
+    cmdclass={"build_ext": ParallelBuildExt},
     include_package_data=True,
     zip_safe=False,
 )
@@ -0,0 +1,150 @@
+"""
+Shared fixtures for the utils/ and scripts/ tests.
+"""
+import asyncio
+import gzip
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Make the helper library, the deployment scripts and the backend importable
+for path in (os.path.join(ROOT, 'utils'), os.path.join(ROOT, 'scripts'), os.path.join(ROOT, 'backend')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+
+class JSONRPCHandler(BaseHTTPRequestHandler):
+    """Minimal JSON-RPC endpoint that dispatches to the backend's MCP handlers."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        server = self.server
+        blob_id = self.path.rpartition("/")[2]
+        if server.blobs is None or not self.path.startswith("/blob/") or blob_id not in server.blobs:
+            return self._reply(404, {"detail": "Not Found"})
+        data = server.blobs[blob_id]
+        self.send_response(200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        server = self.server
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+        # No binary endpoint unless a test asks for one
+        if self.path != "/jsonrpc":
+            server.log.append(("blob", self.path))
+            if server.blobs is None or self.path != "/blob":
+                return self._reply(404, {"detail": "Not Found"})
+            return self._reply(200, {"blob_id": server.store_blob(body)})
+
+        server.posts += 1
+        if server.fail_statuses:
+            status = server.fail_statuses.pop(0)
+            if status is None:
+                # Drop the connection as if the response were lost mid-read
+                self.close_connection = True
+                return
+            return self._reply(status, {"detail": "Try again"})
+        if self.headers.get("Content-Encoding") == "gzip":
+            server.gzip_posts += 1
+            if not server.accept_gzip:
+                return self._reply(422, {"detail": "Invalid JSON"})
+            body = gzip.decompress(body)
+        payload = json.loads(body)
+
+        if isinstance(payload, list):
+            if not server.accept_batch:
+                return self._reply(422, {"detail": "Batch requests are not supported"})
+            return self._reply(200, [server.dispatch(item) for item in payload])
+        return self._reply(200, server.dispatch(payload))
+
+
+class RPCServer(ThreadingHTTPServer):
+    """Local server recording every JSON-RPC call it answers."""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), JSONRPCHandler)
+        self.accept_gzip = True
+        self.accept_batch = True
+        self.log = []
+        self.posts = 0
+        self.gzip_posts = 0
+        # HTTP statuses (None drops the connection) to answer the next JSON-RPC POSTs with
+        self.fail_statuses = []
+        self.overrides = {}
+        # Blob ID -> bytes once a test enables the binary endpoint by setting a dict
+        self.blobs = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/jsonrpc"
+
+    def store_blob(self, data):
+        blob_id = f"blob-{len(self.blobs)}"
+        self.blobs[blob_id] = data
+        return blob_id
+
+    def calls(self, method=None):
+        """Return logged (method, params) pairs, optionally for one method."""
+        return [entry for entry in self.log if entry[0] != "blob" and (method is None or entry[0] == method)]
+
+    def dispatch(self, request):
+        from server.mcp_integration import (
+            handle_mcp_operation, handle_mcp_close_session, execute_gimp_commands
+        )
+        handlers = {
+            "mcp_operation": handle_mcp_operation,
+            "mcp_close_session": handle_mcp_close_session,
+            "execute_gimp_commands": execute_gimp_commands,
+        }
+        handlers.update(self.overrides)
+
+        method, params = request.get("method"), request.get("params", {})
+        self.log.append((method, params))
+        try:
+            handler = handlers[method]
+            result = handler(params)
+            if asyncio.iscoroutine(result):
+                result = asyncio.run(result)
+            return {"jsonrpc": "2.0", "id": request.get("id"), "result": result}
+        except Exception as e:
+            return {"jsonrpc": "2.0", "id": request.get("id"), "error": {"code": -32000, "message": str(e)}}
+
+
+@pytest.fixture
+def rpc_server():
+    """A running JSON-RPC server backed by backend/server/mcp_integration.py."""
+    from server.mcp_integration import OPEN_IMAGES
+
+    server = RPCServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+        OPEN_IMAGES.clear()
@@ -0,0 +1,62 @@
+"""
+Tests for scripts/build_distribution.py.
+"""
+import os
+import tarfile
+import zipfile
+
+import pytest
+
+import build_distribution
+
+
+@pytest.fixture
+def project_tree(tmp_path, monkeypatch):
+    """A small project root with nested files, an empty directory and a dist directory."""
+    root = tmp_path / "project"
+    (root / "docs" / "images").mkdir(parents=True)
+    (root / "docs" / "guide.md").write_text("# Guide\n")
+    (root / "models" / "cache").mkdir(parents=True)
+    (root / "setup.py").write_text("# setup\n")
+    (root / "dist").mkdir()
+    monkeypatch.setattr(build_distribution, "PROJECT_ROOT", root)
+    return root
+
+
+def source_listing(root):
+    """Relative paths of every directory and file under root, with directories marked by a slash."""
+    listing = set()
+    for dirpath, dirs, files in os.walk(root):
+        rel = os.path.relpath(dirpath, root)
+        listing.update(os.path.normpath(os.path.join(rel, name)) + "/" for name in dirs)
+        listing.update(os.path.normpath(os.path.join(rel, name)) for name in files)
+    return listing
+
+
+@pytest.mark.parametrize("suffix", [".zip", ".tar.gz"])
+def test_archive_lists_the_whole_source_tree(project_tree, suffix):
+    archive_file = str(project_tree / "dist" / f"release{suffix}")
+    expected = source_listing(project_tree)
+
+    build_distribution._write_archive(archive_file)
+
+    if suffix == ".zip":
+        with zipfile.ZipFile(archive_file) as zf:
+            listing = set(zf.namelist())
+    else:
+        with tarfile.open(archive_file) as tf:
+            listing = {member.name + "/" if member.isdir() else member.name for member in tf.getmembers()}
+    assert listing == expected
+    assert "models/cache/" in listing and "docs/images/" in listing
+
+
+def test_unchanged_file_is_not_rewritten(tmp_path):
+    path = tmp_path / "notes.md"
+    build_distribution._write_if_changed(path, "same\n")
+    os.utime(path, (0, 0))
+
+    build_distribution._write_if_changed(path, "same\n")
+    assert path.stat().st_mtime == 0
+
+    build_distribution._write_if_changed(path, "different\n")
+    assert path.read_text() == "different\n"
@@ -0,0 +1,67 @@
+"""
+Tests for scripts/check_environment.py.
+"""
+import io
+import subprocess
+import sys
+import time
+
+import check_environment
+
+
+def test_checks_leave_stdout_alone_and_report_in_order(monkeypatch):
+    stdout = sys.stdout
+    seen = {}
+
+    def slow_check(out=None):
+        # Give the later checks time to finish first
+        time.sleep(0.2)
+        print("slow check output", file=out)
+        return True
+
+    def gpu_check(out=None):
+        # Libraries such as torch inspect the real stream while importing
+        seen["stdout"] = sys.stdout
+        seen["encoding"] = sys.stdout.encoding
+        seen["isatty"] = sys.stdout.isatty()
+        print("gpu check output", file=out)
+        return False
+
+    monkeypatch.setattr(check_environment, "check_python_version", slow_check)
+    monkeypatch.setattr(check_environment, "check_gpu_availability", gpu_check)
+    monkeypatch.setattr(check_environment, "check_packages_installed",
+                        lambda names, out=None: print("packages output", file=out) or True)
+
+    all_passed, report = check_environment.run_checks()
+
+    assert seen["stdout"] is stdout
+    assert seen["encoding"]
+    assert all_passed is False
+    assert report.index("packages output") < report.index("slow check output") < report.index("gpu check output")
+    assert "  Python Version: PASS" in report
+    assert "  GPU Availability: FAIL" in report
+
+
+def test_check_writes_to_stdout_by_default(capsys):
+    assert check_environment.check_environment_variables() is True
+    assert "MCP_SERVER_URL" in capsys.readouterr().out
+
+
+def test_crashed_package_probe_is_reported_as_such(monkeypatch):
+    def crash(*args, **kwargs):
+        return subprocess.CompletedProcess(args, -11, stdout="", stderr="Fatal Python error: Segmentation fault\n")
+    monkeypatch.setattr(check_environment.subprocess, "run", crash)
+    out = io.StringIO()
+
+    assert check_environment.check_packages_installed(["torch", "numpy"], out=out) is False
+    report = out.getvalue()
+    assert "Package check failed (exit code -11): Fatal Python error: Segmentation fault" in report
+    assert "not installed" not in report
+
+
+def test_package_probe_reports_each_package():
+    out = io.StringIO()
+
+    assert check_environment.check_packages_installed(["json", "no_such_package_xyz"], out=out) is False
+    assert "Package json is installed" in out.getvalue()
+    assert "Package no_such_package_xyz is not installed" in out.getvalue()
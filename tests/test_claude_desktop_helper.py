@@ -0,0 +1,488 @@
+"""
+Tests for the Claude Desktop helper library (utils/claude_desktop_helper.py).
+"""
+import base64
+import json
+import os
+import time
+
+import pytest
+import requests
+from PIL import Image
+
+from claude_desktop_helper import (
+    DECODE_CHUNK_SIZE, ENCODE_CHUNK_SIZE, H2_AVAILABLE, HTTPX_AVAILABLE, GimpMCPClient, _RETRY_OPTIONS,
+    _encode_file_base64, _suggestion_payload, _write_base64_file,
+)
+from server.mcp_integration import OPEN_IMAGES, handle_mcp_operation
+
+
+def make_image(path, size=(40, 30), color=(255, 0, 0)):
+    """Write a small PNG and return its path as a string."""
+    Image.new("RGB", size, color=color).save(path, format="PNG")
+    return str(path)
+
+
+@pytest.fixture
+def client(rpc_server):
+    """A client talking to the local test server, with state persistence disabled."""
+    client = GimpMCPClient(rpc_server.url, state_file=None)
+    yield client
+    client.close()
+
+
+def test_open_image_ignores_unsupported_hash_probe(client, rpc_server, tmp_path):
+    """The backend answers open_image_by_hash with success=False on a blank session."""
+    session_id = client.open_image(make_image(tmp_path / "in.png"))
+
+    # The opened session holds the uploaded image, not the probe's blank canvas
+    assert OPEN_IMAGES[session_id].image.size == (40, 30)
+    # The probe's side-effect session was closed again
+    assert list(OPEN_IMAGES) == [session_id]
+    assert client._supports_open_by_hash is False
+
+    # Later opens go straight to the upload
+    client.open_image(make_image(tmp_path / "in2.png", color=(0, 255, 0)))
+    probes = [p for m, p in rpc_server.calls("mcp_operation") if p["operation"] == "open_image_by_hash"]
+    assert len(probes) == 1
+
+
+def test_open_image_uses_successful_hash_probe(client, rpc_server, tmp_path):
+    """A server that holds the image opens it without an upload."""
+    rpc_server.overrides["mcp_operation"] = lambda params: {"success": True, "session_id": "cached"}
+
+    assert client.open_image(make_image(tmp_path / "in.png")) == "cached"
+    assert [p["operation"] for m, p in rpc_server.calls()] == ["open_image_by_hash"]
+    assert client._supports_open_by_hash is True
+
+
+def test_save_image_server_path_written_by_server(client, tmp_path, monkeypatch):
+    monkeypatch.setenv("MCP_OUTPUT_DIR", str(tmp_path / "out"))
+    client.open_image(make_image(tmp_path / "in.png"))
+
+    assert client.save_image("server://renders/out.png") is True
+    with Image.open(tmp_path / "out" / "renders" / "out.png") as saved:
+        assert saved.size == (40, 30)
+
+
+def test_save_image_server_path_unsupported_raises(client, tmp_path, monkeypatch):
+    monkeypatch.delenv("MCP_OUTPUT_DIR", raising=False)
+    client.open_image(make_image(tmp_path / "in.png"))
+
+    with pytest.raises(Exception, match="did not save"):
+        client.save_image("server://out.png")
+
+
+def test_save_image_writable_dir_falls_back_to_local_write(rpc_server, tmp_path, monkeypatch):
+    """A server that can't write the shared directory sends the image back instead."""
+    monkeypatch.delenv("MCP_OUTPUT_DIR", raising=False)
+    client = GimpMCPClient(rpc_server.url, state_file=None, server_writable_dir=str(tmp_path))
+    try:
+        client.open_image(make_image(tmp_path / "in.png"))
+        assert client.save_image(str(tmp_path / "out.png")) is True
+    finally:
+        client.close()
+
+    saves = [p for m, p in rpc_server.calls("mcp_operation") if p["operation"] == "save_image"]
+    assert saves[0]["output_path"] == str(tmp_path / "out.png")
+    with Image.open(tmp_path / "out.png") as saved:
+        assert saved.size == (40, 30)
+
+
+def test_save_image_relative_path_sent_as_absolute(rpc_server, tmp_path, monkeypatch):
+    """The server resolves paths against its own working directory, not the client's."""
+    monkeypatch.setenv("MCP_OUTPUT_DIR", str(tmp_path))
+    monkeypatch.chdir(tmp_path)
+    client = GimpMCPClient(rpc_server.url, state_file=None, server_writable_dir=".")
+    try:
+        client.open_image(make_image(tmp_path / "in.png"))
+        assert client.save_image("out.png") is True
+    finally:
+        client.close()
+
+    saves = [p for m, p in rpc_server.calls("mcp_operation") if p["operation"] == "save_image"]
+    assert saves[0]["output_path"] == str(tmp_path / "out.png")
+    assert (tmp_path / "out.png").exists()
+
+
+def test_save_image_outside_output_dir_is_not_written_by_server(client, tmp_path, monkeypatch):
+    monkeypatch.setenv("MCP_OUTPUT_DIR", str(tmp_path / "out"))
+    client.open_image(make_image(tmp_path / "in.png"))
+
+    with pytest.raises(Exception, match="did not save"):
+        client.save_image("server://../escape.png")
+    assert not (tmp_path / "escape.png").exists()
+
+
+def test_open_image_async_leaves_current_session_alone(client, tmp_path):
+    current = client.open_image(make_image(tmp_path / "current.png"))
+    futures = [
+        client.open_image_async(make_image(tmp_path / f"in{i}.png", size=(20 + i, 20)))
+        for i in range(4)
+    ]
+    session_ids = [future.result() for future in futures]
+
+    # Each future names its own image; the client still works on the session it had
+    assert [OPEN_IMAGES[sid].image.size for sid in session_ids] == [(20 + i, 20) for i in range(4)]
+    assert client.session_id == current
+
+    assert client.open_image(make_image(tmp_path / "last.png")) == client.session_id
+
+
+def write_state(path, server_url, session_id, expires_in=3600):
+    """Write a client state file as a previous run would have left it."""
+    path.write_text(json.dumps({
+        "server_url": server_url,
+        "session_id": session_id,
+        "capabilities": {},
+        "expires": time.time() + expires_in,
+    }))
+    return str(path)
+
+
+def test_resume_session_adopts_live_session(rpc_server, tmp_path):
+    # A previous run that exited without closing its session
+    first = GimpMCPClient(rpc_server.url, state_file=None)
+    session_id = first.open_image(make_image(tmp_path / "in.png"))
+    first.close()
+    history = list(OPEN_IMAGES[session_id].history)
+    state_file = write_state(tmp_path / "state.json", rpc_server.url, session_id)
+
+    client = GimpMCPClient(rpc_server.url, state_file=state_file)
+    try:
+        assert client.resume_session() == session_id
+        assert client.session_id == session_id
+        # The ping is not an edit, so it is not recorded
+        assert OPEN_IMAGES[session_id].history == history
+    finally:
+        client.close()
+
+
+def test_resume_session_with_unknown_session(rpc_server, tmp_path):
+    state_file = write_state(tmp_path / "state.json", rpc_server.url, "gone-after-restart")
+
+    client = GimpMCPClient(rpc_server.url, state_file=state_file)
+    try:
+        assert client.resume_session() is None
+        assert client.session_id is None
+        assert [p["operation"] for m, p in rpc_server.calls("mcp_operation")] == ["ping"]
+        # The stale ID is dropped from the state file
+        assert json.loads((tmp_path / "state.json").read_text())["session_id"] is None
+    finally:
+        client.close()
+
+
+def test_resume_session_with_expired_state(rpc_server, tmp_path):
+    state_file = write_state(tmp_path / "state.json", rpc_server.url, "old-session", expires_in=-1)
+
+    client = GimpMCPClient(rpc_server.url, state_file=state_file)
+    try:
+        assert client.resume_session() is None
+        assert rpc_server.calls("mcp_operation") == []
+    finally:
+        client.close()
+
+
+def test_suggestion_payload_rejects_unknown_parameters():
+    suggestion = {"operation": "apply_blur", "parameters": {"radius": 3.0, "blur_type": "motion"}}
+
+    with pytest.raises(ValueError, match="blur_type"):
+        _suggestion_payload(suggestion, "s1")
+
+
+def test_suggestion_payload_passes_other_operations_through():
+    suggestion = {"operation": "desaturate", "parameters": {"mode": "luminosity"}}
+
+    assert _suggestion_payload(suggestion, "s1") == {"operation": "desaturate", "mode": "luminosity", "session_id": "s1"}
+
+
+def test_blur_suggestion_applies(client, tmp_path):
+    session_id = client.open_image(make_image(tmp_path / "in.png"))
+    suggestion = {"type": "filter", "operation": "apply_blur", "parameters": {"radius": 5.0}}
+
+    assert client.apply_suggestion(suggestion) is True
+    assert OPEN_IMAGES[session_id].history[-1]["operation"] == "apply_blur"
+
+
+def test_op_rejects_undeclared_parameters(client, rpc_server, tmp_path):
+    client.open_image(make_image(tmp_path / "in.png"))
+    sent = len(rpc_server.calls())
+
+    with pytest.raises(ValueError, match="blur_type"):
+        client._op("apply_blur", radius=2.0, blur_type="motion")
+    assert len(rpc_server.calls()) == sent
+
+    assert client._op("apply_blur", radius=2.0) is True
+
+
+def test_flush_sends_queued_calls_as_one_batch(client, rpc_server, tmp_path):
+    session_id = client.open_image(make_image(tmp_path / "in.png"))
+    posts = rpc_server.posts
+
+    blur = client.apply_blur(2.0, batch=True)
+    resize = client.resize_image(20, 15, batch=True)
+    assert not blur.done() and rpc_server.posts == posts
+
+    assert client.flush() == [blur, resize]
+    assert rpc_server.posts == posts + 1
+    assert blur.result() is True and resize.result() is True
+    assert OPEN_IMAGES[session_id].image.size == (20, 15)
+
+
+def test_flush_falls_back_to_single_calls_when_batches_are_rejected(client, rpc_server, tmp_path):
+    rpc_server.accept_batch = False
+    client.open_image(make_image(tmp_path / "in.png"))
+
+    client.apply_blur(2.0, batch=True)
+    client.resize_image(20, 15, batch=True)
+    assert all(handle.result() for handle in client.flush())
+    assert client._supports_batch is False
+
+    # Later flushes skip the batch attempt
+    posts = rpc_server.posts
+    client.apply_blur(1.0, batch=True)
+    client.apply_blur(1.0, batch=True)
+    client.flush()
+    assert rpc_server.posts == posts + 2
+
+
+def test_flush_resolves_every_handle_before_raising(client, rpc_server, tmp_path):
+    client.open_image(make_image(tmp_path / "in.png"))
+    rpc_server.overrides["broken"] = lambda params: 1 / 0
+
+    failing = client.queue("broken", {})
+    blur = client.apply_blur(2.0, batch=True)
+    with pytest.raises(Exception, match="division by zero"):
+        client.flush()
+    assert failing.done()
+    assert blur.done() and blur.result() is True
+
+
+def enable_blobs(rpc_server):
+    """Give the test server a binary endpoint that the MCP operations read and write."""
+    rpc_server.blobs = {}
+
+    async def mcp_operation(params):
+        params = dict(params)
+        if "blob_id" in params:
+            params["image_data"] = base64.b64encode(rpc_server.blobs[params.pop("blob_id")]).decode()
+        result = await handle_mcp_operation(params)
+        if params.get("return_blob") and "image_data" in result:
+            result["blob_id"] = rpc_server.store_blob(base64.b64decode(result.pop("image_data")))
+        return result
+
+    rpc_server.overrides["mcp_operation"] = mcp_operation
+
+
+def test_images_move_as_blobs_when_the_server_has_an_endpoint(client, rpc_server, tmp_path):
+    enable_blobs(rpc_server)
+    source = make_image(tmp_path / "in.png")
+
+    session_id = client.open_image(source)
+    opens = [p for m, p in rpc_server.calls("mcp_operation") if p["operation"] == "open_image"]
+    assert "image_data" not in opens[0] and opens[0]["blob_id"] in rpc_server.blobs
+    assert OPEN_IMAGES[session_id].image.size == (40, 30)
+
+    # Reopening the same file reuses the uploaded blob
+    uploads = len(rpc_server.blobs)
+    client.open_image(source)
+    assert len(rpc_server.blobs) == uploads
+
+    assert client.save_image(str(tmp_path / "out.png")) is True
+    assert Image.open(tmp_path / "out.png").size == (40, 30)
+
+
+def test_missing_blob_endpoint_falls_back_to_base64(client, rpc_server, tmp_path):
+    client.open_image(make_image(tmp_path / "in.png"))
+    client.open_image(make_image(tmp_path / "in2.png", color=(0, 0, 255)))
+
+    # Only the first open tried the endpoint
+    assert [entry for entry in rpc_server.log if entry[0] == "blob"] == [("blob", "/blob")]
+    assert client._supports_blob is False
+    opens = [p for m, p in rpc_server.calls("mcp_operation") if p["operation"] == "open_image"]
+    assert all("image_data" in p for p in opens)
+
+    # Saves no longer ask for a blob
+    assert client.save_image(str(tmp_path / "out.png")) is True
+    assert "return_blob" not in rpc_server.calls("mcp_operation")[-1][1]
+    assert Image.open(tmp_path / "out.png").getpixel((0, 0))[:3] == (0, 0, 255)
+
+
+def make_noise_image(path, size=(120, 120)):
+    """Write a PNG that doesn't compress, so its base64 upload passes GZIP_MIN_SIZE."""
+    Image.effect_noise(size, 100).convert("RGB").save(path, format="PNG")
+    return str(path)
+
+
+def test_large_request_bodies_are_gzipped(client, rpc_server, tmp_path):
+    session_id = client.open_image(make_noise_image(tmp_path / "noise.png"))
+
+    assert rpc_server.gzip_posts == 1
+    assert client._server_accepts_gzip is True
+    assert OPEN_IMAGES[session_id].image.size == (120, 120)
+
+    # Small calls stay uncompressed
+    client.apply_blur(1.0)
+    assert rpc_server.gzip_posts == 1
+
+
+def test_gzip_rejection_is_resent_plain_and_remembered(client, rpc_server, tmp_path):
+    rpc_server.accept_gzip = False
+
+    session_id = client.open_image(make_noise_image(tmp_path / "noise.png"))
+    assert OPEN_IMAGES[session_id].image.size == (120, 120)
+    assert client._server_accepts_gzip is False
+
+    posts, gzip_posts = rpc_server.posts, rpc_server.gzip_posts
+    client.open_image(make_noise_image(tmp_path / "noise2.png"))
+    # The second upload goes out plain, in a single request
+    assert rpc_server.gzip_posts == gzip_posts
+    assert rpc_server.posts == posts + 1
+
+
+def test_transient_statuses_are_retried(client, rpc_server, tmp_path):
+    client.open_image(make_image(tmp_path / "in.png"))
+    posts = rpc_server.posts
+    rpc_server.fail_statuses = [503, 429]
+
+    assert client.apply_blur(1.0) is True
+    assert rpc_server.posts == posts + 3
+
+
+def test_server_errors_are_not_retried(client, rpc_server, tmp_path):
+    client.open_image(make_image(tmp_path / "in.png"))
+    posts = rpc_server.posts
+    rpc_server.fail_statuses = [500]
+
+    with pytest.raises(requests.HTTPError):
+        client.apply_blur(1.0)
+    assert rpc_server.posts == posts + 1
+
+
+def test_retries_give_up_after_the_limit(client, rpc_server, tmp_path):
+    client.open_image(make_image(tmp_path / "in.png"))
+    posts = rpc_server.posts
+    rpc_server.fail_statuses = [503] * 10
+
+    with pytest.raises(requests.HTTPError):
+        client.apply_blur(1.0)
+    assert rpc_server.posts == posts + 1 + _RETRY_OPTIONS["total"]
+
+
+def test_lost_responses_are_not_replayed(client, rpc_server, tmp_path):
+    client.open_image(make_image(tmp_path / "in.png"))
+    posts = rpc_server.posts
+    rpc_server.fail_statuses = [None]
+
+    with pytest.raises(requests.ConnectionError):
+        client.apply_blur(1.0)
+    # The server may already have applied the edit, so it isn't sent again
+    assert rpc_server.posts == posts + 1
+
+
+def test_analysis_is_cached_until_the_image_is_edited(client, rpc_server, tmp_path):
+    rpc_server.overrides["image_analysis"] = lambda params: {"analysis": {"call": len(rpc_server.calls("image_analysis"))}}
+    client.open_image(make_image(tmp_path / "in.png"))
+
+    first = client.analyze_image()
+    assert client.analyze_image() == first
+    assert len(rpc_server.calls("image_analysis")) == 1
+
+    # A different analysis type is its own entry
+    client.analyze_image("basic")
+    assert len(rpc_server.calls("image_analysis")) == 2
+
+    client.apply_blur(1.0)
+    assert client.analyze_image() != first
+    assert len(rpc_server.calls("image_analysis")) == 3
+
+
+@pytest.mark.parametrize("size", [0, 1, 2, 3, ENCODE_CHUNK_SIZE - 1, ENCODE_CHUNK_SIZE + 1, 2 * DECODE_CHUNK_SIZE + 5])
+def test_streamed_base64_round_trip(tmp_path, size):
+    data = os.urandom(size)
+    source = tmp_path / "in.bin"
+    source.write_bytes(data)
+
+    encoded = _encode_file_base64(str(source))
+    assert encoded == base64.b64encode(data).decode()
+
+    # A larger buffer from an earlier call is reused without leaking its tail
+    buf = bytearray(b"\xff" * (size + 64))
+    assert _write_base64_file(str(tmp_path / "out.bin"), encoded, buf) is buf
+    assert (tmp_path / "out.bin").read_bytes() == data
+
+
+def test_failed_batch_is_not_replayed(client, rpc_server, tmp_path):
+    client.open_image(make_image(tmp_path / "in.png"))
+    posts = rpc_server.posts
+    rpc_server.fail_statuses = [500]
+
+    blur = client.apply_blur(2.0, batch=True)
+    client.apply_blur(2.0, batch=True)
+    with pytest.raises(requests.HTTPError):
+        client.flush()
+
+    assert rpc_server.posts == posts + 1
+    assert client._supports_batch is True
+    assert blur.done()
+    with pytest.raises(Exception, match="Batch request failed"):
+        blur.result()
+
+
+def test_resumed_session_can_start_over_on_a_blank_canvas(rpc_server, tmp_path):
+    state_file = str(tmp_path / "state.json")
+    first = GimpMCPClient(rpc_server.url, state_file=state_file)
+    session_id = first.create_new_image(64, 48)
+    first.add_text("run one", 1, 1)
+    first.apply_blur(3.0)
+    # Closing the transport without close_session() keeps the session resumable
+    first.close()
+
+    client = GimpMCPClient(rpc_server.url, state_file=state_file)
+    try:
+        assert client.resume_session() == session_id
+        assert client.reset_image(32, 16, (1, 2, 3, 255)) is True
+
+        image = OPEN_IMAGES[session_id].image
+        assert image.size == (32, 16)
+        assert image.getpixel((0, 0)) == (1, 2, 3, 255)
+    finally:
+        client.close()
+
+
+def test_http2_requires_httpx_and_h2(rpc_server):
+    if HTTPX_AVAILABLE and H2_AVAILABLE:
+        pytest.skip("httpx[http2] is installed")
+    with pytest.raises(ImportError, match="httpx"):
+        GimpMCPClient(rpc_server.url, state_file=None, http2=True)
+
+
+def test_http2_prior_knowledge_needs_http2(rpc_server):
+    with pytest.raises(ValueError):
+        GimpMCPClient(rpc_server.url, state_file=None, http2_prior_knowledge=True)
+
+
+def test_http2_over_cleartext_falls_back_to_http1(rpc_server, tmp_path):
+    httpx = pytest.importorskip("httpx")
+    pytest.importorskip("h2")
+    seen = []
+    client = GimpMCPClient(rpc_server.url, state_file=None, http2=True)
+    client._rpc_client.event_hooks["response"].append(lambda response: seen.append(response.http_version))
+    try:
+        # HTTP/2 is only negotiated over TLS, so the calls still work against an HTTP/1.1 server
+        client.open_image(make_image(tmp_path / "in.png"))
+        assert client._send_many([("mcp_operation", {"operation": "ping", "session_id": client.session_id})] * 3)
+        assert seen and set(seen) == {"HTTP/1.1"}
+    finally:
+        client.close()
+
+
+def test_http2_prior_knowledge_disables_http1(rpc_server):
+    pytest.importorskip("httpx")
+    pytest.importorskip("h2")
+    client = GimpMCPClient(rpc_server.url, state_file=None, http2=True, http2_prior_knowledge=True)
+    try:
+        pool = client._rpc_client._transport._pool
+        assert pool._http2 is True and pool._http1 is False
+    finally:
+        client.close()
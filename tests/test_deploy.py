@@ -0,0 +1,85 @@
+"""
+Tests for scripts/deploy.py.
+"""
+import os
+
+import pytest
+
+import deploy
+
+
+@pytest.fixture
+def plugin_tree(tmp_path, monkeypatch):
+    """A small plugin source tree and a GIMP 2.10 plug-ins directory under tmp_path."""
+    src = tmp_path / "src"
+    (src / "utils").mkdir(parents=True)
+    (src / "plugin_main.py").write_text("print('main')\n")
+    (src / "utils" / "image_utils.py").write_text("# helpers\n")
+    plugin_dir = tmp_path / "plug-ins"
+
+    monkeypatch.setattr(deploy, "PLUGIN_SRC", src)
+    monkeypatch.setattr(deploy, "PLUGIN_DIR_MAP", {("Linux", "2.10"): plugin_dir})
+    monkeypatch.setattr(deploy, "detect_gimp_version", lambda: "2.10")
+    monkeypatch.setattr(deploy.platform, "system", lambda: "Linux")
+    return src, plugin_dir / "gimp_ai_integration"
+
+
+def test_unchanged_plugin_is_not_copied_again(plugin_tree, capsys):
+    src, dest = plugin_tree
+
+    assert deploy.install_plugin() is True
+    assert (dest / "utils" / "image_utils.py").read_text() == "# helpers\n"
+    assert os.access(dest / "plugin_main.py", os.X_OK)
+
+    capsys.readouterr()
+    assert deploy.install_plugin() is True
+    assert "unchanged, skipping copy" in capsys.readouterr().out
+
+
+def test_changed_plugin_is_redeployed(plugin_tree, capsys):
+    src, dest = plugin_tree
+    deploy.install_plugin()
+
+    (src / "utils" / "new_module.py").write_text("VALUE = 1\n")
+    capsys.readouterr()
+    assert deploy.install_plugin() is True
+    assert "skipping copy" not in capsys.readouterr().out
+    assert (dest / "utils" / "new_module.py").read_text() == "VALUE = 1\n"
+
+
+def test_link_tree_hard_links_files(tmp_path):
+    src = tmp_path / "src"
+    (src / "sub").mkdir(parents=True)
+    (src / "sub" / "a.py").write_text("a")
+    dst = tmp_path / "dst"
+    # A stale copy at the destination is replaced by a link
+    (dst / "sub").mkdir(parents=True)
+    (dst / "sub" / "a.py").write_text("old")
+
+    assert deploy._link_tree(src, dst) is True
+    assert os.path.samefile(src / "sub" / "a.py", dst / "sub" / "a.py")
+
+
+@pytest.mark.skipif(os.name != "posix", reason="POSIX file modes")
+def test_private_files_are_owner_only(tmp_path):
+    key_file = tmp_path / "key.pem"
+    # An earlier, world-readable key is tightened when overwritten
+    key_file.write_text("old")
+    key_file.chmod(0o644)
+
+    with deploy._open_private(key_file) as f:
+        f.write(b"secret")
+
+    assert key_file.read_bytes() == b"secret"
+    assert key_file.stat().st_mode & 0o777 == 0o600
+
+
+@pytest.mark.skipif(os.name != "posix", reason="POSIX file modes")
+def test_generated_key_is_owner_only(tmp_path):
+    pytest.importorskip("cryptography")
+    cert_file, key_file = tmp_path / "cert.pem", tmp_path / "key.pem"
+
+    deploy._generate_cert_in_process(cert_file, key_file)
+
+    assert key_file.stat().st_mode & 0o777 == 0o600
+    assert cert_file.read_bytes().startswith(b"-----BEGIN CERTIFICATE-----")
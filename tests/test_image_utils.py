@@ -0,0 +1,195 @@
+"""
+Tests for frontend/gimp_plugin/utils/image_utils.py.
+
+The module star-imports GIMP 2's gimpfu; the tests load it with an empty
+stand-in and replace the drawable accessors, so only the pure-Python
+buffer and shared-memory code runs.
+"""
+import base64
+import collections
+import importlib.util
+import io
+import os
+import subprocess
+import sys
+import textwrap
+import types
+from multiprocessing import shared_memory
+
+import pytest
+from PIL import Image
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+@pytest.fixture
+def image_utils(monkeypatch):
+    """Load image_utils.py with a stand-in gimpfu module."""
+    monkeypatch.setitem(sys.modules, "gimpfu", types.ModuleType("gimpfu"))
+    spec = importlib.util.spec_from_file_location(
+        "image_utils", os.path.join(ROOT, "frontend", "gimp_plugin", "utils", "image_utils.py")
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_shm_round_trip(image_utils, monkeypatch):
+    source = Image.new("RGBA", (7, 5), (10, 20, 30, 255))
+    monkeypatch.setattr(image_utils, "drawable_to_pil", lambda drawable: source)
+    received = {}
+    monkeypatch.setattr(image_utils, "_raw_to_new_layer",
+                        lambda image, name, w, h, data: received.update(w=w, h=h, data=data) or "layer")
+
+    with image_utils.drawable_to_shm(object()) as meta:
+        assert (meta["w"], meta["h"], meta["mode"]) == (7, 5, "RGBA")
+        # The receiver attaches while the sender still holds the block open
+        assert image_utils.shm_to_new_layer(None, meta) == "layer"
+
+    assert received["data"] == source.tobytes()
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=meta["shm"])
+
+
+def test_shm_unlinked_when_handoff_fails(image_utils, monkeypatch):
+    monkeypatch.setattr(image_utils, "drawable_to_pil", lambda drawable: Image.new("RGBA", (2, 2)))
+
+    with pytest.raises(RuntimeError):
+        with image_utils.drawable_to_shm(object()) as meta:
+            raise RuntimeError("request failed")
+
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=meta["shm"])
+
+
+def test_failed_handoff_leaves_resource_tracker_quiet():
+    # The tracker is its own process, so only a fresh interpreter shows what it logs
+    script = textwrap.dedent("""
+        import sys, types
+        sys.modules["gimpfu"] = types.ModuleType("gimpfu")
+        sys.path.insert(0, sys.argv[1])
+        import image_utils
+        from PIL import Image
+        image_utils.drawable_to_pil = lambda drawable: Image.new("RGBA", (2, 2))
+        try:
+            with image_utils.drawable_to_shm(object()):
+                raise RuntimeError("request failed")
+        except RuntimeError:
+            pass
+    """)
+    result = subprocess.run(
+        [sys.executable, "-c", script, os.path.join(ROOT, "frontend", "gimp_plugin", "utils")],
+        capture_output=True, text=True, timeout=60,
+    )
+
+    assert result.returncode == 0, result.stderr
+    assert "KeyError" not in result.stderr and "leaked" not in result.stderr
+
+
+def test_pooled_buffers_keep_their_capacity(image_utils, monkeypatch):
+    monkeypatch.setattr(image_utils, "_POOL_MAX_BYTES", 1024)
+    monkeypatch.setattr(image_utils, "_bio_pool", collections.deque(maxlen=4))
+
+    with image_utils._rent_bio() as buffer:
+        buffer.write(b"x" * 100)
+    with image_utils._rent_bio() as reused:
+        assert reused is buffer
+        # Rewound but not truncated, so the next write reuses the memory
+        assert reused.tell() == 0 and len(reused.getbuffer()) == 100
+
+    # Buffers grown past the cap are not kept
+    with image_utils._rent_bio() as buffer:
+        buffer.write(b"x" * 2048)
+    assert len(image_utils._bio_pool) == 0
+
+
+def test_pooled_decode_buffers_are_reused_when_large_enough(image_utils, monkeypatch):
+    monkeypatch.setattr(image_utils, "_POOL_MAX_BYTES", 1024)
+    monkeypatch.setattr(image_utils, "_buffer_pool", collections.deque(maxlen=4))
+
+    with image_utils._rent_buffer(100) as buffer:
+        pass
+    with image_utils._rent_buffer(50) as reused:
+        assert reused is buffer
+    with image_utils._rent_buffer(200) as larger:
+        assert larger is not buffer and len(larger) == 200
+
+    with image_utils._rent_buffer(2048):
+        pass
+    assert [len(buf) for buf in image_utils._buffer_pool] == [100, 200]
+
+
+def test_base64_encodes_do_not_leak_previous_bytes(image_utils, monkeypatch):
+    images = iter([Image.effect_noise((64, 64), 100).convert("RGBA"), Image.new("RGBA", (4, 4), (1, 2, 3, 255))])
+    monkeypatch.setattr(image_utils, "drawable_to_pil", lambda drawable: next(images))
+
+    image_utils.drawable_to_base64(object())
+    encoded = image_utils.drawable_to_base64(object())
+
+    decoded = Image.open(io.BytesIO(base64.b64decode(encoded)))
+    assert decoded.size == (4, 4)
+    assert base64.b64decode(encoded).endswith(b"IEND\xaeB`\x82")
+
+
+@pytest.fixture
+def layer_sink(image_utils, monkeypatch):
+    """Stand in for the GIMP layer API, recording what base64_to_new_layer writes."""
+    received = {}
+    monkeypatch.setattr(image_utils, "gimp", types.SimpleNamespace(Layer=lambda *args: "layer"), raising=False)
+    monkeypatch.setattr(image_utils, "RGBA_IMAGE", 1, raising=False)
+    monkeypatch.setattr(image_utils, "NORMAL_MODE", 0, raising=False)
+    monkeypatch.setattr(image_utils, "pdb", types.SimpleNamespace(gimp_message=pytest.fail), raising=False)
+    monkeypatch.setattr(image_utils, "pil_to_drawable",
+                        lambda image, drawable: received.update(size=image.size, data=image.tobytes()))
+    monkeypatch.setattr(image_utils, "_raw_to_new_layer",
+                        lambda image, name, w, h, data: received.update(size=(w, h), data=bytes(data)) or "layer")
+    return received
+
+
+@pytest.mark.parametrize("wrap", [False, True])
+def test_encoded_payload_decoded_into_layer(image_utils, layer_sink, monkeypatch, wrap):
+    # Small slices so the payload spans several of them
+    monkeypatch.setattr(image_utils, "_B64_DECODE_CHUNK_SIZE", 64)
+    source = Image.effect_noise((24, 16), 80).convert("RGB")
+    png = io.BytesIO()
+    source.save(png, format="PNG")
+    encoded = (base64.encodebytes if wrap else base64.b64encode)(png.getvalue()).decode()
+
+    assert image_utils.base64_to_new_layer(types.SimpleNamespace(add_layer=lambda layer, pos: None), encoded) == "layer"
+    assert layer_sink == {"size": (24, 16), "data": source.tobytes()}
+
+
+def test_raw_payload_skips_pil(image_utils, layer_sink, monkeypatch):
+    monkeypatch.setattr(image_utils, "_B64_DECODE_CHUNK_SIZE", 64)
+    source = Image.new("RGBA", (5, 3), (9, 8, 7, 255))
+    monkeypatch.setattr(image_utils, "drawable_to_pil", lambda drawable: source)
+    encoded = image_utils.drawable_to_base64(object(), format="RAW")
+
+    assert image_utils.base64_to_new_layer(None, encoded) == "layer"
+    assert layer_sink == {"size": (5, 3), "data": source.tobytes()}
+
+
+def test_decodes_reuse_a_pooled_buffer_without_stale_bytes(image_utils, layer_sink, monkeypatch):
+    monkeypatch.setattr(image_utils, "_buffer_pool", collections.deque(maxlen=4))
+    image = types.SimpleNamespace(add_layer=lambda layer, pos: None)
+    payloads = []
+    for size in [(64, 64), (4, 4)]:
+        png = io.BytesIO()
+        Image.effect_noise(size, 80).convert("RGB").save(png, format="PNG")
+        payloads.append(base64.b64encode(png.getvalue()).decode())
+
+    image_utils.base64_to_new_layer(image, payloads[0])
+    pooled = image_utils._buffer_pool[0]
+    image_utils.base64_to_new_layer(image, payloads[1])
+
+    assert list(image_utils._buffer_pool) == [pooled]
+    assert layer_sink["size"] == (4, 4)
+
+
+def test_raw_payload_carries_sizes_past_16_bits(image_utils, layer_sink, monkeypatch):
+    source = Image.new("RGBA", (70000, 1), (1, 2, 3, 4))
+    monkeypatch.setattr(image_utils, "drawable_to_pil", lambda drawable: source)
+    encoded = image_utils.drawable_to_base64(object(), format="RAW")
+
+    assert image_utils.base64_to_new_layer(None, encoded) == "layer"
+    assert layer_sink["size"] == (70000, 1)
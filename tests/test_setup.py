@@ -0,0 +1,116 @@
+"""
+Tests for the helpers in setup.py.
+"""
+import importlib.util
+import os
+import runpy
+import shutil
+import subprocess
+import sys
+import zipfile
+
+import pytest
+import setuptools
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SETUPTOOLS_VERSION = tuple(int(part) for part in setuptools.__version__.split(".")[:2])
+
+
+@pytest.fixture
+def setup_module(monkeypatch):
+    """Execute setup.py with setup() replaced, returning its globals."""
+    calls = []
+    monkeypatch.setattr(setuptools, "setup", lambda **kwargs: calls.append(kwargs))
+    monkeypatch.chdir(ROOT)
+    monkeypatch.setattr("sys.argv", ["setup.py", "--name"])
+    module = runpy.run_path(os.path.join(ROOT, "setup.py"))
+    module["setup_calls"] = calls
+    return module
+
+
+@pytest.mark.parametrize("argv", [
+    ["egg_info", "--egg-base", "/tmp/build"],
+    ["dist_info", "--output-dir", "/tmp/build"],
+    ["--name"],
+    ["--version"],
+])
+def test_metadata_only_runs_skip_data_files(setup_module, argv):
+    assert setup_module["get_data_files"](argv) == []
+
+
+@pytest.mark.parametrize("argv", [
+    ["bdist_wheel", "--dist-dir", "/tmp/build"],
+    ["editable_wheel", "--dist-dir", "/tmp/build"],
+    ["install"],
+    ["egg_info", "sdist"],
+    [],
+])
+def test_installing_runs_include_docs(setup_module, argv):
+    (target, files), = setup_module["get_data_files"](argv)
+    assert target == "share/doc/gimp-ai-integration"
+    assert os.path.join("docs", "developer_guide.md") in files
+
+
+def test_setup_uses_the_metadata_predicate(setup_module):
+    # setup.py ran with --name, so data files were never collected
+    assert setup_module["setup_calls"][0]["data_files"] == []
+
+
+# Imported from the built tree in a fresh interpreter that can't see the source checkout
+ENTRY_POINT_CHECK = """
+import importlib, os, sys
+lib = sys.argv[1]
+sys.path.insert(0, lib)
+import scripts.deploy
+assert scripts.deploy.__file__.startswith(lib), scripts.deploy.__file__
+assert os.path.isfile(scripts.deploy.PLUGIN_SRC / "gimp-ai-tools.py"), scripts.deploy.PLUGIN_SRC
+for target in sys.argv[2:]:
+    module, _, attr = target.partition(":")
+    try:
+        obj = getattr(importlib.import_module(module), attr)
+    except ModuleNotFoundError as e:
+        # Third-party dependencies of the server aren't installed here
+        if e.name.split(".")[0] in ("backend", "frontend", "scripts"):
+            raise
+        continue
+    assert callable(obj), target
+"""
+
+
+def console_script_targets(setup_module):
+    scripts = setup_module["setup_calls"][0]["entry_points"]["console_scripts"]
+    return [spec.split("=", 1)[1] for spec in scripts]
+
+
+def check_entry_points(lib, targets):
+    result = subprocess.run([sys.executable, "-I", "-c", ENTRY_POINT_CHECK, str(lib), *targets],
+                            capture_output=True, text=True, cwd=lib)
+    assert result.returncode == 0, result.stderr
+
+
+def test_console_scripts_import_from_built_packages(setup_module, tmp_path):
+    lib = tmp_path / "lib"
+    subprocess.run([sys.executable, "setup.py", "-q", "build_py", "--build-lib", str(lib)],
+                   cwd=ROOT, check=True, capture_output=True)
+
+    for target in console_script_targets(setup_module):
+        module = target.split(":")[0]
+        assert (lib / (module.replace(".", os.sep) + ".py")).is_file(), module
+    check_entry_points(lib, console_script_targets(setup_module))
+
+
+def test_console_scripts_import_from_installed_wheel(setup_module, tmp_path):
+    # setuptools builds wheels itself from 70.1; older releases need the wheel package
+    if importlib.util.find_spec("wheel") is None and SETUPTOOLS_VERSION < (70, 1):
+        pytest.skip("building a wheel needs the wheel package")
+    # Build from a copy so the checkout doesn't collect build/ and egg-info output
+    src = tmp_path / "src"
+    shutil.copytree(ROOT, src, ignore=shutil.ignore_patterns(".git", "build", "dist", "*.egg-info", "__pycache__"))
+    subprocess.run([sys.executable, "-m", "pip", "wheel", "--no-deps", "--no-build-isolation",
+                    "-w", str(tmp_path / "dist"), str(src)], check=True, capture_output=True)
+
+    site = tmp_path / "site"
+    wheel, = (tmp_path / "dist").glob("*.whl")
+    with zipfile.ZipFile(wheel) as archive:
+        archive.extractall(site)
+    check_entry_points(site, console_script_targets(setup_module))
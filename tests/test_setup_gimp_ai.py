@@ -0,0 +1,133 @@
+"""
+Tests for scripts/setup_gimp_ai.py.
+"""
+import os
+import types
+
+import pytest
+
+import setup_gimp_ai
+
+
+@pytest.fixture
+def cache_dirs(tmp_path, monkeypatch):
+    """Point the script's caches and project root at a temporary directory."""
+    monkeypatch.setattr(setup_gimp_ai, "CACHE_ROOT", tmp_path / "cache")
+    monkeypatch.setattr(setup_gimp_ai, "WHEEL_CACHE", tmp_path / "cache" / "wheels")
+    monkeypatch.setattr(setup_gimp_ai, "VENV_CACHE", tmp_path / "cache" / "venvs")
+    project = tmp_path / "project"
+    for part in ("backend", "frontend"):
+        (project / part).mkdir(parents=True)
+        (project / part / "requirements.txt").write_text(f"requests>=2.0\n{part}-only==1.0\n")
+    monkeypatch.setattr(setup_gimp_ai, "project_root", str(project), raising=False)
+    return tmp_path
+
+
+def make_venv(venv_dir):
+    """Create a fake venv with a text entry point and a binary file that mention its prefix."""
+    prefix = os.path.abspath(venv_dir)
+    (venv_dir / "bin").mkdir(parents=True)
+    (venv_dir / "pyvenv.cfg").write_text(f"home = /usr/bin\ncommand = python -m venv {prefix}\n")
+    (venv_dir / "bin" / "pip").write_text(f"#!{prefix}/bin/python\nimport pip\n")
+    (venv_dir / "bin" / "python-copy").write_bytes(b"\x7fELF\0" + prefix.encode())
+    return prefix
+
+
+def test_cached_venv_is_relocated(cache_dirs, monkeypatch):
+    monkeypatch.setattr(setup_gimp_ai, "VENV_CACHE_SUPPORTED", True)
+    original = cache_dirs / "first" / "venv"
+    old_prefix = make_venv(original)
+    setup_gimp_ai.store_venv_in_cache(str(original))
+
+    restored = cache_dirs / "second" / "venv"
+    assert setup_gimp_ai.restore_cached_venv(str(restored)) is True
+
+    new_prefix = os.path.abspath(restored)
+    assert (restored / "bin" / "pip").read_text().startswith(f"#!{new_prefix}/bin/python")
+    assert new_prefix in (restored / "pyvenv.cfg").read_text()
+    # Binary files are copied untouched
+    assert (restored / "bin" / "python-copy").read_bytes().endswith(old_prefix.encode())
+
+
+def test_venv_cache_disabled_on_windows(cache_dirs, monkeypatch):
+    monkeypatch.setattr(setup_gimp_ai, "VENV_CACHE_SUPPORTED", False)
+    original = cache_dirs / "first" / "venv"
+    make_venv(original)
+
+    setup_gimp_ai.store_venv_in_cache(str(original))
+    assert not setup_gimp_ai.VENV_CACHE.exists()
+    assert setup_gimp_ai.restore_cached_venv(str(cache_dirs / "second" / "venv")) is False
+
+
+def test_dependencies_installed_in_one_pip_run(cache_dirs, monkeypatch):
+    monkeypatch.setattr(setup_gimp_ai, "UV_CMD", None)
+    calls = []
+    monkeypatch.setattr(setup_gimp_ai.subprocess, "run",
+                        lambda cmd, **kwargs: calls.append(cmd) or types.SimpleNamespace(returncode=0))
+    venv_dir = str(cache_dirs / "venv")
+
+    assert setup_gimp_ai.install_dependencies(venv_dir) is True
+    assert [cmd[1] for cmd in calls] == ["wheel", "install"]
+    combined = (cache_dirs / "cache" / "requirements-combined.txt").read_text().split()
+    assert sorted(combined) == ["backend-only==1.0", "frontend-only==1.0", "requests>=2.0"]
+
+    # A second run with unchanged requirements reuses the wheelhouse
+    calls.clear()
+    assert setup_gimp_ai.install_dependencies(venv_dir) is True
+    assert [cmd[1] for cmd in calls] == ["install"]
+
+
+def test_configure_environment_writes_scripts(cache_dirs, monkeypatch):
+    monkeypatch.setattr(setup_gimp_ai.platform, "system", lambda: "Linux")
+    project = cache_dirs / "project"
+
+    assert setup_gimp_ai.configure_environment("127.0.0.1", 8000) is True
+
+    assert "MCP_SERVER_URL=http://127.0.0.1:8000/jsonrpc" in (project / ".env").read_text()
+    assert "export MCP_SOCKET_PORT=9876" in (project / "set_env.sh").read_text()
+    assert os.access(project / "start_gimp_ai.sh", os.X_OK)
+    assert not list(project.glob("*.tmp"))
+
+
+def test_only_public_plugin_scripts_made_executable(tmp_path):
+    for name in ("plugin_main.py", "_helpers.py", "__init__.py", "README.md"):
+        (tmp_path / name).write_text("")
+
+    changed = setup_gimp_ai.deploy._make_scripts_executable(str(tmp_path))
+
+    assert [os.path.basename(path) for path in changed] == ["plugin_main.py"]
+    assert os.access(tmp_path / "plugin_main.py", os.X_OK)
+    assert not os.access(tmp_path / "_helpers.py", os.X_OK)
+
+
+def test_merge_requirements_keeps_url_fragments(tmp_path):
+    first = tmp_path / "a.txt"
+    first.write_text("# shared deps\nnumpy>=1.20  # arrays\ngit+https://example.com/repo.git#egg=tool\n")
+    second = tmp_path / "b.txt"
+    second.write_text("numpy<3\n\nrequests\n")
+
+    merged = setup_gimp_ai.merge_requirements([str(first), str(second)])
+
+    assert "git+https://example.com/repo.git#egg=tool" in merged
+    assert "requests" in merged
+    numpy = [line for line in merged if line.startswith("numpy")]
+    if setup_gimp_ai.PACKAGING_AVAILABLE:
+        # Both pins are combined into one specifier
+        assert len(numpy) == 1 and "<3" in numpy[0] and ">=1.20" in numpy[0]
+    else:
+        assert numpy == ["numpy>=1.20", "numpy<3"]
+
+
+@pytest.mark.skipif(not setup_gimp_ai.PACKAGING_AVAILABLE, reason="needs packaging")
+def test_satisfied_requirements_are_skipped():
+    requirements = [
+        "pytest>=1.0",
+        "pytest<1.0",
+        "surely-not-installed-package==1.0",
+        'pytest>=1.0; python_version < "3"',
+    ]
+
+    assert setup_gimp_ai.find_missing_requirements(requirements) == [
+        "pytest<1.0",
+        "surely-not-installed-package==1.0",
+    ]
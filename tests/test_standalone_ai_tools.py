@@ -0,0 +1,175 @@
+"""
+Tests for the JSON-RPC transport in scripts/standalone-ai-tools.py.
+
+The plugin module needs GIMP's gi bindings at import time; the tests load it
+with a minimal stand-in so its pure-Python HTTP code can run anywhere.
+"""
+import importlib.util
+import json
+import os
+import socket
+import sys
+import threading
+import types
+
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+@pytest.fixture
+def plugin(monkeypatch):
+    """Load standalone-ai-tools.py with stand-in gi modules."""
+    gimp = types.SimpleNamespace(
+        PlugIn=type("PlugIn", (), {"__gtype__": None}),
+        main=lambda *args: None,
+        message=lambda message: None,
+    )
+    glib = types.SimpleNamespace(dgettext=lambda domain, message: message, idle_add=lambda func: func())
+    gi = types.ModuleType("gi")
+    gi.require_version = lambda *args: None
+    repository = types.ModuleType("gi.repository")
+    repository.Gimp, repository.GLib = gimp, glib
+    monkeypatch.setitem(sys.modules, "gi", gi)
+    monkeypatch.setitem(sys.modules, "gi.repository", repository)
+
+    spec = importlib.util.spec_from_file_location(
+        "standalone_ai_tools", os.path.join(ROOT, "scripts", "standalone-ai-tools.py")
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    yield module
+    for conn in module._CONN_CACHE.values():
+        conn.close()
+
+
+class RawServer:
+    """
+    Socket server answering each request with a scripted reply.
+
+    ``reply(n)`` gets the 0-based request number and returns the raw bytes to
+    send, or None to close the connection without answering.
+    """
+
+    def __init__(self, reply):
+        self.reply = reply
+        self.requests = []
+        self.connections = 0
+        self.sock = socket.create_server(("127.0.0.1", 0))
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.sock.getsockname()[1]}/jsonrpc"
+
+    def _serve(self):
+        while True:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                return
+            self.connections += 1
+            threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def _handle(self, conn):
+        reader = conn.makefile("rb")
+        with conn, reader:
+            while True:
+                request_line = reader.readline()
+                if not request_line:
+                    return
+                headers = {}
+                for line in iter(reader.readline, b"\r\n"):
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = reader.read(int(headers["content-length"]))
+                self.requests.append((request_line, headers, json.loads(body)))
+
+                data = self.reply(len(self.requests) - 1)
+                if data is None:
+                    return
+                conn.sendall(data)
+
+    def close(self):
+        self.sock.close()
+
+
+def json_reply(result, extra_headers=b""):
+    body = json.dumps({"jsonrpc": "2.0", "id": 1, "result": result}).encode()
+    return (b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n" + extra_headers +
+            b"Content-Length: " + str(len(body)).encode() + b"\r\n\r\n" + body)
+
+
+@pytest.fixture
+def raw_server():
+    servers = []
+
+    def start(reply):
+        server = RawServer(reply)
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.close()
+
+
+def test_requests_reuse_one_connection(plugin, raw_server):
+    server = raw_server(lambda n: json_reply({"n": n}))
+
+    assert plugin.send_request(server.url, "hello_world", {"a": 1}) == {"n": 0}
+    assert plugin.send_request(server.url, "hello_world", {"a": 2}) == {"n": 1}
+    assert server.connections == 1
+
+    request_line, headers, body = server.requests[0]
+    assert request_line == b"POST /jsonrpc HTTP/1.1\r\n"
+    assert headers["content-type"] == "application/json"
+    assert headers["host"] == server.url.split("/")[2]
+    assert body["method"] == "hello_world" and body["params"] == {"a": 1}
+
+
+def test_chunked_response(plugin, raw_server):
+    body = json.dumps({"jsonrpc": "2.0", "id": 1, "result": "chunked"}).encode()
+    reply = (b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n" +
+             b"%x\r\n" % 5 + body[:5] + b"\r\n" +
+             b"%x\r\n" % (len(body) - 5) + body[5:] + b"\r\n0\r\n\r\n")
+    server = raw_server(lambda n: reply)
+
+    assert plugin.send_request(server.url, "m", {}) == "chunked"
+    assert plugin.send_request(server.url, "m", {}) == "chunked"
+    assert server.connections == 1
+
+
+def test_stale_keepalive_connection_is_resent_once(plugin, raw_server):
+    # The server drops the idle connection after the first reply without saying so
+    server = raw_server(lambda n: json_reply(n) if n != 1 else None)
+
+    assert plugin.send_request(server.url, "m", {}) == 0
+    assert plugin.send_request(server.url, "m", {}) == 2
+    assert server.connections == 2
+
+
+def test_failure_on_fresh_connection_is_not_resent(plugin, raw_server):
+    server = raw_server(lambda n: None)
+
+    assert plugin.send_request(server.url, "ai_upscale", {}) is None
+    assert len(server.requests) == 1
+
+
+def test_responses_are_not_time_limited(plugin, raw_server):
+    server = raw_server(lambda n: json_reply(n))
+    plugin.send_request(server.url, "m", {})
+
+    conn = next(iter(plugin._CONN_CACHE.values()))
+    assert conn.sock.gettimeout() is None
+
+
+def test_unparseable_response_switches_server_to_urllib(plugin, raw_server):
+    server = raw_server(lambda n: b"garbage\r\n\r\n" if n == 0 else json_reply(n, b"Connection: close\r\n"))
+
+    # The garbled request is reported, not resent
+    assert plugin.send_request(server.url, "m", {}) is None
+    assert len(server.requests) == 1
+
+    assert plugin.send_request(server.url, "m", {}) == 1
+    assert isinstance(next(iter(plugin._CONN_CACHE.values())), plugin._UrllibConnection)
@@ -5,10 +5,260 @@ This library provides a simple interface for Claude Desktop to interact
 with the GIMP MCP API for image creation and editing tasks.
 """
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import asyncio
 import json
-import base64
+import functools
+import gzip
+import hashlib
+import inspect
+import itertools
+import mmap
 import os
-from typing import Dict, Any, List, Optional, Union, Tuple
+import shutil
+import tempfile
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Union, Tuple, Callable
+
+# pybase64 (pip install pybase64) uses SIMD kernels for large image payloads
+try:
+    from pybase64 import b64encode, b64decode
+except ImportError:
+    from base64 import b64encode, b64decode
+
+# orjson encodes straight to bytes and is much faster on large base64 image payloads
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+def _dumps(obj: Any) -> bytes:
+    """Serialise a JSON-RPC payload to bytes."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode("utf-8")
+
+def _loads(data: bytes) -> Any:
+    """Parse a JSON-RPC response body."""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+# httpx powers the asyncio client; HTTP/2 additionally needs the h2 package
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+
+try:
+    import h2  # noqa: F401
+    H2_AVAILABLE = True
+except ImportError:
+    H2_AVAILABLE = False
+
+# requests only decodes brotli responses when the brotli package is installed
+try:
+    import brotli  # noqa: F401
+    ACCEPT_ENCODING = "br, gzip, deflate"
+except ImportError:
+    ACCEPT_ENCODING = "gzip, deflate"
+
+# Request bodies at least this large are gzip-compressed (base64 image data compresses well)
+GZIP_MIN_SIZE = 16 * 1024
+
+# Statuses a server without batch support answers a JSON-RPC batch with, before running any call
+BATCH_REJECTED_STATUSES = (400, 415, 422)
+
+# (connect, read) timeouts for JSON-RPC calls, in seconds
+REQUEST_TIMEOUT = (3.05, 30)
+
+# Transient failures are retried with exponential backoff (0.25s, 0.5s, 1s, ...).
+# Requests whose response was lost mid-read are never replayed (read=0), since the
+# server may already have applied the edit.
+_RETRY_OPTIONS = dict(
+    total=3,
+    read=0,
+    backoff_factor=0.25,
+    status_forcelist=(429, 502, 503, 504),
+    allowed_methods=frozenset(["GET", "POST"]),
+    respect_retry_after_header=True,
+    raise_on_status=False,
+)
+# urllib3 2.x can add random jitter to the backoff so retrying clients don't stampede
+if "backoff_jitter" in inspect.signature(Retry.__init__).parameters:
+    _RETRY_OPTIONS["backoff_jitter"] = 0.1
+
+# Maximum number of analysis results kept by the client-side cache
+ANALYSIS_CACHE_SIZE = 32
+
+# Base64 is streamed in slices; multiples of 3 (encode) and 4 (decode) never need padding mid-stream
+ENCODE_CHUNK_SIZE = 3 * 64 * 1024
+DECODE_CHUNK_SIZE = 4 * 64 * 1024
+
+# Last session and learned server capabilities, reused by the next client for the same server.
+# Every client using the same file shares one saved session per server; processes that
+# work concurrently should each pass their own state_file.
+STATE_FILE = os.path.join(os.path.expanduser("~"), ".cache", "gimp-mcp", "state.json")
+STATE_TTL = 60 * 60
+
+# Output paths with these prefixes name storage the server writes to directly
+SERVER_PATH_SCHEMES = ("server://",)
+
+def _is_server_path(path: str, server_writable_dir: Optional[str] = None) -> bool:
+    """
+    Check whether the server can write an output path itself.
+    
+    Args:
+        path: Output path given by the caller
+        server_writable_dir: Local directory the server also sees (e.g. a shared mount)
+        
+    Returns:
+        True if the image bytes never need to pass through the client
+    """
+    if path.startswith(SERVER_PATH_SCHEMES):
+        return True
+    if not server_writable_dir:
+        return False
+    root = os.path.join(os.path.abspath(server_writable_dir), "")
+    return os.path.abspath(path).startswith(root)
+
+def _server_output_path(path: str) -> str:
+    """
+    Spell out an output path the way the server should see it.
+    
+    Args:
+        path: Output path given by the caller, already known to be a server path
+        
+    Returns:
+        The path unchanged if it uses a server scheme, otherwise made absolute,
+        since the server resolves relative paths against its own working directory
+    """
+    if path.startswith(SERVER_PATH_SCHEMES):
+        return path
+    return os.path.abspath(path)
+
+def _encode_file_base64(path: str) -> str:
+    """
+    Base64-encode a file without reading it into memory first.
+    
+    Args:
+        path: Path to the file
+        
+    Returns:
+        Base64-encoded file contents
+    """
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return ""
+        
+        # Encode slices of the mapped file straight into one preallocated output buffer
+        encoded = bytearray(((size + 2) // 3) * 4)
+        pos = 0
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for offset in range(0, size, ENCODE_CHUNK_SIZE):
+                chunk = b64encode(mm[offset:offset + ENCODE_CHUNK_SIZE])
+                encoded[pos:pos + len(chunk)] = chunk
+                pos += len(chunk)
+    
+    return encoded.decode("ascii")
+
+def _hash_file(path: str) -> str:
+    """
+    Compute the SHA-256 of a file, streaming it in chunks.
+    
+    Args:
+        path: Path to the file
+        
+    Returns:
+        Hex digest of the file contents
+    """
+    with open(path, "rb") as f:
+        # hashlib.file_digest (Python 3.11+) reads straight into a reusable buffer
+        if hasattr(hashlib, "file_digest"):
+            return hashlib.file_digest(f, "sha256").hexdigest()
+        digest = hashlib.sha256()
+        for chunk in iter(functools.partial(f.read, 64 * 1024), b""):
+            digest.update(chunk)
+        return digest.hexdigest()
+
+def _write_base64_file(path: str, data: str, buf: Optional[bytearray] = None) -> bytearray:
+    """
+    Decode base64 data slice by slice into a reusable buffer and write it out in one call.
+    
+    Args:
+        path: Output file path
+        data: Base64-encoded contents
+        buf: Buffer from a previous call; replaced only when it is too small
+        
+    Returns:
+        The buffer used, to pass back in on the next call
+    """
+    # Decoded size is exact: every 4 characters carry 3 bytes, minus the padding
+    expected = 3 * len(data) // 4 - data.count("=", -2)
+    if buf is None or len(buf) < expected:
+        buf = bytearray(expected)
+    view = memoryview(buf)
+    
+    offset = 0
+    for start in range(0, len(data), DECODE_CHUNK_SIZE):
+        chunk = b64decode(data[start:start + DECODE_CHUNK_SIZE], validate=True)
+        view[offset:offset + len(chunk)] = chunk
+        offset += len(chunk)
+    
+    with open(path, "wb") as f:
+        f.write(view[:offset])
+    view.release()
+    return buf
+
+class PendingResult:
+    """
+    Handle for a JSON-RPC call queued with GimpMCPClient.queue().
+    
+    The value becomes available once GimpMCPClient.flush() has sent the batch.
+    """
+    
+    def __init__(self, method: str, transform: Optional[Callable[[Any], Any]] = None):
+        self.method = method
+        self._transform = transform
+        self._done = False
+        self._value = None
+        self._error = None
+    
+    def _resolve(self, response: Dict[str, Any]) -> None:
+        """Store the result (or error) from a JSON-RPC response object."""
+        self._done = True
+        if "error" in response:
+            error_message = response["error"].get("message", "Unknown error")
+            self._error = Exception(f"JSON-RPC error: {error_message}")
+            return
+        try:
+            result = response.get("result")
+            self._value = self._transform(result) if self._transform else result
+        except Exception as e:
+            self._error = e
+    
+    def done(self) -> bool:
+        """Whether the batch containing this call has been flushed."""
+        return self._done
+    
+    def result(self) -> Any:
+        """
+        Get the call's result.
+        
+        Returns:
+            The result, or raises the call's error
+        """
+        if not self._done:
+            raise Exception(f"'{self.method}' has not been sent yet; call flush() first.")
+        if self._error is not None:
+            raise self._error
+        return self._value
 
 class GimpMCPClient:
     """
@@ -18,17 +268,236 @@ class GimpMCPClient:
     with the GIMP MCP API for image creation and editing tasks.
     """
     
-    def __init__(self, server_url: str = "http://localhost:8000/jsonrpc", api_key: Optional[str] = None):
+    def __init__(self, server_url: str = "http://localhost:8000/jsonrpc", api_key: Optional[str] = None,
+                 binary_endpoint: Optional[str] = None, server_writable_dir: Optional[str] = None,
+                 http2: bool = False, state_file: Optional[str] = STATE_FILE,
+                 http2_prior_knowledge: bool = False):
         """
         Initialize the GIMP MCP client.
         
         Args:
             server_url: URL of the MCP server
             api_key: API key for authentication
+            binary_endpoint: URL for raw image uploads/downloads (defaults to /blob next to /jsonrpc)
+            server_writable_dir: Directory shared with the server; saves under it are written server-side
+            http2: Send JSON-RPC calls through httpx, offering HTTP/2. HTTP/2 is only negotiated
+                over https://; a plain http:// server gets HTTP/1.1 unless http2_prior_knowledge is set
+            state_file: Where the session and server capabilities are persisted (None to disable).
+                Clients sharing a file share its saved session, so give concurrent processes
+                separate files.
+            http2_prior_knowledge: With http2, speak HTTP/2 straight away (h2c) instead of
+                negotiating it, for cleartext servers known to support it. Servers that only
+                speak HTTP/1.1, such as the bundled uvicorn app, then can't be reached.
         """
+        if http2_prior_knowledge and not http2:
+            raise ValueError("http2_prior_knowledge requires http2=True")
+        if http2 and not (HTTPX_AVAILABLE and H2_AVAILABLE):
+            raise ImportError("http2=True requires httpx with HTTP/2 support: pip install 'httpx[http2]'")
+        
         self.server_url = server_url
         self.api_key = api_key
         self.session_id = None
+        self.server_writable_dir = server_writable_dir
+        
+        # Decode buffer reused across save_image calls; grows to the largest image seen
+        self._decode_buf: Optional[bytearray] = None
+        
+        # Image bytes go over a raw octet-stream endpoint when the server has one;
+        # None until the first upload tells us whether it exists
+        self.binary_endpoint = binary_endpoint or server_url.replace("/jsonrpc", "/blob")
+        self._supports_blob: Optional[bool] = None
+        
+        # Content hash -> blob ID of files already uploaded by this client, and whether
+        # the server can open images it already holds by hash (None until first tried)
+        self._recent_uploads: Dict[str, str] = {}
+        self._supports_open_by_hash: Optional[bool] = None
+        
+        # Background workers for file read/encode + upload and _send_many(), created on first use
+        self._executor: Optional[ThreadPoolExecutor] = None
+        
+        # Calls queued for the next batch, and ids shared by single and batched calls
+        self._pending: List[Tuple[Dict[str, Any], PendingResult]] = []
+        self._next_id = itertools.count(1)
+        self._supports_batch = True
+        
+        # Analysis results keyed by (session_id, analysis_type, epoch); each session's
+        # epoch advances whenever an edit is applied, so stale entries are never hit
+        self._epoch: Dict[str, int] = {}
+        self._analysis_cache: "OrderedDict[Tuple[str, str, int], Dict[str, Any]]" = OrderedDict()
+        
+        # One HTTP session for the client's lifetime, so calls reuse keep-alive connections
+        self._session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=16,
+            max_retries=Retry(**_RETRY_OPTIONS),
+        )
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        
+        # Headers are the same for every call; build them once and make them session defaults
+        self._headers = {
+            "Content-Type": "application/json",
+            "Connection": "keep-alive",
+            "Accept-Encoding": ACCEPT_ENCODING,
+        }
+        if api_key:
+            self._headers["X-API-Key"] = api_key
+        self._session.headers.update(self._headers)
+        
+        # Optional HTTP/2 transport for JSON-RPC calls; h2 multiplexes concurrent calls on one
+        # connection instead of queueing them behind each other. Blobs stay on the requests session.
+        # HTTP/2 is picked by TLS ALPN, so cleartext URLs stay on HTTP/1.1 without prior knowledge.
+        self._rpc_client: Optional["httpx.Client"] = None
+        if http2:
+            # httpx only retries failed connects; limits belong to the transport once one is passed
+            transport = httpx.HTTPTransport(
+                http1=not http2_prior_knowledge,
+                http2=True,
+                limits=httpx.Limits(max_keepalive_connections=8),
+                retries=_RETRY_OPTIONS["total"],
+            )
+            self._rpc_client = httpx.Client(
+                transport=transport,
+                headers={k: v for k, v in self._headers.items() if k != "Connection"},
+                timeout=httpx.Timeout(REQUEST_TIMEOUT[1], connect=REQUEST_TIMEOUT[0]),
+            )
+        
+        # Whether the server decodes gzip request bodies; None until the first large request
+        self._server_accepts_gzip: Optional[bool] = None
+        
+        # Fields shared by every JSON-RPC request
+        self._request_skeleton = {"jsonrpc": "2.0"}
+        
+        # Pick up capabilities and the last session from a previous run against this server
+        self.state_file = state_file
+        self._saved_session_id: Optional[str] = None
+        self._load_state()
+    
+    def close(self) -> None:
+        """Close the underlying HTTP connections and background workers."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        if self._rpc_client is not None:
+            self._rpc_client.close()
+        self._session.close()
+    
+    def __enter__(self) -> "GimpMCPClient":
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        try:
+            self.close_session()
+        finally:
+            self.close()
+    
+    def _load_state(self) -> None:
+        """Restore server capabilities and the saved session ID from the state file, if fresh."""
+        if not self.state_file:
+            return
+        try:
+            with open(self.state_file, "rb") as f:
+                state = _loads(f.read())
+        except (OSError, ValueError):
+            return
+        if state.get("server_url") != self.server_url or state.get("expires", 0) < time.time():
+            return
+        
+        capabilities = state.get("capabilities", {})
+        self._supports_blob = capabilities.get("supports_blob")
+        self._server_accepts_gzip = capabilities.get("supports_gzip")
+        self._supports_batch = capabilities.get("supports_batch", True)
+        self._saved_session_id = state.get("session_id")
+    
+    def _save_state(self) -> None:
+        """Write the current session ID and server capabilities to the state file."""
+        if not self.state_file:
+            return
+        state = {
+            "server_url": self.server_url,
+            "session_id": self.session_id,
+            "capabilities": {
+                "supports_blob": self._supports_blob,
+                "supports_gzip": self._server_accepts_gzip,
+                "supports_batch": self._supports_batch,
+            },
+            "expires": time.time() + STATE_TTL,
+        }
+        # Write to a temporary file and rename it, so a concurrent reader never sees a partial file
+        try:
+            state_dir = os.path.dirname(self.state_file)
+            os.makedirs(state_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=state_dir, prefix=".state-")
+            with os.fdopen(fd, "wb") as f:
+                f.write(_dumps(state))
+            os.replace(tmp_path, self.state_file)
+        except OSError:
+            pass
+    
+    def resume_session(self) -> Optional[str]:
+        """
+        Reuse the session saved by a previous run, if the server still has it.
+        
+        Costs one small request instead of creating or uploading the image again.
+        The session still holds the previous run's edits; call reset_image() to
+        start over on a blank canvas. A session is only saved for resuming while
+        it is open, so a run that wants to be resumed must not call close_session().
+        
+        Returns:
+            The resumed session ID, or None if there is nothing to resume
+        """
+        session_id, self._saved_session_id = self._saved_session_id, None
+        if not session_id:
+            return None
+        try:
+            result = self._send_request("mcp_operation", {"operation": "ping", "session_id": session_id})
+        except Exception:
+            result = None
+        
+        if not (result and result.get("session_id") == session_id):
+            self._save_state()
+            return None
+        self.session_id = session_id
+        return session_id
+    
+    def _build_request(self, method: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Build a JSON-RPC request object with a fresh id."""
+        return {**self._request_skeleton, "method": method, "params": params, "id": next(self._next_id)}
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Return the client's worker pool, creating it on first use."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="gimp-mcp")
+        return self._executor
+    
+    def _post(self, body: bytes, headers: Optional[Dict[str, str]] = None) -> Any:
+        """POST a body to the JSON-RPC endpoint over whichever transport is configured."""
+        if self._rpc_client is not None:
+            return self._rpc_client.post(self.server_url, content=body, headers=headers)
+        return self._session.post(self.server_url, data=body, headers=headers, timeout=REQUEST_TIMEOUT)
+    
+    def _post_json(self, body: bytes) -> Any:
+        """
+        POST a serialised JSON-RPC body, gzip-compressing large ones.
+        
+        A server that rejects the compressed body is remembered and sent plain bodies from then on.
+        
+        Args:
+            body: Serialised JSON-RPC request or batch
+            
+        Returns:
+            The HTTP response
+        """
+        if len(body) >= GZIP_MIN_SIZE and self._server_accepts_gzip is not False:
+            response = self._post(gzip.compress(body, compresslevel=1), {"Content-Encoding": "gzip"})
+            # A body the server couldn't decode is rejected before any handler runs
+            if self._server_accepts_gzip or response.status_code not in (400, 415, 422):
+                self._server_accepts_gzip = True
+                return response
+            self._server_accepts_gzip = False
+        
+        return self._post(body)
     
     def _send_request(self, method: str, params: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -42,33 +511,16 @@ class GimpMCPClient:
             Response data or raises an exception
         """
         # Create the JSON-RPC request
-        request_id = 1  # Use a fixed ID for simplicity
-        request_data = {
-            "jsonrpc": "2.0",
-            "method": method,
-            "params": params,
-            "id": request_id
-        }
-        
-        # Prepare headers
-        headers = {"Content-Type": "application/json"}
-        
-        # Add API key header if available
-        if self.api_key:
-            headers["X-API-Key"] = self.api_key
+        request_data = self._build_request(method, params)
         
         # Send the request
-        response = requests.post(
-            self.server_url,
-            json=request_data,
-            headers=headers
-        )
+        response = self._post_json(_dumps(request_data))
         
         # Check for HTTP errors
         response.raise_for_status()
         
         # Parse the response
-        result = response.json()
+        result = _loads(response.content)
         
         # Check for JSON-RPC errors
         if "error" in result:
@@ -78,6 +530,173 @@ class GimpMCPClient:
         # Return the result
         return result.get("result")
     
+    def _send_many(self, calls: List[Tuple[str, Dict[str, Any]]]) -> List[Any]:
+        """
+        Send several JSON-RPC calls concurrently.
+        
+        Unlike flush(), each call is its own request, so one large payload doesn't hold
+        up the others. When HTTP/2 is in use (http2=True over https://, or with
+        http2_prior_knowledge) they are interleaved on a single connection.
+        
+        Args:
+            calls: (method, params) pairs
+            
+        Returns:
+            Results in call order. Raises the first call error.
+        """
+        executor = self._get_executor()
+        futures = [executor.submit(self._send_request, method, params) for method, params in calls]
+        return [future.result() for future in futures]
+    
+    def queue(self, method: str, params: Dict[str, Any],
+              transform: Optional[Callable[[Any], Any]] = None) -> PendingResult:
+        """
+        Queue a JSON-RPC call to be sent with the next flush().
+        
+        Args:
+            method: JSON-RPC method name
+            params: Parameters for the method
+            transform: Optional function applied to the call's result
+            
+        Returns:
+            Handle that holds the result once flushed
+        """
+        handle = PendingResult(method, transform)
+        self._pending.append((self._build_request(method, params), handle))
+        return handle
+    
+    def flush(self) -> List[PendingResult]:
+        """
+        Send all queued calls as a single JSON-RPC batch.
+        
+        Servers that reject batch requests get the calls one by one over the
+        same keep-alive connection instead; this is remembered for later flushes.
+        Other HTTP errors are raised without resending anything, since the server
+        may already have applied part of the batch.
+        
+        Returns:
+            Handles of the flushed calls, in queue order. Raises the first call error.
+        """
+        pending, self._pending = self._pending, []
+        if not pending:
+            return []
+        
+        responses = None
+        if self._supports_batch and len(pending) > 1:
+            response = self._post_json(_dumps([request_data for request_data, _ in pending]))
+            # Only a rejected batch format is safe to replay call by call; after any other
+            # error the server may already have applied part of the batch
+            if response.status_code not in BATCH_REJECTED_STATUSES:
+                try:
+                    response.raise_for_status()
+                except requests.HTTPError as e:
+                    for _, handle in pending:
+                        handle._resolve({"error": {"message": f"Batch request failed: {e}"}})
+                    raise
+                body = _loads(response.content)
+                if isinstance(body, list):
+                    responses = {item.get("id"): item for item in body}
+            if responses is None:
+                self._supports_batch = False
+        
+        if responses is None:
+            responses = {}
+            for request_data, _ in pending:
+                response = self._post_json(_dumps(request_data))
+                response.raise_for_status()
+                responses[request_data["id"]] = _loads(response.content)
+        
+        # Resolve every handle before surfacing the first error
+        handles = []
+        for request_data, handle in pending:
+            missing = {"error": {"message": f"No response for '{request_data['method']}'"}}
+            handle._resolve(responses.get(request_data["id"], missing))
+            handles.append(handle)
+        for handle in handles:
+            handle.result()
+        return handles
+    
+    def _record_mutation(self, session_id: Optional[str], result: Dict[str, Any]) -> bool:
+        """
+        Note that an edit was applied to a session, invalidating its cached analyses.
+        
+        Args:
+            session_id: Session the edit was applied to
+            result: Result of the edit operation
+            
+        Returns:
+            The operation's success flag
+        """
+        if session_id:
+            self._epoch[session_id] = self._epoch.get(session_id, 0) + 1
+        return result.get("success", False)
+    
+    def invalidate_cache(self, session_id: Optional[str] = None) -> None:
+        """
+        Drop cached analysis results, e.g. after editing the image out-of-band.
+        
+        Args:
+            session_id: Session to invalidate (defaults to all sessions)
+        """
+        if session_id is None:
+            self._analysis_cache.clear()
+        else:
+            self._epoch[session_id] = self._epoch.get(session_id, 0) + 1
+    
+    def _upload_blob(self, path: str) -> Optional[str]:
+        """
+        Upload a file to the binary endpoint as application/octet-stream.
+        
+        Args:
+            path: File to upload
+            
+        Returns:
+            Blob ID assigned by the server, or None if the server has no binary endpoint
+        """
+        if self._supports_blob is False:
+            return None
+        
+        def post(body) -> requests.Response:
+            return self._session.post(
+                self.binary_endpoint,
+                data=body,
+                headers={"Content-Type": "application/octet-stream"},
+                timeout=REQUEST_TIMEOUT
+            )
+        
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                response = post(b"")
+            else:
+                # A memoryview over the mapped file has no read(), so a retried request
+                # resends the whole body instead of an exhausted file position
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    with memoryview(mm) as body:
+                        response = post(body)
+        
+        # Remember a missing endpoint so later calls go straight to base64
+        if response.status_code in (404, 405):
+            self._supports_blob = False
+            return None
+        response.raise_for_status()
+        self._supports_blob = True
+        return _loads(response.content)["blob_id"]
+    
+    def _download_blob(self, blob_id: str, path: str) -> None:
+        """
+        Stream a blob from the binary endpoint into a file.
+        
+        Args:
+            blob_id: Blob ID returned by the server
+            path: Output file path
+        """
+        with self._session.get(f"{self.binary_endpoint}/{blob_id}", stream=True, timeout=REQUEST_TIMEOUT) as response:
+            response.raise_for_status()
+            # Let urllib3 undo any Content-Encoding while copying straight to disk
+            response.raw.decode_content = True
+            with open(path, "wb") as f:
+                shutil.copyfileobj(response.raw, f, 1024 * 1024)
+    
     def create_new_image(self, width: int = 1000, height: int = 1000, 
                        color: Tuple[int, int, int, int] = (255, 255, 255, 255)) -> str:
         """
@@ -100,9 +719,54 @@ class GimpMCPClient:
         
         # Save the session ID
         self.session_id = result.get("session_id")
+        self._save_state()
         
         return self.session_id
     
+    def reset_image(self, width: int = 1000, height: int = 1000,
+                    color: Tuple[int, int, int, int] = (255, 255, 255, 255)) -> bool:
+        """
+        Replace the current session's image with a blank canvas, keeping the session.
+        
+        Args:
+            width: Width of the new image
+            height: Height of the new image
+            color: RGBA color tuple for the background
+            
+        Returns:
+            True if successful
+        """
+        if not self.session_id:
+            raise Exception("No active session. Create or open an image first.")
+        
+        result = self._send_request("mcp_operation", {
+            "operation": "create_new_image",
+            "session_id": self.session_id,
+            "width": width,
+            "height": height,
+            "color": color
+        })
+        return self._record_mutation(self.session_id, result)
+    
+    def open_image_async(self, image_path: str) -> "Future[str]":
+        """
+        Open an existing image in the background.
+        
+        Reading, hashing and encoding the file and the upload run on a worker
+        thread, so the caller can prepare its next operation (or start opening
+        another image) meanwhile.
+        
+        The client's current session is left unchanged; the client holds one session
+        at a time, so set session_id from the future's result to work on the image.
+        
+        Args:
+            image_path: Path to the image file
+            
+        Returns:
+            Future resolving to the session ID for the opened image
+        """
+        return self._get_executor().submit(self._open_image, image_path)
+    
     def open_image(self, image_path: str) -> str:
         """
         Open an existing image.
@@ -113,22 +777,78 @@ class GimpMCPClient:
         Returns:
             Session ID for the opened image
         """
-        # Read the image file
-        with open(image_path, "rb") as f:
-            image_data = base64.b64encode(f.read()).decode("utf-8")
+        self.session_id = self.open_image_async(image_path).result()
+        self._save_state()
+        return self.session_id
+    
+    def _open_by_hash(self, digest: str) -> Optional[Dict[str, Any]]:
+        """
+        Ask the server to open an image it already holds, by content hash.
         
-        # Send the request
-        result = self._send_request("mcp_operation", {
-            "operation": "open_image",
-            "image_data": image_data
-        })
+        A server without open_image_by_hash either errors or, like this repo's
+        backend, answers an unknown operation with success=False on a freshly
+        created blank session. Only an explicit success is trusted; the side-effect
+        session is closed and the probe is not repeated.
         
-        # Save the session ID
-        self.session_id = result.get("session_id")
+        Args:
+            digest: SHA-256 hex digest of the image file
+            
+        Returns:
+            The open result, or None if the image has to be uploaded
+        """
+        try:
+            result = self._send_request("mcp_operation", {
+                "operation": "open_image_by_hash",
+                "hash": digest
+            })
+        except Exception:
+            self._supports_open_by_hash = False
+            return None
         
-        return self.session_id
+        if result and result.get("success") is True and result.get("session_id"):
+            self._supports_open_by_hash = True
+            return result
+        
+        # A plain miss opens no session; keep probing on later opens
+        if not (result and result.get("session_id")):
+            return None
+        
+        # The server opened a blank session instead of the image: it doesn't know the operation
+        self._supports_open_by_hash = False
+        try:
+            self._send_request("mcp_close_session", {"session_id": result["session_id"]})
+        except Exception:
+            pass
+        return None
+    
+    def _open_image(self, image_path: str) -> str:
+        """Read, upload and open an image, returning its session ID; runs on a worker thread."""
+        digest = _hash_file(image_path)
+        blob_id = self._recent_uploads.get(digest)
+        
+        # Ask the server to open the image from a copy it already holds, skipping the upload
+        result = None
+        if blob_id is None and self._supports_open_by_hash is not False:
+            result = self._open_by_hash(digest)
+        
+        if result is None:
+            # Upload the raw bytes when possible, otherwise embed them as base64
+            if blob_id is None:
+                blob_id = self._upload_blob(image_path)
+                if blob_id is not None:
+                    self._recent_uploads[digest] = blob_id
+            if blob_id is not None:
+                params = {"operation": "open_image", "blob_id": blob_id}
+            else:
+                params = {"operation": "open_image", "image_data": _encode_file_base64(image_path)}
+            
+            # Send the request
+            result = self._send_request("mcp_operation", params)
+        
+        return result.get("session_id")
     
-    def save_image(self, output_path: str, format: str = "PNG", quality: int = 95) -> bool:
+    def save_image(self, output_path: str, format: str = "PNG", quality: int = 95,
+                   batch: bool = False) -> Union[bool, PendingResult]:
         """
         Save the current image.
         
@@ -136,32 +856,56 @@ class GimpMCPClient:
             output_path: Path to save the image
             format: Image format (PNG, JPEG, etc.)
             quality: Image quality (1-100)
+            batch: Queue the call for the next flush() instead of sending it now
             
         Returns:
-            True if successful
+            True if successful, or a PendingResult when batched
         """
         if not self.session_id:
             raise Exception("No active session. Create or open an image first.")
         
-        # Send the request
-        result = self._send_request("mcp_operation", {
+        params = {
             "operation": "save_image",
             "session_id": self.session_id,
             "format": format,
             "quality": quality
-        })
+        }
         
-        # Get the image data
-        image_data = result.get("image_data")
-        if not image_data:
-            raise Exception("No image data returned")
+        # Let the server write paths it can reach; it sends the image back only if it didn't.
+        # Otherwise ask for the result as a blob unless the server is known not to support it
+        server_path = _is_server_path(output_path, self.server_writable_dir)
+        if server_path:
+            params["output_path"] = _server_output_path(output_path)
+        elif self._supports_blob is not False:
+            params["return_blob"] = True
         
-        # Save the image
-        image_bytes = base64.b64decode(image_data)
-        with open(output_path, "wb") as f:
-            f.write(image_bytes)
+        def write_image(result: Dict[str, Any]) -> bool:
+            # The server confirmed it wrote the file itself
+            if result.get("saved_path"):
+                return True
+            if server_path and output_path.startswith(SERVER_PATH_SCHEMES):
+                raise Exception(f"Server did not save the image to {output_path}")
+            
+            # Servers with a binary endpoint hand back a blob to stream down
+            if result.get("blob_id"):
+                self._download_blob(result["blob_id"], output_path)
+                return True
+            
+            # Get the image data
+            image_data = result.get("image_data")
+            if not image_data:
+                raise Exception("No image data returned")
+            
+            # Save the image
+            self._decode_buf = _write_base64_file(output_path, image_data, self._decode_buf)
+            
+            return True
         
-        return True
+        if batch:
+            return self.queue("mcp_operation", params, write_image)
+        
+        # Send the request
+        return write_image(self._send_request("mcp_operation", params))
     
     def analyze_image(self, analysis_type: str = "detailed") -> Dict[str, Any]:
         """
@@ -176,13 +920,24 @@ class GimpMCPClient:
         if not self.session_id:
             raise Exception("No active session. Create or open an image first.")
         
+        # Reuse the last analysis if the image hasn't been edited since
+        key = (self.session_id, analysis_type, self._epoch.get(self.session_id, 0))
+        cached = self._analysis_cache.get(key)
+        if cached is not None:
+            self._analysis_cache.move_to_end(key)
+            return cached
+        
         # Send the request
         result = self._send_request("image_analysis", {
             "session_id": self.session_id,
             "analysis_type": analysis_type
         })
         
-        return result.get("analysis", {})
+        analysis = result.get("analysis", {})
+        self._analysis_cache[key] = analysis
+        if len(self._analysis_cache) > ANALYSIS_CACHE_SIZE:
+            self._analysis_cache.popitem(last=False)
+        return analysis
     
     def execute_commands(self, commands: List[Dict[str, Any]], include_image_data: bool = False) -> Dict[str, Any]:
         """
@@ -208,8 +963,10 @@ class GimpMCPClient:
         result = self._send_request("execute_gimp_commands", params)
         
         # Update session ID if a new one was created
-        if "session_id" in result:
+        if "session_id" in result and result["session_id"] != self.session_id:
             self.session_id = result["session_id"]
+            self._save_state()
+        self._record_mutation(self.session_id, result)
         
         return result
     
@@ -230,6 +987,7 @@ class GimpMCPClient:
         
         # Clear the session ID
         self.session_id = None
+        self._save_state()
         
         return result.get("success", False)
     
@@ -270,56 +1028,292 @@ class GimpMCPClient:
         if not self.session_id:
             raise Exception("No active session. Create or open an image first.")
         
-        # Extract operation and parameters
-        operation = suggestion.get("operation")
-        parameters = suggestion.get("parameters", {})
-        
-        if not operation:
-            raise Exception("Invalid suggestion. No operation specified.")
-        
-        # Add session ID to parameters
-        parameters["session_id"] = self.session_id
-        
         # Send the request
-        result = self._send_request("mcp_operation", {
-            "operation": operation,
-            **parameters
-        })
+        result = self._send_request("mcp_operation", _suggestion_payload(suggestion, self.session_id))
         
-        return result.get("success", False)
+        return self._record_mutation(self.session_id, result)
     
     # Helper methods for common operations
     
-    def resize_image(self, width: int, height: int) -> bool:
+    # Public helper name -> (server operation, parameter names)
+    _OPS: Dict[str, Tuple[str, Tuple[str, ...]]] = {
+        "resize_image": ("resize_image", ("width", "height")),
+        "apply_blur": ("apply_blur", ("radius",)),
+        "adjust_brightness_contrast": ("adjust_brightness_contrast", ("brightness", "contrast")),
+        "add_text": ("add_text_layer", ("text", "x", "y", "font", "size", "color")),
+    }
+    
+    def _op(self, name: str, batch: bool = False, **params: Any) -> Union[bool, PendingResult]:
+        """
+        Run an editing operation from _OPS on the current session.
+        
+        Args:
+            name: Helper name in _OPS
+            batch: Queue the call for the next flush() instead of sending it now
+            **params: Operation parameters
+            
+        Returns:
+            True if successful, or a PendingResult when batched
+            
+        Raises:
+            ValueError: If params has a name the operation doesn't declare
+        """
+        if not self.session_id:
+            raise Exception("No active session. Create or open an image first.")
+        
+        payload = _op_payload(name, self.session_id, params)
+        
+        record = functools.partial(self._record_mutation, self.session_id)
+        if batch:
+            return self.queue("mcp_operation", payload, record)
+        return record(self._send_request("mcp_operation", payload))
+    
+    def resize_image(self, width: int, height: int, batch: bool = False) -> Union[bool, PendingResult]:
         """
         Resize the current image.
         
         Args:
             width: New width
             height: New height
+            batch: Queue the call for the next flush() instead of sending it now
             
         Returns:
-            True if successful
+            True if successful, or a PendingResult when batched
         """
-        if not self.session_id:
-            raise Exception("No active session. Create or open an image first.")
+        return self._op("resize_image", batch, width=width, height=height)
+    
+    def apply_blur(self, radius: float = 5.0, batch: bool = False) -> Union[bool, PendingResult]:
+        """
+        Apply a Gaussian blur to the image.
         
-        # Send the request
-        result = self._send_request("mcp_operation", {
-            "operation": "resize_image",
-            "session_id": self.session_id,
+        Args:
+            radius: Blur radius
+            batch: Queue the call for the next flush() instead of sending it now
+            
+        Returns:
+            True if successful, or a PendingResult when batched
+        """
+        return self._op("apply_blur", batch, radius=radius)
+    
+    def adjust_brightness_contrast(self, brightness: int = 0, contrast: int = 0, batch: bool = False) -> Union[bool, PendingResult]:
+        """
+        Adjust brightness and contrast.
+        
+        Args:
+            brightness: Brightness adjustment (-100 to 100)
+            contrast: Contrast adjustment (-100 to 100)
+            batch: Queue the call for the next flush() instead of sending it now
+            
+        Returns:
+            True if successful, or a PendingResult when batched
+        """
+        return self._op("adjust_brightness_contrast", batch, brightness=brightness, contrast=contrast)
+    
+    def add_text(self, text: str, x: int, y: int, font: str = "Arial", 
+               size: int = 24, color: Tuple[int, int, int] = (0, 0, 0), batch: bool = False) -> Union[bool, PendingResult]:
+        """
+        Add text to the image.
+        
+        Args:
+            text: Text content
+            x: X position
+            y: Y position
+            font: Font name
+            size: Font size
+            color: RGB color tuple
+            batch: Queue the call for the next flush() instead of sending it now
+            
+        Returns:
+            True if successful, or a PendingResult when batched
+        """
+        return self._op("add_text", batch, text=text, x=x, y=y, font=font, size=size, color=color)
+
+# Server operation -> parameters it accepts, for the operations in GimpMCPClient._OPS
+OP_SCHEMAS: Dict[str, frozenset] = {
+    server_op: frozenset(param_names) for server_op, param_names in GimpMCPClient._OPS.values()
+}
+
+def _check_params(operation: str, params: Dict[str, Any], allowed) -> None:
+    """Raise ValueError if params has a name the operation doesn't accept."""
+    unknown = sorted(set(params) - set(allowed))
+    if unknown:
+        raise ValueError(f"Unknown parameter(s) for {operation}: {', '.join(unknown)}")
+
+def _op_payload(name: str, session_id: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    """Build the mcp_operation params for a GimpMCPClient._OPS helper, checking the parameter names."""
+    server_op, param_names = GimpMCPClient._OPS[name]
+    _check_params(server_op, params, param_names)
+    return {"operation": server_op, "session_id": session_id, **params}
+
+def _suggestion_payload(suggestion: Dict[str, Any], session_id: str) -> Dict[str, Any]:
+    """
+    Build the mcp_operation params for an AI assistant suggestion.
+    
+    Parameters of an operation in OP_SCHEMAS are checked here, since the server
+    silently ignores ones it doesn't know; other operations are passed through unchanged.
+    
+    Args:
+        suggestion: Suggestion from AI assistant
+        session_id: Session to apply it to
+        
+    Returns:
+        Params for the mcp_operation call
+        
+    Raises:
+        ValueError: If the suggestion has a parameter its operation doesn't accept
+    """
+    operation = suggestion.get("operation")
+    if not operation:
+        raise Exception("Invalid suggestion. No operation specified.")
+    
+    parameters = suggestion.get("parameters") or {}
+    allowed = OP_SCHEMAS.get(operation)
+    if allowed is not None:
+        _check_params(operation, parameters, allowed)
+    
+    payload = {"operation": operation, **parameters}
+    payload["session_id"] = session_id
+    return payload
+
+class AsyncGimpMCPClient:
+    """
+    asyncio client for the GIMP MCP API.
+    
+    Mirrors GimpMCPClient with async methods, so independent image sessions can
+    run concurrently on one event loop, e.g.
+    ``await asyncio.gather(*(client.analyze_image() for client in clients))``.
+    Requires httpx; offers HTTP/2 when the h2 package is installed, which
+    https:// servers can accept. Plain http:// URLs use HTTP/1.1.
+    """
+    
+    def __init__(self, server_url: str = "http://localhost:8000/jsonrpc", api_key: Optional[str] = None,
+                 client: Optional["httpx.AsyncClient"] = None, server_writable_dir: Optional[str] = None):
+        """
+        Initialize the async GIMP MCP client.
+        
+        Args:
+            server_url: URL of the MCP server
+            api_key: API key for authentication
+            client: Shared httpx.AsyncClient, so many sessions can use one connection pool
+            server_writable_dir: Directory shared with the server; saves under it are written server-side
+        """
+        if not HTTPX_AVAILABLE:
+            raise ImportError("AsyncGimpMCPClient requires httpx: pip install httpx")
+        
+        self.server_url = server_url
+        self.api_key = api_key
+        self.session_id = None
+        self.server_writable_dir = server_writable_dir
+        self._next_id = itertools.count(1)
+        
+        headers = {"Content-Type": "application/json"}
+        if api_key:
+            headers["X-API-Key"] = api_key
+        self._headers = headers
+        
+        # Only close the HTTP client if this instance created it
+        self._owns_client = client is None
+        self._client = client or httpx.AsyncClient(
+            http2=H2_AVAILABLE,
+            limits=httpx.Limits(max_keepalive_connections=16, max_connections=32),
+            timeout=30.0,
+            headers=headers,
+        )
+    
+    async def aclose(self) -> None:
+        """Close the underlying HTTP connections."""
+        if self._owns_client:
+            await self._client.aclose()
+    
+    async def __aenter__(self) -> "AsyncGimpMCPClient":
+        return self
+    
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        try:
+            await self.close_session()
+        finally:
+            await self.aclose()
+    
+    async def _send_request(self, method: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Send a JSON-RPC request to the MCP server.
+        
+        Args:
+            method: JSON-RPC method name
+            params: Parameters for the method
+            
+        Returns:
+            Response data or raises an exception
+        """
+        request_data = {"jsonrpc": "2.0", "method": method, "params": params, "id": next(self._next_id)}
+        response = await self._client.post(self.server_url, content=_dumps(request_data), headers=self._headers)
+        
+        # Check for HTTP errors
+        response.raise_for_status()
+        
+        # Parse the response
+        result = _loads(response.content)
+        
+        # Check for JSON-RPC errors
+        if "error" in result:
+            error_message = result["error"].get("message", "Unknown error")
+            raise Exception(f"JSON-RPC error: {error_message}")
+        
+        # Return the result
+        return result.get("result")
+    
+    async def _run_blocking(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Run blocking file work (read/encode, decode/write) on the default executor."""
+        return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+    
+    async def create_new_image(self, width: int = 1000, height: int = 1000,
+                               color: Tuple[int, int, int, int] = (255, 255, 255, 255)) -> str:
+        """
+        Create a new image.
+        
+        Args:
+            width: Width of the new image
+            height: Height of the new image
+            color: RGBA color tuple for the background
+            
+        Returns:
+            Session ID for the new image
+        """
+        result = await self._send_request("mcp_operation", {
+            "operation": "create_new_image",
             "width": width,
-            "height": height
+            "height": height,
+            "color": color
         })
+        self.session_id = result.get("session_id")
+        return self.session_id
+    
+    async def open_image(self, image_path: str) -> str:
+        """
+        Open an existing image.
         
-        return result.get("success", False)
+        Args:
+            image_path: Path to the image file
+            
+        Returns:
+            Session ID for the opened image
+        """
+        image_data = await self._run_blocking(_encode_file_base64, image_path)
+        result = await self._send_request("mcp_operation", {
+            "operation": "open_image",
+            "image_data": image_data
+        })
+        self.session_id = result.get("session_id")
+        return self.session_id
     
-    def apply_blur(self, radius: float = 5.0) -> bool:
+    async def save_image(self, output_path: str, format: str = "PNG", quality: int = 95) -> bool:
         """
-        Apply a Gaussian blur to the image.
+        Save the current image.
         
         Args:
-            radius: Blur radius
+            output_path: Path to save the image
+            format: Image format (PNG, JPEG, etc.)
+            quality: Image quality (1-100)
             
         Returns:
             True if successful
@@ -327,51 +1321,110 @@ class GimpMCPClient:
         if not self.session_id:
             raise Exception("No active session. Create or open an image first.")
         
-        # Send the request
-        result = self._send_request("mcp_operation", {
-            "operation": "apply_blur",
+        params = {
+            "operation": "save_image",
             "session_id": self.session_id,
-            "radius": radius
-        })
+            "format": format,
+            "quality": quality
+        }
         
-        return result.get("success", False)
+        # Let the server write paths it can reach; it sends the image back only if it didn't
+        server_path = _is_server_path(output_path, self.server_writable_dir)
+        if server_path:
+            params["output_path"] = _server_output_path(output_path)
+        
+        result = await self._send_request("mcp_operation", params)
+        if result.get("saved_path"):
+            return True
+        if server_path and output_path.startswith(SERVER_PATH_SCHEMES):
+            raise Exception(f"Server did not save the image to {output_path}")
+        
+        image_data = result.get("image_data")
+        if not image_data:
+            raise Exception("No image data returned")
+        await self._run_blocking(_write_base64_file, output_path, image_data)
+        return True
     
-    def adjust_brightness_contrast(self, brightness: int = 0, contrast: int = 0) -> bool:
+    async def analyze_image(self, analysis_type: str = "detailed") -> Dict[str, Any]:
         """
-        Adjust brightness and contrast.
+        Analyze the current image.
         
         Args:
-            brightness: Brightness adjustment (-100 to 100)
-            contrast: Contrast adjustment (-100 to 100)
+            analysis_type: Type of analysis to perform (basic, detailed)
             
         Returns:
-            True if successful
+            Analysis results
         """
         if not self.session_id:
             raise Exception("No active session. Create or open an image first.")
         
-        # Send the request
-        result = self._send_request("mcp_operation", {
-            "operation": "adjust_brightness_contrast",
+        result = await self._send_request("image_analysis", {
             "session_id": self.session_id,
-            "brightness": brightness,
-            "contrast": contrast
+            "analysis_type": analysis_type
         })
+        return result.get("analysis", {})
+    
+    async def execute_commands(self, commands: List[Dict[str, Any]], include_image_data: bool = False) -> Dict[str, Any]:
+        """
+        Execute a sequence of commands.
+        
+        Args:
+            commands: List of commands to execute
+            include_image_data: Whether to include the resulting image data
+            
+        Returns:
+            Execution results
+        """
+        params = {
+            "commands": commands,
+            "include_image_data": include_image_data
+        }
+        if self.session_id:
+            params["session_id"] = self.session_id
+        
+        result = await self._send_request("execute_gimp_commands", params)
+        if "session_id" in result:
+            self.session_id = result["session_id"]
+        return result
+    
+    async def close_session(self) -> bool:
+        """
+        Close the current session.
+        
+        Returns:
+            True if successful
+        """
+        if not self.session_id:
+            return True  # No session to close
         
+        result = await self._send_request("mcp_close_session", {
+            "session_id": self.session_id
+        })
+        self.session_id = None
         return result.get("success", False)
     
-    def add_text(self, text: str, x: int, y: int, font: str = "Arial", 
-               size: int = 24, color: Tuple[int, int, int] = (0, 0, 0)) -> bool:
+    async def get_ai_assistance(self, message: str, include_image_state: bool = True) -> Dict[str, Any]:
         """
-        Add text to the image.
+        Get AI assistance for image editing.
         
         Args:
-            text: Text content
-            x: X position
-            y: Y position
-            font: Font name
-            size: Font size
-            color: RGB color tuple
+            message: User message
+            include_image_state: Whether to include the current image state
+            
+        Returns:
+            AI response with suggestions
+        """
+        params = {"message": message}
+        if self.session_id and include_image_state:
+            params["session_id"] = self.session_id
+        return await self._send_request("ai_assistant", params)
+    
+    async def apply_suggestion(self, suggestion: Dict[str, Any]) -> bool:
+        """
+        Apply a suggestion from the AI assistant.
+        
+        Args:
+            suggestion: Suggestion from AI assistant
             
         Returns:
             True if successful
@@ -379,19 +1432,34 @@ class GimpMCPClient:
         if not self.session_id:
             raise Exception("No active session. Create or open an image first.")
         
-        # Send the request
-        result = self._send_request("mcp_operation", {
-            "operation": "add_text_layer",
-            "session_id": self.session_id,
-            "text": text,
-            "x": x,
-            "y": y,
-            "font": font,
-            "size": size,
-            "color": color
-        })
+        result = await self._send_request("mcp_operation", _suggestion_payload(suggestion, self.session_id))
+        return result.get("success", False)
+    
+    async def _op(self, name: str, **params: Any) -> bool:
+        """Run an editing operation from GimpMCPClient._OPS on the current session."""
+        if not self.session_id:
+            raise Exception("No active session. Create or open an image first.")
         
+        payload = _op_payload(name, self.session_id, params)
+        result = await self._send_request("mcp_operation", payload)
         return result.get("success", False)
+    
+    async def resize_image(self, width: int, height: int) -> bool:
+        """Resize the current image."""
+        return await self._op("resize_image", width=width, height=height)
+    
+    async def apply_blur(self, radius: float = 5.0) -> bool:
+        """Apply a Gaussian blur to the image."""
+        return await self._op("apply_blur", radius=radius)
+    
+    async def adjust_brightness_contrast(self, brightness: int = 0, contrast: int = 0) -> bool:
+        """Adjust brightness and contrast."""
+        return await self._op("adjust_brightness_contrast", brightness=brightness, contrast=contrast)
+    
+    async def add_text(self, text: str, x: int, y: int, font: str = "Arial",
+                       size: int = 24, color: Tuple[int, int, int] = (0, 0, 0)) -> bool:
+        """Add text to the image."""
+        return await self._op("add_text", text=text, x=x, y=y, font=font, size=size, color=color)
 
 # Example usage:
 if __name__ == "__main__":
@@ -399,18 +1467,20 @@ if __name__ == "__main__":
     client = GimpMCPClient()
     
     try:
-        # Create a new image
-        session_id = client.create_new_image(800, 600)
-        print(f"Created new image with session ID: {session_id}")
-        
-        # Add some text
-        client.add_text("Hello, Claude Desktop!", 100, 300)
-        
-        # Apply a blur
-        client.apply_blur(10.0)
+        # Pick up the previous run's session if the server still has it, starting over on a
+        # blank canvas so this run's edits don't pile onto the last run's; else create a new image
+        session_id = client.resume_session()
+        if session_id:
+            client.reset_image(800, 600)
+        else:
+            session_id = client.create_new_image(800, 600)
+        print(f"Using image session ID: {session_id}")
         
-        # Save the image
-        client.save_image("output.png")
+        # Add some text, apply a blur and save the image in a single round-trip
+        client.add_text("Hello, Claude Desktop!", 100, 300, batch=True)
+        client.apply_blur(10.0, batch=True)
+        client.save_image("output.png", batch=True)
+        client.flush()
         print("Image saved to output.png")
         
         # Analyze the image
@@ -431,6 +1501,6 @@ if __name__ == "__main__":
             print("Updated image saved to output_bright.png")
         
     finally:
-        # Close the session
-        client.close_session()
-        print("Session closed")
+        # Close the HTTP connections but keep the session open, so the next run can resume it
+        client.close()
+        print(f"Session {client.session_id} kept for the next run; call close_session() to discard it")